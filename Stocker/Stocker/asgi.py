@@ -2,6 +2,8 @@
 ASGI config for Stocker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn Stocker.asgi:application``, and
+set ASYNC_VIEWS=1 to use the async dashboard and supplier report views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
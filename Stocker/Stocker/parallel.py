@@ -0,0 +1,40 @@
+"""
+Concurrent queries for async views.
+
+Django's async ORM methods (aget, acount, ...) all run on the one
+thread-sensitive worker thread, so gathering them still executes the
+queries one after another. `gather_queries()` runs each piece in its own
+worker thread instead, with its own database connection, so independent
+queries really overlap: PostgreSQL serves them on separate backends and
+SQLite (in WAL mode) reads in parallel.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _in_worker(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # What request_finished does: respect CONN_MAX_AGE, and hand
+            # pooled connections back to the pool
+            close_old_connections()
+    return run
+
+
+async def gather_queries(parts):
+    """
+    Run every zero-argument function of `parts` (a dict name -> function)
+    concurrently in worker threads. Returns a dict name -> result.
+
+    The functions must be independent of each other and must evaluate
+    their querysets (return lists, not lazy querysets).
+    """
+    names = list(parts)
+    results = await asyncio.gather(*(
+        sync_to_async(_in_worker(parts[name]), thread_sensitive=False)() for name in names
+    ))
+    return dict(zip(names, results))
@@ -0,0 +1,211 @@
+"""
+Read-replica routing for the report pages and jobs.
+
+Reads of the apps in REPLICA_APPS go to the "replica" database alias, but
+only inside `replica_reads()` (or a view decorated with `read_replica`)
+and only while the replica is known to be fresh enough. Everything else,
+and every write, uses the primary. Without a "replica" alias in
+DATABASES this module changes nothing.
+
+Freshness is tracked as the moment the replica is known to be complete
+up to ("replicated up to"), checked at most every CHECK_INTERVAL seconds.
+A replica further behind than REPLICA_MAX_LAG seconds, or unreachable,
+is skipped until a later check finds it healthy again.
+
+Read your writes: a POST (or any unsafe request) sets a short-lived
+cookie, and requests carrying it read the primary for REPLICA_MAX_LAG
+seconds, by which time the replica has the change.
+"""
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections, DatabaseError, DEFAULT_DB_ALIAS
+
+
+logger = logging.getLogger(__name__)
+
+REPLICA = "replica"
+
+PIN_COOKIE = "stocker_primary"
+
+# Seconds between two replication checks
+CHECK_INTERVAL = 5
+
+# Reads of these apps may be served by the replica
+REPLICA_APPS = {"product"}
+
+# Version (product.versions) that sync_replica stamps on the primary just
+# before each copy: its time in the replica is what the copy is complete up to
+SYNC_MARKER = "replica:synced"
+
+# None: read the primary. Otherwise the datetime the replica must be
+# complete up to, or True for "within REPLICA_MAX_LAG".
+_reads = ContextVar("replica_reads", default=None)
+
+# Last check: monotonic time it ran, and the datetime the replica was
+# complete up to then (None when it was unreachable)
+_state = {"checked": None, "replicated_up_to": None}
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _replicated_up_to():
+    """
+    The time up to which the replica holds every write of the primary.
+
+    PostgreSQL reports its replay position. Elsewhere (a SQLite copy made
+    by sync_replica) it is the SYNC_MARKER stamp the copy carries; a
+    replica without one never counts as fresh.
+    """
+    now = datetime.now(dt_timezone.utc)
+    connection = connections[REPLICA]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN NOT pg_is_in_recovery() "
+                "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )
+            lag = float(cursor.fetchone()[0])
+        return datetime.fromtimestamp(now.timestamp() - lag, dt_timezone.utc)
+
+    from product.models import DataVersion
+
+    synced = DataVersion.objects.using(REPLICA).filter(name=SYNC_MARKER).values_list("changed_at", flat=True).first()
+    return synced or datetime.min.replace(tzinfo=dt_timezone.utc)
+
+
+def replicated_up_to():
+    """
+    Cached result of the last replication check, or None when the replica
+    is missing or failed the check.
+    """
+    if not replica_configured():
+        return None
+    checked = _state["checked"]
+    if checked is None or time.monotonic() - checked >= CHECK_INTERVAL:
+        try:
+            _state["replicated_up_to"] = _replicated_up_to()
+        except DatabaseError:
+            logger.warning("Read replica unavailable, reading from the primary", exc_info=True)
+            _state["replicated_up_to"] = None
+        _state["checked"] = time.monotonic()
+    return _state["replicated_up_to"]
+
+
+def use_replica():
+    """
+    Whether a read made now may go to the replica.
+    """
+    since = _reads.get()
+    if since is None or not replica_configured():
+        return False
+    # Reads inside a writing transaction must see its own changes
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    up_to = replicated_up_to()
+    if up_to is None:
+        return False
+    oldest = datetime.now(dt_timezone.utc).timestamp() - settings.REPLICA_MAX_LAG
+    if since is not True:
+        oldest = max(oldest, since.timestamp())
+    return up_to.timestamp() >= oldest
+
+
+@contextmanager
+def replica_reads(since=None):
+    """
+    Let reads in the block use the replica. With `since` (a datetime) the
+    replica is used only if it already holds everything written up to
+    then, e.g. the moment a job was queued.
+    """
+    token = _reads.set(since or True)
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+def read_replica(view):
+    """
+    View decorator: serve the view's reads from the replica, unless the
+    client wrote something in the last REPLICA_MAX_LAG seconds.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if PIN_COOKIE in request.COOKIES:
+                return await view(request, *args, **kwargs)
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+        return wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if PIN_COOKIE in request.COOKIES:
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin a client to the primary for REPLICA_MAX_LAG seconds after an
+    unsafe request, so it reads its own writes.
+    """
+
+    # Usable in both modes, so async views stay on the event loop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._pin(request, await self.get_response(request))
+
+    def _pin(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_MAX_LAG, httponly=True, samesite="Lax",
+            )
+        return response
+
+
+class ReplicaRouter:
+    """
+    Writes, migrations and other apps always use the primary; product reads
+    use the replica when `use_replica()` allows.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS and use_replica():
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # An object read from the replica is still saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA
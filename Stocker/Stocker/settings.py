@@ -11,8 +11,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
+import tempfile
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
+
+from .sqlite import sqlite_options
+
 load_dotenv()
 
 
@@ -46,6 +52,8 @@ INSTALLED_APPS = [
     'main',
     'accounts',
     'product',
+    'jobs',
+    'notifications',
 
 ]
 
@@ -58,6 +66,18 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Django 5.1+ only reads STORAGES. Uploads reach the media storage through
+# the upload_image background job, so a slow remote store never blocks a request.
+STORAGES = {
+    'default': {
+        'BACKEND': os.getenv('MEDIA_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'),
+        'OPTIONS': json.loads(os.getenv('MEDIA_STORAGE_OPTIONS', '{}')),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -66,6 +86,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Stocker.replica.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'Stocker.urls'
@@ -91,13 +112,138 @@ WSGI_APPLICATION = 'Stocker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE picks the database profile:
+#
+# sqlite (default): the local db.sqlite3, tuned on every new connection by
+# Stocker.sqlite (WAL, busy timeout, mmap, ...). Override single pragmas
+# with a JSON object in SQLITE_PRAGMAS, e.g. '{"mmap_size": 0}'.
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them
+# after every request).
+#
+# postgresql: POSTGRES_DB / POSTGRES_USER / POSTGRES_PASSWORD /
+# POSTGRES_HOST / POSTGRES_PORT, with connections shared through psycopg's
+# pool (pip install -r requirements-postgres.txt), sized by
+# DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE and DB_POOL_TIMEOUT (seconds to wait
+# for a free connection). DB_POOL=0 turns the pool off and falls back to
+# DB_CONN_MAX_AGE. Exports stream through server-side cursors; set
+# DB_DISABLE_SERVER_SIDE_CURSORS=1 behind a transaction-pooling PgBouncer.
+# A throwaway local server to try it against:
+#   docker run --rm -d -p 5432:5432 -e POSTGRES_USER=stocker -e POSTGRES_PASSWORD=stocker postgres:16
+#   DB_ENGINE=postgresql POSTGRES_PASSWORD=stocker python manage.py migrate
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = os.getenv('DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'stocker'),
+            'USER': os.getenv('POSTGRES_USER', 'stocker'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+            # Pooled connections go back to the pool after each request
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', '') == '1',
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': sqlite_options(json.loads(os.getenv('SQLITE_PRAGMAS', '{}'))),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            # Tests use a file too: threads sharing an in-memory database get
+            # "table is locked" at once instead of waiting like they do on disk
+            'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'stocker-test.sqlite3')},
+        }
     }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
+
+# Read replica for the dashboard, reports and export jobs (Stocker.replica):
+# REPLICA_SQLITE_PATH, a second SQLite file kept up to date with
+# `manage.py sync_replica --loop`, or REPLICA_POSTGRES_HOST /
+# REPLICA_POSTGRES_PORT, a streaming standby of the primary. A replica more
+# than REPLICA_MAX_LAG seconds behind is skipped, and clients read the
+# primary for that long after each POST.
+
+if DB_ENGINE == 'sqlite' and os.getenv('REPLICA_SQLITE_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('REPLICA_SQLITE_PATH'),
+        # Read only: no need to take the write lock up front
+        'OPTIONS': sqlite_options(json.loads(os.getenv('SQLITE_PRAGMAS', '{}')), transaction_mode=None),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DB_ENGINE == 'postgresql' and os.getenv('REPLICA_POSTGRES_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('REPLICA_POSTGRES_HOST'),
+        'PORT': os.getenv('REPLICA_POSTGRES_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['Stocker.replica.ReplicaRouter']
+
+REPLICA_MAX_LAG = int(os.getenv('REPLICA_MAX_LAG', 30))
+
+
+# ASYNC_VIEWS=1 serves the dashboard and supplier report with their async
+# views, which run their independent queries concurrently. Worth it with a
+# database across the network (PostgreSQL), where the round trips overlap;
+# with the local SQLite file there is nothing to wait on. Best under an
+# ASGI server (pip install uvicorn; uvicorn Stocker.asgi:application); they
+# also work under WSGI. Compare with `manage.py bench_async_views`.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem is per process; use the file-based backend
+# (CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache,
+# CACHE_LOCATION=/path/to/dir) when several worker processes must share it.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'stocker'),
+    },
+    # {% cache %} fragments of the inventory page, kept apart so large
+    # fragments don't push the dashboard and filter entries out. Configured
+    # on its own (FRAGMENT_CACHE_BACKEND / FRAGMENT_CACHE_LOCATION): a
+    # per-process cache is correct here too, as fragments are keyed on
+    # versions kept in the database (product.versions).
+    'template_fragments': {
+        'BACKEND': os.getenv('FRAGMENT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', 'stocker-fragments'),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
 }
 
+# Seconds a dashboard snapshot is served before it is recomputed, even
+# without any change signal.
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 300))
+
+# Seconds a memoized inventory filter result (matching product ids) is kept
+FILTER_CACHE_TTL = int(os.getenv('FILTER_CACHE_TTL', 300))
+
+# Seconds a rendered inventory fragment (product card, edit form, filter
+# list) is kept; its key changes with the data, so this only bounds memory.
+# 0 turns fragment caching off.
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 3600))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,11 +291,15 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  
 
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Set EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend (or locmem)
+# to deliver alerts offline.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", os.path.join(BASE_DIR, 'sent_emails'))
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+EMAIL_TIMEOUT = 30
 
 
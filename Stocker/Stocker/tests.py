@@ -0,0 +1,88 @@
+import importlib.util
+import os
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase
+
+from product.versions import bump_version, changed_at
+
+from . import replica
+
+
+def load_settings(**env):
+    """
+    A fresh copy of the settings module, run with only `env` among the
+    database and cache variables; the loaded settings stay untouched.
+    """
+    prefixes = ("DB_", "POSTGRES_", "REPLICA_", "CACHE_", "FRAGMENT_CACHE_")
+    environ = {k: v for k, v in os.environ.items() if not k.startswith(prefixes)}
+    with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+        spec = importlib.util.find_spec("Stocker.settings")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    """
+    DATABASES as built by the settings module for a given environment.
+    """
+
+    def database_settings(self, **env):
+        return load_settings(**env).DATABASES
+
+    def test_sqlite_is_the_default(self):
+        default = self.database_settings()["default"]
+
+        self.assertEqual(default["ENGINE"], "django.db.backends.sqlite3")
+        self.assertIn("PRAGMA journal_mode=WAL", default["OPTIONS"]["init_command"])
+
+    def test_postgresql_uses_the_pool(self):
+        default = self.database_settings(DB_ENGINE="postgresql", POSTGRES_HOST="db", DB_POOL_MAX_SIZE="20")["default"]
+
+        self.assertEqual((default["ENGINE"], default["HOST"]), ("django.db.backends.postgresql", "db"))
+        self.assertEqual(default["OPTIONS"]["pool"]["max_size"], 20)
+        # The pool owns connection reuse
+        self.assertEqual(default["CONN_MAX_AGE"], 0)
+        self.assertTrue(default["CONN_HEALTH_CHECKS"])
+
+    def test_postgresql_without_the_pool(self):
+        default = self.database_settings(DB_ENGINE="postgresql", DB_POOL="0", DB_CONN_MAX_AGE="60")["default"]
+
+        self.assertEqual(default["OPTIONS"], {})
+        self.assertEqual(default["CONN_MAX_AGE"], 60)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.database_settings(DB_ENGINE="mysql")
+
+
+class CacheSettingsTests(SimpleTestCase):
+
+    def test_fragment_cache_is_configured_on_its_own(self):
+        caches = load_settings(
+            CACHE_BACKEND="django.core.cache.backends.redis.RedisCache", CACHE_LOCATION="redis://cache:6379/0",
+            FRAGMENT_CACHE_LOCATION="fragments",
+        ).CACHES
+
+        self.assertEqual(caches["default"]["LOCATION"], "redis://cache:6379/0")
+        # Not the default cache's URL with a suffix, which no backend but locmem accepts
+        self.assertEqual(caches["template_fragments"]["LOCATION"], "fragments")
+        self.assertEqual(caches["template_fragments"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+
+
+# The test database stands in for the replica: it carries whatever was stamped
+@mock.patch.object(replica, "REPLICA", DEFAULT_DB_ALIAS)
+class ReplicaFreshnessTests(TestCase):
+
+    def test_unsynced_replica_is_never_fresh(self):
+        self.assertEqual(replica._replicated_up_to(), datetime.min.replace(tzinfo=dt_timezone.utc))
+
+    def test_replica_is_complete_up_to_its_sync_stamp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version(replica.SYNC_MARKER)
+
+        self.assertEqual(replica._replicated_up_to(), changed_at(replica.SYNC_MARKER))
@@ -23,5 +23,6 @@ urlpatterns = [
     path('', include("accounts.urls")),
     path('', include("main.urls")),
     path('inventory/', include("product.urls")),
+    path('jobs/', include("jobs.urls")),
 ]  + static(settings.MEDIA_URL,document_root=settings.MEDIA_ROOT)
 
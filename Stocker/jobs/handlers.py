@@ -0,0 +1,181 @@
+import csv
+import io
+import logging
+import tempfile
+import time
+
+from django.apps import apps
+from django.core.files import File
+from django.http import QueryDict
+from django.utils import timezone
+
+from product.csv_export import (
+    product_export_rows, inventory_report_products, inventory_report_rows, supplier_report_rows,
+)
+from product.filters import filter_products, has_filters
+from product.images import delete_variants, image_variants
+from product.importer import import_products
+from product.models import Product
+from product.rollups import supplier_totals, rebuild_rollups
+from product.search import rebuild_search_index
+from Stocker.replica import replica_reads
+
+from .models import Job
+from .runner import register
+
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 1000
+
+# Pushing a staged image to the media storage is retried with a doubling delay
+UPLOAD_ATTEMPTS = 4
+UPLOAD_RETRY_DELAY = 2
+
+
+def _write_csv_result(job, rows, prefix):
+    """
+    Write `rows` to a CSV result file, updating the job progress as it goes.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+        text.write("\ufeff")  # BOM so Excel opens UTF-8 correctly
+        writer = csv.writer(text)
+        written = 0
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+            if written % PROGRESS_EVERY == 0:
+                job.set_progress(min(written, job.total))
+        text.detach()  # flushes into tmp
+        tmp.seek(0)
+
+        filename = f'{prefix}-{timezone.now().strftime("%Y%m%d-%H%M%S")}.csv'
+        job.result_file.save(filename, File(tmp), save=False)
+    job.progress = job.total
+    return written
+
+
+def _filtered_products(job, with_suppliers=True):
+    """
+    The filtered product queryset, or None when the job has no filters.
+    """
+    params = QueryDict(job.params.get("query", ""))
+    if not has_filters(params, with_suppliers=with_suppliers):
+        return None
+    return filter_products(Product.objects.all(), params, with_suppliers=with_suppliers)
+
+
+# Report jobs read from the replica once it holds everything written
+# before the job was queued, so a report reflects the user's last edits.
+
+@register("export_products")
+def export_products_job(job):
+    with replica_reads(since=job.created_at):
+        qs = Product.objects.all()
+        job.set_progress(0, qs.count())
+        _write_csv_result(job, product_export_rows(qs), "products")
+    job.mark_done()
+
+
+@register("inventory_report")
+def inventory_report_job(job):
+    with replica_reads(since=job.created_at):
+        qs, by_category = inventory_report_products(QueryDict(job.params.get("query", "")))
+        job.set_progress(0, qs.count())
+        _write_csv_result(job, inventory_report_rows(qs, by_category), "inventory-report")
+    job.mark_done()
+
+
+@register("supplier_report")
+def supplier_report_job(job):
+    with replica_reads(since=job.created_at):
+        suppliers_qs = supplier_totals(_filtered_products(job, with_suppliers=False))
+        job.set_progress(0, 1)
+        _write_csv_result(job, supplier_report_rows(suppliers_qs), "supplier-report")
+    job.mark_done()
+
+
+@register("rebuild_rollups")
+def rebuild_rollups_job(job):
+    rebuild_rollups()
+    job.mark_done()
+
+
+@register("rebuild_search_index")
+def rebuild_search_index_job(job):
+    rebuild_search_index()
+    job.mark_done()
+
+
+def _open_upload(job):
+    f = job.input_file.storage.open(job.input_file.name, "rb")
+    return io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+
+
+@register("import_products")
+def import_products_job(job):
+    # Every chunk commits on its own, so decode the whole file before the
+    # first one: a bad byte late in the file must not leave a partial import
+    with _open_upload(job) as text_file:
+        try:
+            # Rows, not lines: a quoted field may span several lines
+            total = max(sum(1 for row in csv.reader(text_file) if row) - 1, 0)  # minus the header
+        except UnicodeDecodeError:
+            raise ValueError("Invalid file encoding. Please use UTF-8.")
+    job.set_progress(0, total)
+
+    with _open_upload(job) as text_file:
+        imported, skipped, skips = import_products(text_file, on_progress=job.set_progress)
+
+    job.mark_done(imported=imported, skipped=skipped, skips=skips)
+
+
+@register("upload_image")
+def upload_image_job(job):
+    model = apps.get_model(job.params["model"])
+    instance = model.objects.filter(pk=job.params["pk"]).first()
+    superseded = Job.objects.filter(
+        kind="upload_image", id__gt=job.id,
+        params__model=job.params["model"], params__pk=job.params["pk"],
+    ).exists()
+    if instance is None or superseded:
+        # Deleted meanwhile, or a newer upload for the same object will win
+        job.input_file.delete(save=False)
+        job.mark_done(skipped=True)
+        return
+
+    replaced = instance.image.name
+    delay = UPLOAD_RETRY_DELAY
+    for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+        try:
+            with job.input_file.open("rb") as f:
+                instance.image.save(job.params["filename"], File(f), save=False)
+            break
+        except Exception:
+            if attempt == UPLOAD_ATTEMPTS:
+                # Give up: keep the previous image and stop showing it as pending
+                model.objects.filter(pk=instance.pk).update(image_pending=False, updated_at=timezone.now())
+                raise
+            logger.warning("Upload for job %s failed (attempt %s), retrying in %ss", job.id, attempt, delay, exc_info=True)
+            time.sleep(delay)
+            delay *= 2
+
+    instance.image_pending = False
+    instance.save(update_fields=["image", "image_pending", "updated_at"])
+    if replaced and replaced != instance.image.name:
+        delete_variants(instance.image.storage, replaced)
+    job.input_file.delete(save=False)
+    job.mark_done(image=instance.image.name)
+
+
+@register("image_variants")
+def image_variants_job(job):
+    model = apps.get_model(job.params["model"])
+    instance = model.objects.filter(pk=job.params["pk"]).first()
+    if instance is None or instance.image.name != job.params["name"]:
+        # Deleted, or given another image meanwhile (which has its own job)
+        job.mark_done(skipped=True)
+        return
+    variants = image_variants(instance.image)
+    job.mark_done(created=bool(variants))
@@ -0,0 +1,67 @@
+import multiprocessing
+import threading
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections, close_old_connections
+
+
+def _worker_loop(poll_interval, once):
+    # Imported here: a spawned child imports this module before Django is set up
+    from jobs.runner import run_pending
+
+    try:
+        while True:
+            ran = run_pending()
+            if once:
+                return
+            if not ran:
+                time.sleep(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def _process_worker_loop(poll_interval, once):
+    # Under spawn (the default on macOS and Windows) the child is a fresh
+    # interpreter that has to load the apps itself
+    django.setup()
+    close_old_connections()
+    _worker_loop(poll_interval, once)
+
+
+def _process_context():
+    # fork children inherit the loaded apps; fall back to spawn where it is missing
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, exports, reports) using a thread or process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Number of worker threads/processes.")
+        parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+
+    def handle(self, *args, **opts):
+        workers = max(1, opts["workers"])
+        loop_args = (opts["poll_interval"], opts["once"])
+        self.stdout.write(f"Starting {workers} {opts['mode']} worker(s)")
+
+        if opts["mode"] == "process":
+            # Children must open their own database connections
+            connections.close_all()
+            context = _process_context()
+            pool = [context.Process(target=_process_worker_loop, args=loop_args, daemon=True) for _ in range(workers)]
+        else:
+            pool = [threading.Thread(target=_worker_loop, args=loop_args, daemon=True) for _ in range(workers)]
+
+        for worker in pool:
+            worker.start()
+        try:
+            for worker in pool:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping workers")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import_products', 'Import Products'), ('export_products', 'Export Products'), ('inventory_report', 'Inventory Report'), ('supplier_report', 'Supplier Report'), ('dispatch_alerts', 'Dispatch Alerts')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_alter_job_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import_products', 'Import Products'), ('export_products', 'Export Products'), ('inventory_report', 'Inventory Report'), ('supplier_report', 'Supplier Report'), ('dispatch_alerts', 'Dispatch Alerts'), ('rebuild_rollups', 'Rebuild Rollups'), ('rebuild_search_index', 'Rebuild Search Index'), ('upload_image', 'Upload Image')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+
+
+# Job inputs and results always live on local disk under MEDIA_ROOT,
+# whatever storage product images use.
+job_storage = FileSystemStorage()
+
+
+class Job(models.Model):
+
+    KIND_CHOICES = [
+        ('import_products', 'Import Products'),
+        ('export_products', 'Export Products'),
+        ('inventory_report', 'Inventory Report'),
+        ('supplier_report', 'Supplier Report'),
+        ('dispatch_alerts', 'Dispatch Alerts'),
+        ('rebuild_rollups', 'Rebuild Rollups'),
+        ('rebuild_search_index', 'Rebuild Search Index'),
+        ('upload_image', 'Upload Image'),
+        ('schedule_alerts', 'Schedule Alerts'),
+        ('image_variants', 'Image Variants'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    params = models.JSONField(default=dict, blank=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    input_file = models.FileField(upload_to='jobs/input/', storage=job_storage, blank=True, null=True)
+    result_file = models.FileField(upload_to='jobs/results/', storage=job_storage, blank=True, null=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the job runs (see jobs.runner)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, int(self.progress * 100 / self.total))
+
+    def set_progress(self, progress, total=None):
+        """
+        Store progress with a single UPDATE so the polling UI sees it right away.
+        """
+        self.progress = progress
+        fields = {'progress': progress}
+        if total is not None:
+            self.total = total
+            fields['total'] = total
+        Job.objects.filter(id=self.id).update(**fields)
+
+    def mark_done(self, **result):
+        self.status = 'done'
+        self.result = result
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'progress', 'result', 'input_file', 'result_file', 'finished_at'])
+
+    def mark_failed(self, error):
+        self.status = 'failed'
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
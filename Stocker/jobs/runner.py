@@ -0,0 +1,147 @@
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# A running job's worker refreshes heartbeat_at every HEARTBEAT_INTERVAL
+# seconds. A job without a heartbeat for STALE_AFTER seconds lost its worker
+# (crashed or killed) and is queued again, up to MAX_ATTEMPTS runs in all.
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = 5 * 60
+MAX_ATTEMPTS = 3
+
+
+def register(kind):
+    """
+    Decorator that registers `func(job)` as the handler for jobs of `kind`.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, user=None, params=None, input_file=None):
+    job = Job(kind=kind, created_by=user, params=params or {})
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def enqueue_once(kind, user=None, params=None):
+    """
+    Enqueue a `kind` job unless one is already waiting in the queue.
+    Used for idempotent housekeeping jobs such as alert dispatch.
+    """
+    job = Job.objects.filter(kind=kind, status='queued').first()
+    return job or enqueue(kind, user=user, params=params)
+
+
+def requeue_stale_jobs():
+    """
+    Queue running jobs whose worker went away again, or fail them once they
+    used up their attempts. Returns how many were queued again.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=STALE_AFTER)
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='running',
+    )
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error='The worker running this job stopped responding.', finished_at=now,
+    )
+    requeued = stale.update(status='queued', started_at=None, heartbeat_at=None, progress=0)
+    if requeued:
+        logger.warning("Requeued %s job(s) whose worker stopped responding", requeued)
+    return requeued
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it.
+
+    The conditional UPDATE makes sure two workers never run the same job,
+    without needing row locks (SQLite has none).
+    """
+    while True:
+        job_id = (
+            Job.objects.filter(status='queued')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+
+
+@contextmanager
+def _heartbeat(job):
+    """
+    Refresh the job's heartbeat from a side thread while the block runs, so
+    handlers don't have to.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                Job.objects.filter(id=job.id, status='running').update(heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+        with _heartbeat(job):
+            handler(job)
+    except Exception:
+        logger.exception("Job %s failed", job.id)
+        job.mark_failed(traceback.format_exc(limit=5))
+
+
+def run_pending(max_jobs=None):
+    """
+    Run queued jobs until the queue is empty (or `max_jobs` were run).
+    Returns how many jobs this call ran.
+    """
+    ran = 0
+    requeue_stale_jobs()
+    while max_jobs is None or ran < max_jobs:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
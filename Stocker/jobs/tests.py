@@ -0,0 +1,205 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from django.utils import timezone
+
+from product.images import image_variants
+from product.models import Product, Category
+
+from .models import Job
+from .runner import enqueue, claim_next_job, run_job, requeue_stale_jobs, STALE_AFTER, MAX_ATTEMPTS
+
+
+CSV_HEADER = b"Name,SKU,Category,Suppliers,Cost Price,Quantity,Reorder Level,Stock Status,Description\n"
+
+
+class JobTestCase(TestCase):
+    """
+    Job input and result files go to a temporary MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ImportJobTests(JobTestCase):
+
+    def run_import(self, content):
+        enqueue("import_products", input_file=ContentFile(content, name="products.csv"))
+        job = claim_next_job()
+        run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_reports_skipped_rows(self):
+        job = self.run_import(
+            CSV_HEADER
+            + b"Apple,APL-1,Fruit,Acme,1.50,10,2,in_stock,\n"
+            + b"Pear,PER-1,,Acme,1.50,10,2,in_stock,\n"
+        )
+
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result, {"imported": 1, "skipped": 1, "skips": ["row 3: missing Category"]})
+
+    def test_bad_encoding_fails_before_anything_is_imported(self):
+        rows = b"".join(b"Item %d,SKU-%d,Fruit,,1.00,1,0,in_stock,\n" % (i, i) for i in range(2500))
+        with self.assertLogs("jobs.runner", "ERROR"):
+            job = self.run_import(CSV_HEADER + rows + b"Caf\xe9,SKU-X,Fruit,,1.00,1,0,in_stock,\n")
+
+        self.assertEqual(job.status, "failed")
+        self.assertIn("Invalid file encoding", job.error)
+        self.assertFalse(Product.objects.exists())
+
+    def test_total_counts_rows_not_lines(self):
+        job = self.run_import(
+            CSV_HEADER
+            + b'Apple,APL-1,Fruit,Acme,1.50,10,2,in_stock,"Crisp\nand\nsweet"\n'
+            + b"Pear,PER-1,Fruit,Acme,1.50,10,2,in_stock,\n"
+        )
+
+        self.assertEqual((job.total, job.result["imported"]), (2, 2))
+
+
+class ReportJobTests(JobTestCase):
+
+    def test_inventory_report_respects_filters(self):
+        fruit = Category.objects.create(name="Fruit")
+        tools = Category.objects.create(name="Tools")
+        Product.objects.create(name="Apple", sku="APL-1", category=fruit, cost_price="1.50", quantity=10)
+        Product.objects.create(name="Hammer", sku="HAM-1", category=tools, cost_price="9.00", quantity=3)
+
+        enqueue("inventory_report", params={"query": f"category={tools.id}"})
+        job = claim_next_job()
+        run_job(job)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, "done")
+        with job.result_file.open("rb") as f:
+            content = f.read().decode("utf-8-sig")
+        self.assertIn("Hammer,HAM-1,Tools", content)
+        self.assertNotIn("APL-1", content)
+
+
+class ImageJobTestCase(JobTestCase):
+
+    def image(self, name):
+        buf = io.BytesIO()
+        Image.new("RGB", (400, 200), (200, 80, 40)).save(buf, "JPEG")
+        return ContentFile(buf.getvalue(), name=name)
+
+
+class UploadImageJobTests(ImageJobTestCase):
+
+    def test_replaced_image_loses_its_variants(self):
+        category = Category.objects.create(name="Fruit")
+        category.image.save("photo.jpg", self.image("photo.jpg"))
+        old = category.image
+        old_variants = image_variants(old)
+
+        enqueue("upload_image", params={"model": "product.category", "pk": category.id, "filename": "new.jpg"},
+                input_file=self.image("new.jpg"))
+        run_job(claim_next_job())
+
+        category.refresh_from_db()
+        self.assertEqual(category.image.name, "images/new.jpg")
+        for name in [*old_variants["webp"].values(), *old_variants["jpeg"].values()]:
+            self.assertFalse(old.storage.exists(name), name)
+
+
+class ImageVariantsJobTests(ImageJobTestCase):
+
+    def variant_jobs(self):
+        return list(Job.objects.filter(kind="image_variants").order_by("id").values_list("params__name", flat=True))
+
+    def test_new_image_queues_a_variants_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name="Fruit")
+            category.image.save("photo.jpg", self.image("photo.jpg"))
+        self.assertEqual(self.variant_jobs(), ["images/photo.jpg"])
+
+        run_job(claim_next_job())
+
+        self.assertEqual(Job.objects.get(kind="image_variants").status, "done")
+        self.assertTrue(category.image.storage.exists("images/photo.jpg.320w.webp"))
+
+    def test_saves_that_keep_the_image_queue_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name="Fruit")
+            category.image.save("photo.jpg", self.image("photo.jpg"))
+            category.description = "Fresh"
+            category.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.get(id=category.id)
+            category.description = "Ripe"
+            category.save()
+        self.assertEqual(self.variant_jobs(), ["images/photo.jpg"])
+
+    def test_superseded_image_is_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name="Fruit")
+            category.image.save("photo.jpg", self.image("photo.jpg"))
+            category.image.save("new.jpg", self.image("new.jpg"))
+        self.assertEqual(self.variant_jobs(), ["images/photo.jpg", "images/new.jpg"])
+
+        first = claim_next_job()
+        run_job(first)
+
+        first.refresh_from_db()
+        self.assertEqual(first.result, {"skipped": True})
+        self.assertFalse(category.image.storage.exists("images/photo.jpg.320w.webp"))
+
+
+class StaleJobTests(TestCase):
+
+    def claim_and_lose_worker(self):
+        job = claim_next_job()
+        Job.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=STALE_AFTER + 1))
+        return job
+
+    def test_job_of_a_dead_worker_is_requeued(self):
+        enqueue("rebuild_rollups")
+        job = self.claim_and_lose_worker()
+
+        with self.assertLogs("jobs.runner", "WARNING"):
+            self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().id, job.id)
+
+    def test_live_job_is_left_alone(self):
+        enqueue("rebuild_rollups")
+        claim_next_job()
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertIsNone(claim_next_job())
+
+    def test_job_fails_after_max_attempts(self):
+        job = enqueue("rebuild_rollups")
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.claim_and_lose_worker()
+            with self.assertLogs("jobs.runner", "WARNING"):
+                requeue_stale_jobs()
+        self.claim_and_lose_worker()
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", MAX_ATTEMPTS))
+
+
+class RunJobsCommandTests(TransactionTestCase):
+
+    def test_process_workers_run_jobs(self):
+        job = enqueue("rebuild_rollups")
+
+        call_command("run_jobs", mode="process", workers=1, once=True, stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path("<int:job_id>/", views.job_detail_view, name="job_detail_view"),
+    path("<int:job_id>/status/", views.job_status_view, name="job_status_view"),
+    path("<int:job_id>/download/", views.job_download_view, name="job_download_view"),
+]
@@ -0,0 +1,46 @@
+from django.contrib.auth.decorators import login_required
+from django.http import HttpRequest, JsonResponse, FileResponse, Http404
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from .models import Job
+
+
+def _get_user_job(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if not (request.user.is_superuser or job.created_by_id == request.user.id):
+        raise Http404("Job not found")
+    return job
+
+
+@login_required
+def job_detail_view(request: HttpRequest, job_id):
+    job = _get_user_job(request, job_id)
+    return render(request, 'jobs/job_detail.html', {'job': job})
+
+
+@login_required
+def job_status_view(request: HttpRequest, job_id):
+    job = _get_user_job(request, job_id)
+
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'percent': job.percent,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error.strip() else '',
+        'download_url': reverse('jobs:job_download_view', args=[job.id]) if job.result_file else '',
+    })
+
+
+@login_required
+def job_download_view(request: HttpRequest, job_id):
+    job = _get_user_job(request, job_id)
+    if job.status != 'done' or not job.result_file:
+        raise Http404("Result not ready")
+
+    filename = job.result_file.name.rsplit('/', 1)[-1]
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename, content_type="text/csv; charset=utf-8")
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from product.models import Product, Category, Supplier
+from product.signals import products_bulk_changed
+
+from .snapshot import invalidate_dashboard
+
+
+for model in (Product, Category, Supplier):
+    post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f"dashboard_save_{model.__name__}")
+    post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f"dashboard_delete_{model.__name__}")
+
+m2m_changed.connect(invalidate_dashboard, sender=Product.supplier.through, dispatch_uid="dashboard_m2m_supplier")
+products_bulk_changed.connect(invalidate_dashboard, dispatch_uid="dashboard_bulk_products")
@@ -0,0 +1,278 @@
+from datetime import datetime, time, timedelta
+import asyncio
+import time as _time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Stocker.parallel import gather_queries
+from Stocker.replica import replica_reads
+from product.models import Product, Category, Supplier, InventorySnapshot
+from product.snapshots import snapshot_range, last_days
+from product.versions import get_version, aget_version, bump_version, changed_at
+
+
+SNAPSHOT_KEY = "dashboard:snapshot"
+LOCK_KEY = "dashboard:lock"
+
+# Shared version (product.versions) the cached snapshot is stamped with
+DASHBOARD_VERSION = "dashboard"
+
+# How long a recompute may hold the lock, and how long a request with no
+# snapshot at all waits for the lock holder before computing on its own.
+LOCK_TIMEOUT = 30
+WAIT_FOR_REBUILD = 5
+
+# Days shown on the inventory value history chart
+HISTORY_DAYS = 90
+
+
+def dashboard_queries(today):
+    """
+    The dashboard's independent queries, as name -> function returning the
+    evaluated result. None of them depends on another, so the async view
+    runs them concurrently.
+    """
+    soon  = today + timedelta(days=30)
+
+    # All headline counts and the status breakdown in one pass over Product
+    def counts():
+        return Product.objects.aggregate(
+            total_products=Count('id'),
+            low_stock=Count('id', filter=Q(is_low_stock=True)),
+            out_of_stock=Count('id', filter=Q(stock_status='out_of_stock') | Q(quantity__lte=0)),
+            in_stock_status=Count('id', filter=Q(stock_status='in_stock')),
+            almost_done_status=Count('id', filter=Q(stock_status='almost_done')),
+            out_of_stock_status=Count('id', filter=Q(stock_status='out_of_stock')),
+        )
+
+    def total_categories():
+        return Category.objects.count()
+
+    def low_stock():
+        return list(
+            Product.objects
+            .filter(is_low_stock=True)
+            .order_by('quantity')[:10]
+        )
+
+    def expiring_soon():
+        return list(
+            Product.objects
+            .filter(expiry_date__isnull=False, expiry_date__gte=today, expiry_date__lte=soon)
+            .order_by('expiry_date')[:10]
+        )
+
+    def recent_activity():
+        return list(
+            Product.objects
+            .order_by('-updated_at')[:10]
+            .values('name', 'updated_at', 'sku')
+        )
+
+    def supplier_perf():
+        return list(
+            Supplier.objects
+            .annotate(total_products=Count('products'))
+            .order_by('-total_products')[:10]
+            .values('name', 'total_products')
+        )
+
+    def top_products():
+        return list(
+            Product.objects
+            .order_by('-quantity')
+            .values('name', 'quantity')[:6]
+        )
+
+    # very simple “activity by day” over last 7 days (updates)
+    days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+
+    def per_day():
+        since = timezone.make_aware(datetime.combine(days[0], time.min))
+        return dict(
+            Product.objects
+            .filter(updated_at__gte=since)
+            .annotate(day=TruncDate('updated_at'))
+            .values('day')
+            .annotate(total=Count('id'))
+            .values_list('day', 'total')
+        )
+
+    # Value and quantity trend from the daily snapshots: HISTORY_DAYS rows, not history
+    history_days = last_days(HISTORY_DAYS, today)
+
+    def history():
+        return {
+            row["day"]: row
+            for row in snapshot_range(InventorySnapshot.SCOPE_ALL, history_days[0], today)
+        }
+
+    return {
+        "counts": counts,
+        "total_categories": total_categories,
+        "low_stock": low_stock,
+        "expiring_soon": expiring_soon,
+        "recent_activity": recent_activity,
+        "supplier_perf": supplier_perf,
+        "top_products": top_products,
+        "per_day": per_day,
+        "history": history,
+    }
+
+
+def _dashboard_context(today, results):
+    counts = results["counts"]
+
+    # Charts data
+    status_breakdown = [
+        {'stock_status': code, 'total': counts[f'{code}_status']}
+        for code in sorted(code for code, _ in Product.STOCK_STATUS_CHOICES)
+        if counts[f'{code}_status']
+    ]
+
+    days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    by_day = [{"label": d.strftime("%b %d"), "count": results["per_day"].get(d, 0)} for d in days]
+
+    history = results["history"]
+    history_chart = [
+        {"label": d.strftime("%b %d"), "value": float(history[d]["total_value"]), "qty": history[d]["total_qty"]}
+        for d in last_days(HISTORY_DAYS, today) if d in history
+    ]
+
+    context = {
+        # headline stats
+        "stats": {
+            "total_products": counts['total_products'],
+            "low_stock": counts['low_stock'],
+            "out_of_stock": counts['out_of_stock'],
+            "total_categories": results["total_categories"],
+        },
+
+        # tables
+        "low_stock_rows": results["low_stock"],
+        "expiring_rows": results["expiring_soon"],
+        "recent_activity": results["recent_activity"],
+        "supplier_perf": results["supplier_perf"],
+
+        # charts (serialize-friendly)
+        "chart_status": status_breakdown,
+        "chart_top_products": results["top_products"],
+        "chart_daily": by_day,
+        "chart_history": history_chart,
+    }
+    return context
+
+
+def build_dashboard_context(today):
+    results = {name: query() for name, query in dashboard_queries(today).items()}
+    return _dashboard_context(today, results)
+
+
+async def abuild_dashboard_context(today):
+    results = await gather_queries(dashboard_queries(today))
+    return _dashboard_context(today, results)
+
+
+def invalidate_dashboard(**kwargs):
+    """
+    Mark the cached snapshot as stale, in every process, once the change
+    commits. The old copy stays in the cache so it can still be served
+    while one worker rebuilds it.
+    """
+    bump_version(DASHBOARD_VERSION)
+
+
+def _is_fresh(snapshot, generation, today):
+    return (
+        snapshot is not None
+        and snapshot["generation"] == generation
+        and snapshot["today"] == today
+        and snapshot["built_at"] + settings.DASHBOARD_CACHE_TTL > _time.time()
+    )
+
+
+def _snapshot(generation, today, context):
+    return {"generation": generation, "today": today, "built_at": _time.time(), "context": context}
+
+
+def _rebuild(generation, today):
+    # The copy is kept until the next change, so a replica may only serve it
+    # once it has that change
+    with replica_reads(since=changed_at(DASHBOARD_VERSION)):
+        context = build_dashboard_context(today)
+    # Keep the copy longer than the TTL so it can be served stale during rebuilds
+    cache.set(SNAPSHOT_KEY, _snapshot(generation, today, context), timeout=settings.DASHBOARD_CACHE_TTL * 10)
+    return context
+
+
+async def _arebuild(generation, today):
+    with replica_reads(since=await sync_to_async(changed_at)(DASHBOARD_VERSION)):
+        context = await abuild_dashboard_context(today)
+    await cache.aset(SNAPSHOT_KEY, _snapshot(generation, today, context), timeout=settings.DASHBOARD_CACHE_TTL * 10)
+    return context
+
+
+def get_dashboard_context():
+    """
+    Return the dashboard context from the cache, rebuilding it when it is stale.
+
+    Only the worker that wins the lock recomputes; everyone else keeps serving
+    the previous snapshot (or briefly waits for the first one to exist).
+    """
+    today = timezone.localdate()
+    generation = get_version(DASHBOARD_VERSION)
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if _is_fresh(snapshot, generation, today):
+        return snapshot["context"]
+
+    if cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return _rebuild(generation, today)
+        finally:
+            cache.delete(LOCK_KEY)
+
+    if snapshot is not None and snapshot["today"] == today:
+        return snapshot["context"]
+
+    # Nothing to serve yet: wait for the lock holder, then fall back to computing.
+    deadline = _time.monotonic() + WAIT_FOR_REBUILD
+    while _time.monotonic() < deadline:
+        _time.sleep(0.1)
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is not None and snapshot["today"] == today:
+            return snapshot["context"]
+    return build_dashboard_context(today)
+
+
+async def aget_dashboard_context():
+    """
+    get_dashboard_context() for async views: the same cache protocol, with
+    a rebuild running its queries concurrently.
+    """
+    today = timezone.localdate()
+    generation = await aget_version(DASHBOARD_VERSION)
+    snapshot = await cache.aget(SNAPSHOT_KEY)
+    if _is_fresh(snapshot, generation, today):
+        return snapshot["context"]
+
+    if await cache.aadd(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return await _arebuild(generation, today)
+        finally:
+            await cache.adelete(LOCK_KEY)
+
+    if snapshot is not None and snapshot["today"] == today:
+        return snapshot["context"]
+
+    deadline = _time.monotonic() + WAIT_FOR_REBUILD
+    while _time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        snapshot = await cache.aget(SNAPSHOT_KEY)
+        if snapshot is not None and snapshot["today"] == today:
+            return snapshot["context"]
+    return await abuild_dashboard_context(today)
@@ -1,3 +1,121 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from product.models import Product, Category, Supplier
+
+from . import views
+from .snapshot import build_dashboard_context, get_dashboard_context
+
+
+# ASYNC_VIEWS picks one of the dashboard views when the URLs load; the
+# async tests mount the other one next to the project's URLs.
+urlpatterns = [
+    path("async/dashboard/", views.async_dashboard_view, name="async_dashboard"),
+    path("", include("Stocker.urls")),
+]
+
+
+class DashboardQueryTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("clerk"))
+        for cache in caches.all():
+            cache.clear()
+
+    def seed(self, n):
+        today = timezone.localdate()
+        category = Category.objects.create(name=f"Category {n}")
+        supplier = Supplier.objects.create(name=f"Supplier {n}")
+        for i in range(n):
+            product = Product.objects.create(
+                name=f"Item {n}-{i}", sku=f"SKU-{n}-{i}", category=category, cost_price="1.00",
+                quantity=i % 4, reorder_level=2, expiry_date=today + timedelta(days=i % 40),
+            )
+            product.supplier.add(supplier)
+
+    def test_query_budget(self):
+        # Session, user and the shared version, its change time for the
+        # rebuild, then one query per dashboard section
+        self.seed(5)
+        with self.assertNumQueries(13):
+            self.assertEqual(self.client.get(reverse("main:dashboard_view")).status_code, 200)
+
+        for cache in caches.all():
+            cache.clear()
+        self.seed(60)
+        with self.assertNumQueries(13):
+            self.assertEqual(self.client.get(reverse("main:dashboard_view")).status_code, 200)
+
+
+class DashboardInvalidationTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.category = Category.objects.create(name="Dairy")
+
+    def test_cached_snapshot_costs_one_query(self):
+        get_dashboard_context()
+        # Only the shared version is read
+        with self.assertNumQueries(1):
+            get_dashboard_context()
+
+    def test_change_committed_elsewhere_invalidates_the_snapshot(self):
+        self.assertEqual(get_dashboard_context()["stats"]["total_products"], 0)
+
+        # A write in another process (e.g. the job runner) only reaches this
+        # one through the shared version, not through this process's cache
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Milk", sku="MILK", category=self.category, cost_price="1.00")
+
+        self.assertEqual(get_dashboard_context()["stats"]["total_products"], 1)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncDashboardTests(TransactionTestCase):
+    """
+    A dashboard rebuild in the async view runs its queries in worker
+    threads, each on its own connection, so the data must be committed.
+    """
+
+    def setUp(self):
+        today = timezone.localdate()
+        category = Category.objects.create(name="Dairy")
+        supplier = Supplier.objects.create(name="Acme")
+        for i in range(6):
+            product = Product.objects.create(
+                name=f"Item {i}", sku=f"SKU-{i}", category=category, cost_price="1.00",
+                quantity=i % 4, reorder_level=2, expiry_date=today + timedelta(days=i * 7),
+            )
+            product.supplier.add(supplier)
+        self.user = get_user_model().objects.create_user("clerk")
+        self.async_client = AsyncClient()
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_same_context_as_the_sync_view(self):
+        keys = build_dashboard_context(timezone.localdate()).keys()
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+        self.clear_caches()
+        expected = self.client.get(reverse("main:dashboard_view"))
+        self.clear_caches()  # make the async view rebuild rather than reuse the snapshot
+        response = async_to_sync(self.async_client.get)(reverse("async_dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({key: response.context[key] for key in keys}, {key: expected.context[key] for key in keys})
+
+    def test_login_required(self):
+        response = async_to_sync(self.async_client.get)(reverse("async_dashboard"))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("?next=/async/dashboard/", response.url)
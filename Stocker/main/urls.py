@@ -1,10 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'main'
 
 urlpatterns = [
-    path("dashboard/", views.dashboard_view, name="dashboard_view"),
+    path("dashboard/", views.async_dashboard_view if settings.ASYNC_VIEWS else views.dashboard_view, name="dashboard_view"),
    
 
 ]
\ No newline at end of file
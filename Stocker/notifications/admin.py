@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import OutboxAlert, AlertState, AlertWatermark
+
+
+@admin.register(OutboxAlert)
+class OutboxAlertAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'product', 'status', 'hits', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('created_at', 'updated_at', 'sent_at')
+
+
+@admin.register(AlertState)
+class AlertStateAdmin(admin.ModelAdmin):
+    list_display = ('product', 'stock_level', 'expiry_alerted_for', 'updated_at')
+    list_filter = ('stock_level',)
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product',)
+
+
+@admin.register(AlertWatermark)
+class AlertWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'changed_since', 'expiry_horizon', 'updated_at')
@@ -0,0 +1,132 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutboxAlert
+from .scheduler import EXPIRY_WINDOW_DAYS
+
+
+MAX_ATTEMPTS = 5
+
+# A batch still 'sending' after this long belongs to a dispatcher that died
+SENDING_TIMEOUT = timedelta(minutes=10)
+
+# kind -> (template, subject prefix)
+DIGESTS = {
+    'low_stock': ("low_stock_alert.html", "Low Stock Alert"),
+    'expiry': ("expiry_alert.html", "Expiry Date Alert"),
+}
+
+
+def admin_emails():
+    User = get_user_model()
+    emails = list(
+        User.objects.filter(is_superuser=True)
+        .exclude(email="")
+        .values_list("email", flat=True)
+    )
+    # Fallback so send doesn't explode if no admin has email set
+    if not emails and getattr(settings, "EMAIL_HOST_USER", None):
+        emails = [settings.EMAIL_HOST_USER]
+    return emails
+
+
+def _release_stale_batches():
+    """
+    Give alerts claimed by a dispatcher that died mid-send another try, as
+    a failed attempt. (Their emails may have gone out, so they count.)
+    """
+    OutboxAlert.objects.filter(status='sending', updated_at__lt=timezone.now() - SENDING_TIMEOUT).update(
+        status='failed', attempts=F('attempts') + 1, last_error="Interrupted while sending",
+        updated_at=timezone.now(),
+    )
+
+
+def _claim_batch():
+    """
+    Mark every deliverable alert as ours with one UPDATE and return them.
+    """
+    _release_stale_batches()
+    batch_id = uuid.uuid4().hex
+    OutboxAlert.objects.filter(
+        Q(status='pending') | Q(status='failed', attempts__lt=MAX_ATTEMPTS)
+    ).update(status='sending', batch_id=batch_id, updated_at=timezone.now())
+    return batch_id, list(
+        OutboxAlert.objects.filter(batch_id=batch_id, status='sending')
+        .select_related('product__category')
+    )
+
+
+def _still_relevant(alert, today, soon):
+    p = alert.product
+    if alert.kind == 'low_stock':
+        return p.is_low_stock or p.stock_status != 'in_stock'
+    # The date may have been moved out of the window since the alert was queued
+    return p.expiry_date is not None and today <= p.expiry_date <= soon
+
+
+def _build_digests(alerts, recipients):
+    today = timezone.localdate()
+    soon = today + timedelta(days=EXPIRY_WINDOW_DAYS)
+    messages = []
+    for kind, (template, subject) in DIGESTS.items():
+        products = {}
+        for alert in alerts:
+            if alert.kind == kind and _still_relevant(alert, today, soon):
+                products[alert.product_id] = alert.product
+        if not products:
+            continue
+
+        products = list(products.values())
+        if kind == 'expiry':
+            products.sort(key=lambda p: p.expiry_date)
+        else:
+            products.sort(key=lambda p: p.quantity)
+
+        email = EmailMessage(
+            subject=f"{subject} — {len(products)} product(s)",
+            body=render_to_string(template, {"products": products, "today": today, "soon": soon}),
+            from_email=settings.EMAIL_HOST_USER,
+            to=recipients,
+        )
+        email.content_subtype = "html"
+        messages.append(email)
+    return messages
+
+
+def dispatch_alerts(connection=None):
+    """
+    Deliver all pending alerts as one digest email per alert kind, sent over
+    a single mail connection. Returns the number of emails sent.
+    """
+    batch_id, alerts = _claim_batch()
+    if not alerts:
+        return 0
+
+    recipients = admin_emails()
+    if not recipients:
+        OutboxAlert.objects.filter(batch_id=batch_id).update(
+            status='failed', attempts=MAX_ATTEMPTS, last_error="No recipients configured"
+        )
+        return 0
+
+    messages = _build_digests(alerts, recipients)
+    try:
+        connection = connection or get_connection(fail_silently=False)
+        sent = connection.send_messages(messages) if messages else 0
+    except Exception as e:
+        OutboxAlert.objects.filter(batch_id=batch_id).update(
+            status='failed', attempts=F('attempts') + 1, last_error=str(e)
+        )
+        raise
+
+    OutboxAlert.objects.filter(batch_id=batch_id).update(
+        status='sent', attempts=F('attempts') + 1, sent_at=timezone.now(), last_error=""
+    )
+    return sent
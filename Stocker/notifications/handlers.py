@@ -0,0 +1,16 @@
+from jobs.runner import register
+
+from .dispatcher import dispatch_alerts
+from .scheduler import schedule_alerts
+
+
+@register("dispatch_alerts")
+def dispatch_alerts_job(job):
+    sent = dispatch_alerts()
+    job.mark_done(emails_sent=sent)
+
+
+@register("schedule_alerts")
+def schedule_alerts_job(job):
+    low_stock, expiry, checked = schedule_alerts()
+    job.mark_done(low_stock=low_stock, expiry=expiry, checked=checked)
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.dispatcher import dispatch_alerts
+
+
+class Command(BaseCommand):
+    help = "Deliver pending low-stock and expiry alerts as digest emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running and dispatch every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            sent = dispatch_alerts()
+            self.stdout.write(f"Sent {sent} digest email(s)")
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.dispatcher import dispatch_alerts
+from notifications.scheduler import schedule_alerts
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue low-stock and expiry alerts for products changed since the last run "
+        "(and expiry dates entering the window), never twice for the same event. "
+        "Run it at least daily so expiry dates are picked up as they come close."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dispatch", action="store_true", help="Send the digest now instead of leaving it to the job worker.")
+        parser.add_argument("--loop", action="store_true", help="Keep running and schedule every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=300.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            low_stock, expiry, checked = schedule_alerts()
+            self.stdout.write(f"Checked {checked} product(s): queued {low_stock} low-stock and {expiry} expiry alert(s)")
+            if opts["dispatch"]:
+                self.stdout.write(f"Sent {dispatch_alerts()} digest email(s)")
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
@@ -0,0 +1,83 @@
+from django.db import models
+from django.db.models import Q
+
+from product.models import Product
+
+
+class OutboxAlert(models.Model):
+    """
+    One pending alert about one product. Alerts are delivered in digests by
+    notifications.dispatcher, never from inside a request.
+    """
+
+    KIND_CHOICES = [
+        ('low_stock', 'Low Stock'),
+        ('expiry', 'Expiry Date'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='alerts')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    hits = models.PositiveIntegerField(default=1)  # how many events were merged into this alert
+    attempts = models.PositiveIntegerField(default=0)
+    batch_id = models.CharField(max_length=32, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # At most one pending alert per product and kind: new events merge into it.
+            models.UniqueConstraint(
+                fields=['kind', 'product'],
+                condition=Q(status='pending'),
+                name='unique_pending_alert',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'kind']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} alert for {self.product_id} ({self.status})"
+
+
+class AlertState(models.Model):
+    """
+    What was last alerted about a product, so notifications.scheduler only
+    alerts again when things get worse or a new expiry date comes close.
+    """
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='alert_state')
+    # Stock level at the last run: 'in_stock', 'almost_done' or 'out_of_stock'
+    stock_level = models.CharField(max_length=20, default='in_stock')
+    # The expiry date an expiry alert was last sent for
+    expiry_alerted_for = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Alert state of {self.product_id}"
+
+
+class AlertWatermark(models.Model):
+    """
+    How far notifications.scheduler got: products updated before
+    `changed_since` and expiry dates up to `expiry_horizon` are already
+    handled. A single row.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    changed_since = models.DateTimeField(blank=True, null=True)
+    expiry_horizon = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
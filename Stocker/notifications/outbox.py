@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models import F
+
+from jobs.runner import enqueue_once
+
+from .models import OutboxAlert
+
+
+def queue_alerts(kind, product_ids):
+    """
+    Record `kind` alerts for the given products and schedule a dispatch.
+
+    A product that already has a pending alert of the same kind is not queued
+    twice: its pending row just counts one more hit, so repeated edits end up
+    as a single line in the next digest.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return
+
+    with transaction.atomic():
+        OutboxAlert.objects.filter(
+            kind=kind, status='pending', product_id__in=product_ids
+        ).update(hits=F('hits') + 1)
+        OutboxAlert.objects.bulk_create(
+            [OutboxAlert(kind=kind, product_id=pid) for pid in product_ids],
+            ignore_conflicts=True,
+        )
+
+    transaction.on_commit(lambda: enqueue_once('dispatch_alerts'))
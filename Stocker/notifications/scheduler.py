@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from product.models import Product
+
+from .models import AlertState, AlertWatermark
+from .outbox import queue_alerts
+
+
+WATERMARK = "alerts"
+
+# Products expiring within this many days get an expiry alert
+EXPIRY_WINDOW_DAYS = 30
+
+# Re-read products updated shortly before the previous run: a transaction
+# that committed after that run can carry an older updated_at. Alert state
+# makes the second look harmless.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Worse stock levels rank higher; only a rise is alerted
+STOCK_LEVELS = {"in_stock": 0, "almost_done": 1, "out_of_stock": 2}
+
+PRODUCT_FIELDS = ("id", "quantity", "stock_status", "is_low_stock", "expiry_date")
+
+
+def stock_level(product):
+    """
+    'out_of_stock', 'almost_done' or 'in_stock' for a product row dict.
+    """
+    if product["quantity"] <= 0 or product["stock_status"] == "out_of_stock":
+        return "out_of_stock"
+    if product["is_low_stock"] or product["stock_status"] == "almost_done":
+        return "almost_done"
+    return "in_stock"
+
+
+def _candidates(mark, today, horizon):
+    """
+    Products that may need an alert: those updated since the watermark,
+    plus those whose expiry date moved into the window since the last run
+    (time passing, not an edit). Everything on the first run.
+    """
+    products = Product.objects.values(*PRODUCT_FIELDS)
+    if mark.changed_since is None:
+        return {p["id"]: p for p in products}
+
+    changed = products.filter(updated_at__gt=mark.changed_since - WATERMARK_OVERLAP)
+    entering = products.filter(
+        expiry_date__gt=max(mark.expiry_horizon or today, today - timedelta(days=1)),
+        expiry_date__lte=horizon,
+    )
+    found = {p["id"]: p for p in changed}
+    found.update((p["id"], p) for p in entering)
+    return found
+
+
+def schedule_alerts():
+    """
+    Queue low-stock and expiry alerts for what changed since the last run,
+    at most once per event: a product is alerted again only when its stock
+    level gets worse (after recovering, a new drop counts) or a different
+    expiry date enters the window. The outbox then sends one digest per
+    kind. Returns (low_stock queued, expiry queued, products looked at).
+    """
+    started = timezone.now()
+    today = timezone.localdate()
+    horizon = today + timedelta(days=EXPIRY_WINDOW_DAYS)
+
+    with transaction.atomic():
+        mark, _ = AlertWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        products = _candidates(mark, today, horizon)
+        states = AlertState.objects.in_bulk(list(products))
+
+        low, expiring, new_states, changed_states = [], [], [], []
+        for product_id, product in products.items():
+            state = states.get(product_id)
+            level = stock_level(product)
+            last_level = state.stock_level if state else "in_stock"
+            expiry = product["expiry_date"]
+            alert_expiry = (
+                expiry is not None and today <= expiry <= horizon
+                and (state is None or state.expiry_alerted_for != expiry)
+            )
+
+            if STOCK_LEVELS[level] > STOCK_LEVELS[last_level]:
+                low.append(product_id)
+            if alert_expiry:
+                expiring.append(product_id)
+
+            if state is None:
+                # Healthy products without alerts need no state row
+                if level != "in_stock" or alert_expiry:
+                    new_states.append(AlertState(
+                        product_id=product_id, stock_level=level,
+                        expiry_alerted_for=expiry if alert_expiry else None,
+                    ))
+            elif level != state.stock_level or alert_expiry:
+                state.stock_level = level
+                state.updated_at = started
+                if alert_expiry:
+                    state.expiry_alerted_for = expiry
+                changed_states.append(state)
+
+        AlertState.objects.bulk_create(new_states, batch_size=500)
+        AlertState.objects.bulk_update(changed_states, ["stock_level", "expiry_alerted_for", "updated_at"], batch_size=500)
+        queue_alerts("low_stock", low)
+        queue_alerts("expiry", expiring)
+
+        mark.changed_since = started
+        mark.expiry_horizon = horizon
+        mark.save()
+
+    return len(low), len(expiring), len(products)
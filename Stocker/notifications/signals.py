@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from jobs.runner import enqueue_once
+from product.models import Product
+from product.signals import products_bulk_changed
+
+
+def schedule_alerts_soon(**kwargs):
+    """
+    Product writes can cross an alert threshold: let the job worker run the
+    scheduler once the transaction commits. Queued at most once at a time.
+    """
+    transaction.on_commit(lambda: enqueue_once("schedule_alerts"))
+
+
+post_save.connect(schedule_alerts_soon, sender=Product, dispatch_uid="alerts_product_saved")
+products_bulk_changed.connect(schedule_alerts_soon, dispatch_uid="alerts_bulk_products")
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from product.models import Product, Category
+
+from .dispatcher import dispatch_alerts, SENDING_TIMEOUT
+from .models import OutboxAlert, AlertWatermark
+from .scheduler import EXPIRY_WINDOW_DAYS, WATERMARK, schedule_alerts
+
+
+class DispatchAlertsTests(TestCase):
+
+    def setUp(self):
+        get_user_model().objects.create_superuser("admin", email="admin@example.com", password=None)
+        self.category = Category.objects.create(name="Dairy")
+        self.today = timezone.localdate()
+
+    def product(self, sku, **fields):
+        return Product.objects.create(name=sku, sku=sku, category=self.category, cost_price="1.00", **fields)
+
+    def test_expiry_digest_shows_the_window(self):
+        milk = self.product("MILK", quantity=5, expiry_date=self.today + timedelta(days=3))
+        OutboxAlert.objects.create(kind="expiry", product=milk)
+
+        self.assertEqual(dispatch_alerts(), 1)
+        soon = self.today + timedelta(days=EXPIRY_WINDOW_DAYS)
+        self.assertIn(f"{date_format(self.today)} → {date_format(soon)}", mail.outbox[0].body)
+
+    def test_expiry_moved_out_of_the_window_is_not_mailed(self):
+        milk = self.product("MILK", quantity=5, expiry_date=self.today + timedelta(days=3))
+        cheese = self.product("CHEESE", quantity=5, expiry_date=self.today + timedelta(days=3))
+        OutboxAlert.objects.create(kind="expiry", product=milk)
+        OutboxAlert.objects.create(kind="expiry", product=cheese)
+        Product.objects.filter(id=cheese.id).update(expiry_date=self.today + timedelta(days=EXPIRY_WINDOW_DAYS + 60))
+
+        dispatch_alerts()
+
+        self.assertIn("MILK", mail.outbox[0].body)
+        self.assertNotIn("CHEESE", mail.outbox[0].body)
+        self.assertEqual(OutboxAlert.objects.filter(status="sent").count(), 2)
+
+    def test_batch_of_a_dead_dispatcher_is_sent_again(self):
+        milk = self.product("MILK", quantity=0, reorder_level=5)
+        alert = OutboxAlert.objects.create(kind="low_stock", product=milk)
+        OutboxAlert.objects.filter(id=alert.id).update(
+            status="sending", batch_id="dead", updated_at=timezone.now() - SENDING_TIMEOUT - timedelta(minutes=1),
+        )
+
+        self.assertEqual(dispatch_alerts(), 1)
+        alert.refresh_from_db()
+        self.assertEqual((alert.status, alert.attempts), ("sent", 2))
+
+    def test_batch_being_sent_is_left_alone(self):
+        milk = self.product("MILK", quantity=0, reorder_level=5)
+        alert = OutboxAlert.objects.create(kind="low_stock", product=milk)
+        OutboxAlert.objects.filter(id=alert.id).update(status="sending", batch_id="live", updated_at=timezone.now())
+
+        self.assertEqual(dispatch_alerts(), 0)
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, "sending")
+
+
+class ScheduleAlertsTests(TestCase):
+
+    def setUp(self):
+        get_user_model().objects.create_superuser("admin", email="admin@example.com", password=None)
+        self.category = Category.objects.create(name="Dairy")
+        self.today = timezone.localdate()
+
+    def product(self, sku, **fields):
+        return Product.objects.create(name=sku, sku=sku, category=self.category, cost_price="1.00", **fields)
+
+    def age_products(self):
+        # Well before the watermark's overlap, as if edited long before the last run
+        Product.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def days_later(self, days):
+        """
+        Run the scheduler as if `days` days had passed.
+        """
+        later = timezone.now() + timedelta(days=days)
+        return mock.patch.multiple(
+            "notifications.scheduler.timezone",
+            now=mock.Mock(return_value=later), localdate=mock.Mock(return_value=self.today + timedelta(days=days)),
+        )
+
+    def test_second_run_over_the_same_window_mails_each_product_once(self):
+        milk = self.product("MILK", quantity=0, reorder_level=5)
+        cheese = self.product("CHEESE", quantity=2, reorder_level=5, expiry_date=self.today + timedelta(days=3))
+
+        self.assertEqual(schedule_alerts(), (2, 1, 2))
+        self.assertEqual(schedule_alerts()[:2], (0, 0))
+        dispatch_alerts()
+
+        self.assertEqual(sorted(m.subject for m in mail.outbox), [
+            "Expiry Date Alert — 1 product(s)", "Low Stock Alert — 2 product(s)",
+        ])
+        self.assertEqual(
+            sorted(OutboxAlert.objects.values_list("kind", "product_id", "hits")),
+            sorted([("low_stock", milk.id, 1), ("low_stock", cheese.id, 1), ("expiry", cheese.id, 1)]),
+        )
+
+    def test_watermark_advances(self):
+        milk = self.product("MILK", quantity=5)
+        self.product("CHEESE", quantity=5)
+        self.age_products()
+
+        self.assertEqual(schedule_alerts()[2], 2)  # first run: everything
+        first = AlertWatermark.objects.get(name=WATERMARK).changed_since
+        self.assertEqual(schedule_alerts()[2], 0)
+        second = AlertWatermark.objects.get(name=WATERMARK).changed_since
+        self.assertGreater(second, first)
+
+        milk.quantity = 0
+        milk.save()
+        self.assertEqual(schedule_alerts(), (1, 0, 1))
+        self.assertGreater(AlertWatermark.objects.get(name=WATERMARK).changed_since, second)
+
+    def test_batch_entering_the_expiry_window_is_picked_up_once(self):
+        yogurt = self.product("YOGURT", quantity=5, expiry_date=self.today + timedelta(days=EXPIRY_WINDOW_DAYS + 2))
+        self.age_products()
+        self.assertEqual(schedule_alerts(), (0, 0, 1))
+
+        with self.days_later(1):
+            self.assertEqual(schedule_alerts()[:2], (0, 0))
+        with self.days_later(2):
+            self.assertEqual(schedule_alerts(), (0, 1, 1))
+        with self.days_later(2):
+            self.assertEqual(schedule_alerts()[:2], (0, 0))
+        with self.days_later(3):
+            self.assertEqual(schedule_alerts()[:2], (0, 0))
+
+        self.assertEqual(list(OutboxAlert.objects.values_list("kind", "product_id")), [("expiry", yogurt.id)])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Supplier, Product
+from .models import Category, Supplier, Product, StockMovement
 
 
 @admin.register(Category)
@@ -47,3 +47,13 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
 
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('product', 'kind', 'delta', 'quantity_after', 'reason', 'user', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('product__name', 'product__sku', 'reason')
+    raw_id_fields = ('product',)
+    # The ledger is written by product.stock only
+    readonly_fields = ('product', 'kind', 'delta', 'quantity_after', 'reason', 'user', 'created_at')
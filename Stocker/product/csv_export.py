@@ -0,0 +1,212 @@
+import csv
+
+from django.db import connections
+from django.db.models import Count, Sum, F, Case, When, IntegerField, DecimalField, prefetch_related_objects
+from django.utils import timezone
+
+from .filters import filter_products, has_filters
+from .models import Product
+from .rollups import category_totals
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+PRODUCT_EXPORT_HEADER = [
+    "ID",
+    "Name",
+    "SKU",
+    "Category",
+    "Suppliers",
+    "Cost Price",
+    "Quantity",
+    "Reorder Level",
+    "Stock Status",
+    "Expiry Date",
+    "Description",
+    "Image URL",
+    "Created",
+    "Updated",
+]
+
+
+class Echo:
+    """
+    File-like object whose write() just hands the value back, so csv.writer
+    can format one row at a time for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+def sanitize_csv(text) -> str:
+    """
+    Prevent CSV injection when opening in Excel by prefixing risky values.
+    """
+    if text and str(text)[0] in ("=", "+", "-", "@"):
+        return "'" + str(text)
+    return str(text)
+
+
+def iter_products(qs, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield products from `qs` ordered by id, reading `chunk_size` rows at a time
+    and prefetching suppliers per chunk. Memory stays flat however large the
+    catalog is.
+
+    On PostgreSQL this is one query read through a server-side cursor;
+    elsewhere each chunk is a keyset query (id > last id).
+    """
+    qs = qs.select_related("category").order_by("id")
+    connection = connections[qs.db]
+    if connection.vendor == "postgresql" and not connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        yield from qs.prefetch_related("supplier").iterator(chunk_size=chunk_size)
+        return
+
+    last_id = 0
+    while True:
+        chunk = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        prefetch_related_objects(chunk, "supplier")
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+def stream_csv(rows):
+    """
+    Encode an iterable of rows as CSV lines, starting with a UTF-8 BOM so
+    Excel opens the file correctly (helps with Arabic).
+    """
+    writer = csv.writer(Echo())
+    yield "\ufeff"
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def product_export_rows(qs):
+    yield PRODUCT_EXPORT_HEADER
+
+    for p in iter_products(qs):
+        suppliers = ", ".join(s.name for s in p.supplier.all())
+        expiry = p.expiry_date.strftime("%Y-%m-%d") if p.expiry_date else ""
+        img_url = p.image.url if (p.image and p.image.name) else ""
+
+        yield [
+            p.id,
+            sanitize_csv(p.name or ""),
+            sanitize_csv(p.sku or ""),
+            p.category.name if p.category_id else "",
+            suppliers,
+            str(p.cost_price or ""),
+            p.quantity,
+            p.reorder_level,
+            p.stock_status,
+            expiry,
+            (p.description or "").replace("\r\n", " ").replace("\n", " "),
+            img_url,
+            p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
+            p.updated_at.strftime("%Y-%m-%d %H:%M") if p.updated_at else "",
+        ]
+
+
+def inventory_report_products(params):
+    """
+    The products of an inventory report for the inventory page filters in
+    `params` (a QueryDict), and its per-category breakdown. Unfiltered
+    reports read the breakdown from the rollups.
+    """
+    if not has_filters(params):
+        return Product.objects.all(), category_totals()
+    qs = filter_products(Product.objects.all(), params)
+    return qs, category_totals(qs)
+
+
+def inventory_report_rows(qs, by_category):
+    # KPI aggregates
+    totals = qs.aggregate(
+        total_products=Count("id"),
+        total_qty=Sum("quantity"),
+        total_value=Sum(F("quantity") * F("cost_price"), output_field=DecimalField()),
+        in_stock=Count(Case(When(stock_status="in_stock", then=1), output_field=IntegerField())),
+        almost_done=Count(Case(When(stock_status="almost_done", then=1), output_field=IntegerField())),
+        out_of_stock=Count(Case(When(stock_status="out_of_stock", then=1), output_field=IntegerField())),
+    )
+
+    # Header: KPIs section
+    yield ["Inventory Report"]
+    yield ["Generated At", timezone.now().strftime("%Y-%m-%d %H:%M")]
+    yield []
+    yield ["KPI", "Value"]
+    yield ["Total Products", totals["total_products"] or 0]
+    yield ["Total Quantity", totals["total_qty"] or 0]
+    yield ["Total Inventory Value", totals["total_value"] or 0]
+    yield ["In Stock", totals["in_stock"] or 0]
+    yield ["Almost Done", totals["almost_done"] or 0]
+    yield ["Out of Stock", totals["out_of_stock"] or 0]
+
+    # Per-category breakdown
+    yield []
+    yield ["By Category"]
+    yield ["Category", "Products", "Total Qty", "Total Value"]
+    for row in by_category:
+        yield [
+            row["category__name"] or "—",
+            row["products"] or 0,
+            row["qty"] or 0,
+            row["value"] or 0,
+        ]
+
+    # Detailed lines
+    yield []
+    yield ["Detailed Products"]
+    yield ["ID","Name","SKU","Category","Suppliers","Cost Price","Qty","Reorder","Status","Expiry Date","Description"]
+    for p in iter_products(qs):
+        suppliers = ", ".join(s.name for s in p.supplier.all())
+        expiry = p.expiry_date.strftime("%Y-%m-%d") if p.expiry_date else ""
+        yield [
+            p.id,
+            sanitize_csv(p.name or ""),
+            sanitize_csv(p.sku or ""),
+            p.category.name if p.category_id else "",
+            suppliers,
+            str(p.cost_price or 0),
+            p.quantity,
+            p.reorder_level,
+            p.stock_status,
+            expiry,
+            (p.description or "").replace("\r\n", " ").replace("\n", " "),
+        ]
+
+
+def supplier_report_rows(suppliers_qs):
+    # Totals for percentage calculation
+    totals = suppliers_qs.aggregate(
+        sum_value=Sum("total_value"),
+        sum_qty=Sum("total_qty"),
+    )
+    sum_value = float(totals["sum_value"] or 0.0)
+    sum_qty = int(totals["sum_qty"] or 0)
+
+    yield ["Supplier Report"]
+    yield ["Generated At", timezone.now().strftime("%Y-%m-%d %H:%M")]
+    yield []
+    yield ["Supplier","Products","Total Qty","Total Value","% of Value","% of Qty","Low Stock","Out of Stock","Avg Unit Cost"]
+
+    for s in suppliers_qs:
+        tv = float(s.total_value or 0.0)
+        tq = int(s.total_qty or 0)
+        pct_val = round((tv / (sum_value or 1.0)) * 100, 2) if sum_value else 0.0
+        pct_qty = round((tq / (sum_qty or 1)) * 100, 2) if sum_qty else 0.0
+        avg_unit_cost = round(tv / tq, 2) if tq else 0.0
+
+        yield [
+            s.name,
+            s.product_count or 0,
+            tq,
+            round(tv, 2),
+            pct_val,
+            pct_qty,
+            s.low_stock or 0,
+            s.out_stock or 0,
+            avg_unit_cost,
+        ]
@@ -0,0 +1,123 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product
+from .search import search_products, rank_products
+from .signatures import supplier_signature
+from .versions import get_version, bump_version
+
+
+# Shared version (product.versions) memoized filter results are stamped with
+DATA_VERSION = "inventory:data"
+
+# Larger matches are not memoized: the id list would cost more to store and
+# to send back as an IN (...) list than re-running the indexed filter.
+MAX_CACHED_IDS = 2000
+
+
+def apply_filters(qs, params, with_suppliers=True, ranked=False):
+    """
+    Apply the inventory page filters (q, category, supplier, status) taken from
+    a QueryDict to a Product queryset.
+
+    Selecting suppliers keeps only products supplied by exactly that set, or
+    by any of them with supplier_match=any.
+    With `ranked`, a search puts the best matches first.
+    """
+    q = (params.get('q') or '').strip()
+    if q:
+        qs = search_products(qs, q, ranked=ranked)
+
+    category_id = params.get("category")
+    if category_id:
+        qs = qs.filter(category_id=category_id)
+
+    selected_suppliers = [s for s in params.getlist("supplier") if s.isdigit()] if with_suppliers else []
+    if selected_suppliers:
+        if params.get("supplier_match") == "any":
+            # Served by the supplier_id index on the M2M table
+            Through = Product.supplier.through
+            qs = qs.filter(id__in=Through.objects.filter(supplier_id__in=selected_suppliers).values("product_id"))
+        else:
+            qs = qs.filter(supplier_signature=supplier_signature(selected_suppliers))
+
+    status = params.get("status")
+    if status:
+        qs = qs.filter(stock_status=status)
+
+    return qs
+
+
+def has_filters(params, with_suppliers=True):
+    """
+    True when `params` narrows the product list at all.
+    """
+    if (params.get('q') or '').strip() or params.get("category") or params.get("status"):
+        return True
+    return bool(with_suppliers and params.getlist("supplier"))
+
+
+def filter_key(params, with_suppliers=True):
+    """
+    Canonical form of the filter params, so equivalent query strings (other
+    parameter order, extra spaces, repeated suppliers, page cursors) share
+    one cache entry.
+    """
+    suppliers = sorted({int(s) for s in params.getlist("supplier") if s.isdigit()}) if with_suppliers else []
+    return json.dumps({
+        "q": " ".join((params.get('q') or '').lower().split()),
+        "category": params.get("category") or "",
+        "suppliers": suppliers,
+        "match": "any" if suppliers and params.get("supplier_match") == "any" else "",
+        "status": params.get("status") or "",
+    }, sort_keys=True)
+
+
+def data_version():
+    return get_version(DATA_VERSION)
+
+
+def bump_data_version(**kwargs):
+    """
+    Signal receiver: any product, supplier or category write makes every
+    memoized filter result stale, in every process, once it commits.
+    """
+    bump_version(DATA_VERSION)
+
+
+def _matching_ids(qs, params, with_suppliers):
+    """
+    Ids of the products matching `params`, memoized per data version, or None
+    when there are too many to be worth caching.
+    """
+    digest = hashlib.sha1(filter_key(params, with_suppliers).encode()).hexdigest()
+    key = f"inventory:filter:{qs.db}:{data_version()}:{digest}"
+    ids = cache.get(key)
+    if ids is None:
+        base = Product.objects.using(qs.db)
+        ids = list(apply_filters(base, params, with_suppliers).order_by().values_list("id", flat=True)[:MAX_CACHED_IDS + 1])
+        if len(ids) > MAX_CACHED_IDS:
+            ids = False
+        cache.set(key, ids, timeout=settings.FILTER_CACHE_TTL)
+    return ids if ids is not False else None
+
+
+def filter_products(qs, params, with_suppliers=True, ranked=False):
+    """
+    apply_filters(), served from the memoized id set when the same filters
+    already ran since the last inventory write.
+    """
+    if not has_filters(params, with_suppliers):
+        return qs
+    ids = _matching_ids(qs, params, with_suppliers)
+    if ids is None:
+        return apply_filters(qs, params, with_suppliers, ranked)
+
+    qs = qs.filter(id__in=ids)
+    q = (params.get('q') or '').strip()
+    if ranked and q:
+        qs = rank_products(qs, q)
+    return qs
@@ -0,0 +1,38 @@
+"""
+Versions for the cached inventory page fragments.
+
+Product cards and edit forms are cached per product, keyed on the
+product's id, updated_at and supplier signature; the category and
+supplier lists they (and the filter sidebar) show are keyed on a version
+of the Category and Supplier tables, bumped on every write to them. The
+versions are shared ones (product.versions), so a write made by the job
+runner reaches every web process. A bump makes the old fragments
+unreachable; they expire after FRAGMENT_CACHE_TTL.
+"""
+from .versions import get_versions, bump_version
+
+
+def _version_name(model):
+    return f"inventory:fragments:{model._meta.label_lower}"
+
+
+def table_versions(*models):
+    """
+    The current version of each of `models`' tables, in one query.
+    """
+    versions = get_versions(*(_version_name(model) for model in models))
+    return [versions[_version_name(model)] for model in models]
+
+
+def bump_table_version(model):
+    """
+    Make fragments showing rows of `model` stale once the change commits.
+    """
+    bump_version(_version_name(model))
+
+
+def table_changed(sender, **kwargs):
+    """
+    Signal receiver for saves and deletes of Category and Supplier.
+    """
+    bump_table_version(sender)
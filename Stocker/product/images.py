@@ -0,0 +1,138 @@
+import logging
+import posixpath
+import re
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# Widths of the WebP and JPEG variants offered in srcset; cards are ~300px
+# wide, so this covers them at 1x and 2x as well as the 400px detail image.
+VARIANT_WIDTHS = (160, 320, 640, 960)
+# Width of the JPEG used as plain `src` for clients without srcset
+FALLBACK_WIDTH = 320
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# How long a failed generation (not an image, unreadable file) is remembered
+FAILURE_TIMEOUT = 60 * 60
+
+
+# What variant_name() appends to the original's file name
+VARIANT_SUFFIX = re.compile(r"\.\d+w\.(?:webp|jpg)")
+
+
+def variant_name(name, width, ext):
+    """
+    `images/photo.jpg` -> `images/photo.jpg.320w.webp`: variants sit next to
+    the original in the same storage. The original's extension is kept so
+    photo.jpg and photo.png don't share variants.
+    """
+    return f"{name}.{width}w.{ext}"
+
+
+def _cache_key(name):
+    # Versioned: bump when the layout of the cached dict changes
+    return f"image-variants:2:{name}"
+
+
+def _resize(img, width):
+    if width >= img.width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def _encode(img, fmt):
+    buf = BytesIO()
+    if fmt == "JPEG":
+        if img.mode != "RGB":
+            # JPEG has no alpha channel: flatten onto white
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+            img = background
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def _store(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def generate_variants(field_file):
+    """
+    Write the resized WebP and JPEG variants of an image field file,
+    skipping those that already exist. Returns {"webp": {width: name},
+    "jpeg": {width: name}, "src": name of the FALLBACK_WIDTH JPEG}.
+    """
+    storage, name = field_file.storage, field_file.name
+    with storage.open(name, "rb") as f:
+        img = Image.open(f)
+        # Let the JPEG decoder downscale while decoding: much faster and
+        # lighter on memory for large phone photos.
+        img.draft("RGB", (VARIANT_WIDTHS[-1], VARIANT_WIDTHS[-1]))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+
+        variants = {"webp": {}, "jpeg": {}}
+        for width in sorted({min(w, img.width) for w in VARIANT_WIDTHS}):
+            resized = _resize(img, width)
+            for key, ext, fmt in (("webp", "webp", "WEBP"), ("jpeg", "jpg", "JPEG")):
+                target = variant_name(name, width, ext)
+                if not storage.exists(target):
+                    target = _store(storage, target, _encode(resized, fmt))
+                variants[key][width] = target
+        variants["src"] = variants["jpeg"][min(FALLBACK_WIDTH, img.width)]
+    return variants
+
+
+def delete_variants(storage, name):
+    """
+    Delete the variants of the image `name`, e.g. once it has been replaced,
+    so a later image saved under the same name doesn't pick them up.
+    """
+    variants = cache.get(_cache_key(name)) or {}
+    stale = {*variants.get("webp", {}).values(), *variants.get("jpeg", {}).values()}
+    # Also those this process has not cached (made elsewhere, or evicted)
+    directory, base = posixpath.split(name)
+    try:
+        _, files = storage.listdir(directory)
+    except (NotImplementedError, OSError):
+        files = []
+    stale.update(
+        posixpath.join(directory, f) for f in files
+        if f.startswith(base) and VARIANT_SUFFIX.fullmatch(f[len(base):])
+    )
+    for variant in stale:
+        storage.delete(variant)
+    cache.delete(_cache_key(name))
+
+
+def image_variants(field_file):
+    """
+    The variants of an image field file, generating them on first use.
+    Returns None when the file is missing or is not a readable image, so
+    callers fall back to the original.
+    """
+    if not field_file or not field_file.name:
+        return None
+    key = _cache_key(field_file.name)
+    variants = cache.get(key)
+    if variants is None:
+        try:
+            variants = generate_variants(field_file)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning("Could not create variants of %s: %s", field_file.name, e)
+            cache.set(key, {}, timeout=FAILURE_TIMEOUT)
+            return None
+        cache.set(key, variants, timeout=None)
+    return variants or None
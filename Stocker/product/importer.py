@@ -0,0 +1,167 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Product, Supplier, Category
+from .signals import products_bulk_changed
+from .fragments import bump_table_version
+from .signatures import refresh_supplier_signatures
+
+
+CHUNK_SIZE = 1000
+
+# Skipped rows listed by row number in the import result; the rest are only counted
+MAX_REPORTED_SKIPS = 50
+
+# Columns written on conflict (existing SKU). created_at is left untouched.
+PRODUCT_UPDATE_FIELDS = [
+    "name", "category", "description", "quantity",
+    "reorder_level", "cost_price", "stock_status", "updated_at",
+]
+
+
+def _parse_row(row):
+    """
+    Turn one CSV row into (dict of clean values, None), or (None, reason) if
+    the row can't be imported.
+    """
+    sku = (row.get("SKU") or "").strip()
+    category_name = (row.get("Category") or "").strip()
+    if not sku:
+        return None, "missing SKU"
+    if not category_name:
+        return None, "missing Category"
+
+    try:
+        quantity = int(row.get("Quantity") or 0)
+        reorder_level = int(row.get("Reorder Level") or 0)
+        cost_price = Decimal(str(row.get("Cost Price") or 0).strip())
+    except (ValueError, InvalidOperation):
+        return None, "invalid Quantity, Reorder Level or Cost Price"
+
+    supplier_names = None
+    if row.get("Suppliers"):
+        supplier_names = [s.strip() for s in row["Suppliers"].split(",") if s.strip()]
+
+    return {
+        "sku": sku,
+        "name": (row.get("Name") or "").strip(),
+        "category": category_name,
+        "description": (row.get("Description") or "").strip(),
+        "quantity": quantity,
+        "reorder_level": reorder_level,
+        "cost_price": cost_price,
+        "stock_status": (row.get("Stock Status") or "").strip() or "in_stock",
+        "suppliers": supplier_names,
+    }, None
+
+
+def _resolve_names(model, names):
+    """
+    Return {name: id} for every name, creating the missing ones in bulk.
+    """
+    if not names:
+        return {}
+    found = dict(model.objects.filter(name__in=names).values_list("name", "id"))
+    missing = [n for n in names if n not in found]
+    if missing:
+        model.objects.bulk_create([model(name=n) for n in missing], ignore_conflicts=True)
+        bump_table_version(model)
+        found.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+    return found
+
+
+def _import_chunk(rows):
+    # Last row wins when the same SKU appears twice in a chunk
+    by_sku = {row["sku"]: row for row in rows}
+    rows = list(by_sku.values())
+
+    category_ids = _resolve_names(Category, {r["category"] for r in rows})
+    supplier_ids = _resolve_names(
+        Supplier, {name for r in rows if r["suppliers"] for name in r["suppliers"]}
+    )
+
+    products = [
+        Product(
+            sku=r["sku"],
+            name=r["name"],
+            category_id=category_ids[r["category"]],
+            description=r["description"],
+            quantity=r["quantity"],
+            reorder_level=r["reorder_level"],
+            cost_price=r["cost_price"],
+            stock_status=r["stock_status"],
+        )
+        for r in rows
+    ]
+    Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=["sku"],
+        update_fields=PRODUCT_UPDATE_FIELDS,
+    )
+
+    # Rows without a "Suppliers" value keep their current suppliers, like before.
+    with_suppliers = [r for r in rows if r["suppliers"]]
+    if with_suppliers:
+        product_ids = dict(
+            Product.objects.filter(sku__in=[r["sku"] for r in with_suppliers]).values_list("sku", "id")
+        )
+        Through = Product.supplier.through
+        Through.objects.filter(product_id__in=product_ids.values()).delete()
+        Through.objects.bulk_create(
+            [
+                Through(product_id=product_ids[r["sku"]], supplier_id=supplier_ids[name])
+                for r in with_suppliers
+                for name in dict.fromkeys(r["suppliers"])
+            ],
+            ignore_conflicts=True,
+        )
+        refresh_supplier_signatures(product_ids.values())
+
+    products_bulk_changed.send(sender=Product, product_ids=None)
+    return len(rows)
+
+
+def import_products(text_file, chunk_size=CHUNK_SIZE, on_progress=None):
+    """
+    Import products from an open text file in CSV export format.
+
+    Rows are read `chunk_size` at a time and every chunk is written with a fixed
+    number of queries inside its own transaction, so chunks written before an
+    error stay imported. `on_progress(rows_read)` is called after each chunk.
+
+    Returns (imported, skipped, skips): skips lists the first
+    MAX_REPORTED_SKIPS skipped rows as "row N: reason", numbered like a
+    spreadsheet (row 1 is the header).
+    """
+    reader = csv.DictReader(text_file)
+    imported = skipped = rows_read = 0
+    skips = []
+
+    while True:
+        raw = list(islice(reader, chunk_size))
+        if not raw:
+            break
+
+        rows = []
+        for number, row in enumerate(raw, start=rows_read + 2):
+            parsed, reason = _parse_row(row)
+            if parsed is None:
+                skipped += 1
+                if len(skips) < MAX_REPORTED_SKIPS:
+                    skips.append(f"row {number}: {reason}")
+            else:
+                rows.append(parsed)
+
+        if rows:
+            with transaction.atomic():
+                imported += _import_chunk(rows)
+
+        rows_read += len(raw)
+        if on_progress:
+            on_progress(rows_read)
+
+    return imported, skipped, skips
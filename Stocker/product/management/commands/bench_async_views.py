@@ -0,0 +1,191 @@
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from main.views import dashboard_view, async_dashboard_view
+from product.models import Product, Category, Supplier
+from product.rollups import rebuild_rollups
+from product.snapshots import take_snapshot
+from product.views import supplier_report_view, async_supplier_report_view
+from product.management.commands.stress_stock import scratch_database
+
+
+class BenchUrls:
+    """
+    The site's URLs plus both variants of each page, so the two run through
+    the same ASGI handler, middleware and templates.
+    """
+    urlpatterns = [
+        path("bench/sync/dashboard/", dashboard_view),
+        path("bench/async/dashboard/", async_dashboard_view),
+        path("bench/sync/suppliers/", supplier_report_view),
+        path("bench/async/suppliers/", async_supplier_report_view),
+        path("", include("Stocker.urls")),
+    ]
+
+
+PAGES = {
+    "dashboard": "dashboard/",
+    "supplier report (filtered)": "suppliers/?status=in_stock&category={category}",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync and async dashboard and supplier report views under concurrent "
+        "requests, served by Django's ASGI handler on a seeded scratch SQLite database "
+        "(or the configured database with --current). The dashboard cache is disabled, "
+        "so every request runs the page's queries."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50_000)
+        parser.add_argument("--suppliers", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+        parser.add_argument("--requests", type=int, default=40, help="Requests per page and variant")
+        parser.add_argument(
+            "--latency", type=float, default=0.0,
+            help="Milliseconds added to every query, to stand in for the network round trip to a database server",
+        )
+        parser.add_argument(
+            "--current", action="store_true",
+            help="Benchmark the configured database as it is instead of a seeded scratch copy",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["current"]:
+            self._bench(opts)
+            return
+        path = os.path.join(tempfile.gettempdir(), f"stocker-bench-async-{os.getpid()}.sqlite3")
+        with scratch_database(path):
+            self._seed(opts["products"], opts["suppliers"])
+            self._bench(opts)
+
+    @contextmanager
+    def _latency(self, ms):
+        """
+        Delay every query by `ms` on all connections, including those worker
+        threads open later. Sleeping releases the GIL like waiting on a socket.
+        """
+        def delay(execute, sql, params, many, context):
+            time.sleep(ms / 1000)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        if not ms:
+            yield
+            return
+        connections.close_all()
+        connection_created.connect(install)
+        try:
+            yield
+        finally:
+            connection_created.disconnect(install)
+            connections.close_all()
+
+    def _seed(self, n, n_suppliers):
+        self.stdout.write(f"Seeding {n} products and {n_suppliers} suppliers")
+        rnd = random.Random(42)
+        category_ids = [Category.objects.create(name=f"Category {i}").id for i in range(20)]
+        Supplier.objects.bulk_create(Supplier(name=f"Supplier {i}") for i in range(n_suppliers))
+        supplier_ids = list(Supplier.objects.values_list("id", flat=True))
+        today = timezone.localdate()
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Widget {i}", sku=f"widget-{i:07d}", category_id=rnd.choice(category_ids),
+                    quantity=rnd.randint(0, 500), reorder_level=rnd.randint(0, 50), cost_price="9.99",
+                    stock_status=rnd.choice(["in_stock"] * 8 + ["almost_done", "out_of_stock"]),
+                    expiry_date=today + timedelta(days=rnd.randint(-30, 365)) if rnd.random() < 0.2 else None,
+                )
+                for i in range(n)
+            ),
+            batch_size=2000,
+        )
+        link = Product.supplier.through
+        link.objects.bulk_create(
+            (
+                link(product_id=product_id, supplier_id=rnd.choice(supplier_ids))
+                for product_id in Product.objects.values_list("id", flat=True)
+            ),
+            batch_size=5000,
+        )
+        # bulk_create stamps every row with now; spread the changes over a year
+        # like a real catalog, or the dashboard's "last 7 days" query sees every row
+        now = timezone.now()
+        Product.objects.bulk_update(
+            [
+                Product(id=product_id, updated_at=now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)))
+                for product_id in Product.objects.values_list("id", flat=True)
+            ],
+            ["updated_at"],
+            batch_size=2000,
+        )
+        rebuild_rollups()
+        for days_ago in range(90):
+            take_snapshot(today - timedelta(days=days_ago))
+
+    def _bench(self, opts):
+        user, _ = get_user_model().objects.get_or_create(username="bench-async-views")
+        category = Category.objects.order_by("id").values_list("id", flat=True).first() or ""
+        caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        results = {}
+        with self._latency(opts["latency"]), override_settings(
+            ROOT_URLCONF=BenchUrls, ALLOWED_HOSTS=["testserver"], CACHES=caches,
+        ):
+            for page, url in PAGES.items():
+                for variant in ("sync", "async"):
+                    self.stdout.write(f"{page}, {variant} view ...")
+                    results[page, variant] = async_to_sync(self._load)(
+                        user, f"/bench/{variant}/{url.format(category=category)}", opts["concurrency"], opts["requests"],
+                    )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== {opts['concurrency']} concurrent clients, {opts['latency']:g} ms per query, ms per request ==="
+        ))
+        self.stdout.write(f"{'':<36} {'p50':>8} {'p95':>8} {'req/s':>8}")
+        for (page, variant), r in results.items():
+            self.stdout.write(f"{page + ', ' + variant:<36} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['rps']:>8.1f}")
+
+    async def _load(self, user, url, concurrency, total):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        response = await client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+
+        timings, queue = [], list(range(total))
+
+        async def worker():
+            while queue:
+                queue.pop()
+                started = time.perf_counter()
+                await client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            "p50": statistics.median(timings),
+            "p95": timings[int(len(timings) * 0.95)],
+            "rps": total / elapsed,
+        }
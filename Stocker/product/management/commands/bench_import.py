@@ -0,0 +1,64 @@
+import csv
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from product.importer import import_products, CHUNK_SIZE
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the CSV import engine: query count and time per N generated rows (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--suppliers", type=int, default=200)
+
+    def _build_csv(self, rows, categories, suppliers):
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["Name", "SKU", "Category", "Suppliers", "Cost Price", "Quantity", "Reorder Level", "Stock Status", "Description"])
+        for i in range(rows):
+            w.writerow([
+                f"Bench product {i}",
+                f"BENCH-{i:08d}",
+                f"Bench category {i % categories}",
+                f"Bench supplier {i % suppliers}, Bench supplier {(i * 7) % suppliers}",
+                "9.99",
+                i % 100,
+                10,
+                "in_stock",
+                "",
+            ])
+        buf.seek(0)
+        return buf
+
+    def handle(self, *args, **opts):
+        rows = opts["rows"]
+        data = self._build_csv(rows, opts["categories"], opts["suppliers"])
+
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    imported, skipped, _ = import_products(data, chunk_size=opts["chunk_size"])
+                    elapsed = time.perf_counter() - started
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        queries = len(ctx.captured_queries)
+        per_10k = queries * 10000 / rows if rows else 0
+        self.stdout.write(f"rows:            {rows} (imported {imported}, skipped {skipped})")
+        self.stdout.write(f"chunk size:      {opts['chunk_size']}")
+        self.stdout.write(f"queries:         {queries}")
+        self.stdout.write(f"queries per 10k: {per_10k:.0f}")
+        self.stdout.write(f"time:            {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
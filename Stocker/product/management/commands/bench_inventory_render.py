@@ -0,0 +1,103 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from product.fragments import bump_table_version
+from product.models import Product, Category, Supplier
+from product.management.commands.stress_stock import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the inventory page render on a scratch SQLite catalog with a growing number of "
+        "suppliers: with fragment caching off, with a cold fragment cache and with a warm one."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument(
+            "--suppliers", default="100,1000,5000",
+            help="Comma-separated supplier counts to measure at",
+        )
+        parser.add_argument("--repeat", type=int, default=10, help="Renders per measurement; the median is reported")
+
+    def handle(self, *args, **opts):
+        levels = sorted(int(n) for n in opts["suppliers"].split(","))
+        path = os.path.join(tempfile.gettempdir(), f"stocker-bench-render-{os.getpid()}.sqlite3")
+
+        rows = []
+        with scratch_database(path), override_settings(ALLOWED_HOSTS=["testserver"]):
+            self._seed(opts["products"], levels[0])
+            user = get_user_model().objects.create_superuser("bench-render", password=None)
+            client = Client()
+            client.force_login(user)
+
+            for level in levels:
+                have = Supplier.objects.count()
+                Supplier.objects.bulk_create(Supplier(name=f"Supplier {i}") for i in range(have, level))
+                bump_table_version(Supplier)
+                self.stdout.write(f"{level} suppliers ...")
+
+                with override_settings(FRAGMENT_CACHE_TTL=0):
+                    off, size = self._time(client, opts["repeat"], clear=True)
+                cold, _ = self._time(client, opts["repeat"], clear=True)
+                warm, _ = self._time(client, opts["repeat"], clear=False)
+                rows.append((level, off, cold, warm, size))
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== Inventory page render, median ms ==="))
+        self.stdout.write(f"{'suppliers':>10} {'no cache':>10} {'cold':>10} {'warm':>10} {'speed-up':>9} {'page KB':>8}")
+        for level, off, cold, warm, size in rows:
+            self.stdout.write(
+                f"{level:>10} {off:>10.1f} {cold:>10.1f} {warm:>10.1f} {off / warm:>8.1f}x {size / 1024:>8.0f}"
+            )
+
+    def _seed(self, n, n_suppliers):
+        self.stdout.write(f"Seeding {n} products")
+        rnd = random.Random(42)
+        category_ids = [Category.objects.create(name=f"Category {i}").id for i in range(50)]
+        Supplier.objects.bulk_create(Supplier(name=f"Supplier {i}") for i in range(n_suppliers))
+        supplier_ids = list(Supplier.objects.values_list("id", flat=True))
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Widget {i}", sku=f"widget-{i:07d}", category_id=rnd.choice(category_ids),
+                    quantity=rnd.randint(0, 500), reorder_level=rnd.randint(0, 50), cost_price="9.99",
+                )
+                for i in range(n)
+            ),
+            batch_size=2000,
+        )
+        link = Product.supplier.through
+        link.objects.bulk_create(
+            (
+                link(product_id=product_id, supplier_id=supplier_id)
+                for product_id in Product.objects.values_list("id", flat=True)
+                for supplier_id in rnd.sample(supplier_ids, 2)
+            ),
+            batch_size=5000,
+        )
+
+    def _time(self, client, repeat, clear):
+        """
+        Median milliseconds to render the first inventory page, clearing the
+        cache before every render when `clear` is set (after a warm-up
+        render otherwise). Also returns the page size in bytes.
+        """
+        timings = []
+        response = client.get("/inventory/")
+        assert response.status_code == 200, response.status_code
+        for _ in range(repeat):
+            if clear:
+                caches["template_fragments"].clear()
+            started = time.perf_counter()
+            response = client.get("/inventory/")
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), len(response.content)
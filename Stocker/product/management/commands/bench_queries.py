@@ -0,0 +1,205 @@
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Count, Q
+
+from product.filters import apply_filters
+from product.models import Product, Category, Supplier
+from product.rollups import supplier_totals
+from product.search import search_suppliers, rebuild_search_index
+from product.signatures import supplier_signature
+
+
+ALIAS = "bench"
+
+
+@contextmanager
+def bench_database(path, keep=False):
+    """
+    Register `path` as the migrated SQLite database ALIAS for the duration
+    of the block, deleting the file afterwards unless `keep` is set.
+    """
+    connections.databases[ALIAS] = {
+        **connections.databases["default"],
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+    }
+    try:
+        call_command("migrate", database=ALIAS, verbosity=0)
+        yield connections[ALIAS]
+    finally:
+        connections[ALIAS].close()
+        del connections.databases[ALIAS]
+        if not keep:
+            os.remove(path)
+
+
+def _query_cases():
+    """
+    (label, callable(db)) for the queries the dashboard, inventory pages,
+    reports and alerts run. Each callable fully evaluates its querysets.
+    """
+    today = date.today()
+    soon = today + timedelta(days=30)
+    week_ago = datetime.combine(today - timedelta(days=6), datetime.min.time(), tzinfo=dt_timezone.utc)
+
+    def inventory_page(params):
+        def run(db):
+            qs = apply_filters(Product.objects.using(db).select_related("category"), QueryDict(params))
+            list(qs.order_by("id")[:12])
+            qs.count()
+        return run
+
+    return [
+        ("dashboard: headline counts", lambda db: Product.objects.using(db).aggregate(
+            total=Count("id"),
+            low=Count("id", filter=Q(is_low_stock=True)),
+            out=Count("id", filter=Q(stock_status="out_of_stock") | Q(quantity__lte=0)),
+        )),
+        ("dashboard: low stock list", lambda db: list(
+            Product.objects.using(db).filter(is_low_stock=True).order_by("quantity")[:10])),
+        ("dashboard: expiring soon", lambda db: list(
+            Product.objects.using(db).filter(expiry_date__gte=today, expiry_date__lte=soon).order_by("expiry_date")[:10])),
+        ("dashboard: recent activity", lambda db: list(
+            Product.objects.using(db).order_by("-updated_at").values("name", "updated_at", "sku")[:10])),
+        ("dashboard: top products", lambda db: list(
+            Product.objects.using(db).order_by("-quantity").values("name", "quantity")[:6])),
+        ("dashboard: updates last 7 days", lambda db: Product.objects.using(db).filter(updated_at__gte=week_ago).count()),
+        ("dashboard: supplier performance", lambda db: list(
+            Supplier.objects.using(db).annotate(total=Count("products")).order_by("-total")[:10])),
+        ("inventory: first page", inventory_page("")),
+        ("inventory: status filter", inventory_page("status=out_of_stock")),
+        ("inventory: category + status", inventory_page("category=7&status=almost_done")),
+        ("inventory: search", inventory_page("q=widget-0042")),
+        ("inventory: exact suppliers", inventory_page("supplier=3&supplier=11")),
+        ("inventory: any of suppliers", inventory_page("supplier=3&supplier=11&supplier_match=any")),
+        ("categories: first page", lambda db: list(Category.objects.using(db).order_by("id")[:12])),
+        ("suppliers: search", lambda db: list(search_suppliers(Supplier.objects.using(db), "Supplier 17")[:12])),
+        ("reports: supplier totals (filtered)", lambda db: list(
+            supplier_totals(Product.objects.using(db).filter(stock_status="almost_done")).using(db))),
+        ("alerts: expiry scan", lambda db: list(
+            Product.objects.using(db).filter(expiry_date__range=(today, soon)).values_list("id", flat=True))),
+        ("alerts: low stock scan", lambda db: list(
+            Product.objects.using(db).filter(is_low_stock=True).order_by("quantity").values_list("id", flat=True)[:10])),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway SQLite database with N products and report EXPLAIN QUERY PLAN "
+        "and timing for the hot queries, without and with the Product indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1_000_000)
+        parser.add_argument("--categories", type=int, default=200)
+        parser.add_argument("--suppliers", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per query; the best time is reported.")
+        parser.add_argument("--db", help="SQLite file to use (default: a temporary file, deleted afterwards).")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded database file.")
+
+    def handle(self, *args, **opts):
+        path = opts["db"] or os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+        with bench_database(path, keep=opts["keep"] or bool(opts["db"])):
+            if not Product.objects.using(ALIAS).exists():
+                self._seed(opts)
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            indexes = Product._meta.indexes
+            with connections[ALIAS].schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Product, index)
+            self.stdout.write(self.style.MIGRATE_HEADING("\n=== Without Product indexes ==="))
+            before = self._run_cases(opts["repeat"])
+
+            with connections[ALIAS].schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Product, index)
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("ANALYZE")
+            self.stdout.write(self.style.MIGRATE_HEADING("\n=== With Product indexes ==="))
+            after = self._run_cases(opts["repeat"])
+
+            self.stdout.write(self.style.MIGRATE_HEADING("\n=== Summary (best of %d, ms) ===" % opts["repeat"]))
+            for label in before:
+                b, a = before[label], after[label]
+                self.stdout.write(f"{label:<40} {b:>10.1f} {a:>10.1f}   x{b / a if a else 0:.1f}")
+
+    def _seed(self, opts):
+        n, n_cat, n_sup = opts["products"], opts["categories"], opts["suppliers"]
+        self.stdout.write(f"Seeding {n} products, {n_cat} categories, {n_sup} suppliers into {connections[ALIAS].settings_dict['NAME']}")
+        rnd = random.Random(42)
+        now = datetime.now(dt_timezone.utc).replace(tzinfo=None)  # SQLite stores naive UTC
+        today = date.today()
+        statuses = ["in_stock"] * 8 + ["almost_done", "out_of_stock"]
+
+        Category.objects.using(ALIAS).bulk_create(Category(name=f"Category {i}") for i in range(n_cat))
+        Supplier.objects.using(ALIAS).bulk_create(Supplier(name=f"Supplier {i}") for i in range(n_sup))
+        cat_ids = list(Category.objects.using(ALIAS).values_list("id", flat=True))
+        sup_ids = list(Supplier.objects.using(ALIAS).values_list("id", flat=True))
+
+        # Through the model, so a new column gets its default and a schema
+        # change breaks the seed loudly instead of going unnoticed
+        Link = Product.supplier.through
+        product_table = Product._meta.db_table
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=OFF")
+            cursor.execute("PRAGMA synchronous=OFF")
+        batch = 50_000
+        for start in range(0, n, batch):
+            products, links = [], []
+            for i in range(start, min(start + batch, n)):
+                expiry = today + timedelta(days=rnd.randint(-30, 365)) if rnd.random() < 0.2 else None
+                suppliers = {rnd.choice(sup_ids) for _ in range(2)}
+                products.append(Product(
+                    id=i + 1, name=f"Widget {i}", sku=f"widget-{i:07d}", category_id=rnd.choice(cat_ids),
+                    description="", quantity=rnd.randint(0, 500), reorder_level=rnd.randint(0, 50),
+                    cost_price="9.99", expiry_date=expiry, stock_status=rnd.choice(statuses),
+                    supplier_signature=supplier_signature(suppliers),
+                ))
+                links.extend(Link(product_id=i + 1, supplier_id=sid) for sid in suppliers)
+            Product.objects.using(ALIAS).bulk_create(products)
+            Link.objects.using(ALIAS).bulk_create(links)
+            self.stdout.write(f"  {min(start + batch, n)} products")
+
+        # auto_now stamped every row with the current time: spread them over
+        # the past year like a live catalog (stable per id, like the seed)
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {product_table} SET "
+                f"created_at = datetime(%s, '-' || ((id * 7919) %% 525600) || ' minutes'), "
+                f"updated_at = datetime(%s, '-' || ((id * 7919) %% 525600) || ' minutes')",
+                [now.isoformat(" "), now.isoformat(" ")],
+            )
+        rebuild_search_index(using=ALIAS)
+
+    def _run_cases(self, repeat):
+        connection = connections[ALIAS]
+        timings = {}
+        for label, run in _query_cases():
+            best = None
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    run(ALIAS)
+                    elapsed = (time.perf_counter() - started) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+
+            self.stdout.write(self.style.SUCCESS(f"\n{label}  ({best:.1f} ms)"))
+            with connection.cursor() as cursor:
+                for query in ctx.captured_queries:
+                    cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                    for row in cursor.fetchall():
+                        self.stdout.write(f"    {row[-1]}")
+        return timings
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+
+from django.db.models import Q
+
+from product.models import Product, Supplier
+from product.search import search_products, search_suppliers
+
+from .bench_queries import ALIAS, bench_database, Command as BenchQueriesCommand
+
+
+TERMS = ["widget-0042", "Widget 12345", "0099", "no-such-product"]
+
+
+def _like_products(qs, q):
+    return qs.filter(Q(name__icontains=q) | Q(sku__icontains=q) | Q(description__icontains=q)).order_by("id")
+
+
+class Command(BenchQueriesCommand):
+    help = (
+        "Seed a throwaway SQLite database with N products and compare LIKE '%%q%%' "
+        "search with the full-text search index (first page + count per term)."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--term", action="append", dest="terms", help="Search term to time (repeatable).")
+
+    def handle(self, *args, **opts):
+        path = opts["db"] or os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+        with bench_database(path, keep=opts["keep"] or bool(opts["db"])):
+            if not Product.objects.using(ALIAS).exists():
+                self._seed(opts)
+
+            products = Product.objects.using(ALIAS)
+            suppliers = Supplier.objects.using(ALIAS)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== best of {opts['repeat']}, ms ==="))
+            self.stdout.write(f"{'query':<40} {'LIKE':>10} {'index':>10}   {'rows':>8}")
+            for term in opts["terms"] or TERMS:
+                like, like_count = self._time(opts["repeat"], _like_products(products, term))
+                fts, fts_count = self._time(opts["repeat"], search_products(products, term, ranked=True))
+                self._report(f"products: {term}", like, fts, like_count, fts_count)
+
+                like, like_count = self._time(opts["repeat"], suppliers.filter(name__icontains=term).order_by("id"))
+                fts, fts_count = self._time(opts["repeat"], search_suppliers(suppliers, term).order_by("id"))
+                self._report(f"suppliers: {term}", like, fts, like_count, fts_count)
+
+    def _time(self, repeat, qs):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(qs[:12])
+            count = qs.count()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, count
+
+    def _report(self, label, like, fts, like_count, fts_count):
+        line = f"{label:<40} {like:>10.1f} {fts:>10.1f}   {fts_count:>8}   x{like / fts if fts else 0:.1f}"
+        if like_count != fts_count:
+            line += f"  (LIKE found {like_count})"
+        self.stdout.write(line)
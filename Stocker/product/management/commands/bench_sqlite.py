@@ -0,0 +1,136 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, OperationalError
+from django.http import QueryDict
+
+from Stocker.sqlite import sqlite_options
+from product.filters import apply_filters
+from product.models import Product, Category
+from product.stock import adjust_stock, InsufficientStock
+from product.management.commands.stress_stock import scratch_database
+
+
+# label -> database settings under test
+CONFIGS = {
+    "plain (rollback journal, new connection per request)": {"OPTIONS": {}, "CONN_MAX_AGE": 0},
+    "tuned (Stocker.sqlite pragmas, persistent connections)": {"OPTIONS": sqlite_options(), "CONN_MAX_AGE": None},
+}
+
+READ_QUERIES = ["status=almost_done", "status=in_stock&category=2", "q=widget-00012", ""]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent inventory-page readers and stock-adjusting writers against a scratch "
+        "SQLite database, once with plain connection settings and once with the Stocker.sqlite "
+        "tuning, and compare throughput and lock errors."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=20_000)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        results = {}
+        for label, overrides in CONFIGS.items():
+            path = os.path.join(tempfile.gettempdir(), f"stocker-bench-sqlite-{os.getpid()}.sqlite3")
+            with scratch_database(path, **overrides):
+                self._seed(opts["products"])
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {label} ==="))
+                results[label] = self._run(opts, close_each=overrides["CONN_MAX_AGE"] == 0)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== Summary (operations per second) ==="))
+        self.stdout.write(f"{'':<56} {'reads/s':>9} {'writes/s':>9} {'errors':>7} {'p95 read ms':>12}")
+        for label, r in results.items():
+            self.stdout.write(
+                f"{label:<56} {r['reads'] / r['elapsed']:>9.1f} {r['writes'] / r['elapsed']:>9.1f} "
+                f"{r['errors']:>7} {r['p95_read']:>12.1f}"
+            )
+
+    def _seed(self, n):
+        category_ids = [Category.objects.create(name=f"Category {i}").id for i in range(10)]
+        rnd = random.Random(42)
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Widget {i}", sku=f"widget-{i:07d}", category_id=rnd.choice(category_ids),
+                    quantity=rnd.randint(0, 500), reorder_level=rnd.randint(0, 50), cost_price="9.99",
+                    stock_status=rnd.choice(["in_stock"] * 8 + ["almost_done", "out_of_stock"]),
+                )
+                for i in range(n)
+            ),
+            batch_size=2000,
+        )
+        connections["default"].close()
+
+    def _run(self, opts, close_each):
+        n = opts["products"]
+        deadline = time.perf_counter() + opts["seconds"]
+        lock = threading.Lock()
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        read_times = []
+
+        def finish_request():
+            # What the request_finished handler does with CONN_MAX_AGE = 0
+            if close_each:
+                connections["default"].close()
+
+        def reader(seed):
+            rnd = random.Random(seed)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    qs = apply_filters(Product.objects.select_related("category"), QueryDict(rnd.choice(READ_QUERIES)))
+                    list(qs.order_by("id")[:12])
+                    qs.count()
+                except OperationalError:
+                    with lock:
+                        counts["errors"] += 1
+                else:
+                    with lock:
+                        counts["reads"] += 1
+                        read_times.append(time.perf_counter() - started)
+                finally:
+                    finish_request()
+
+        def writer(seed):
+            rnd = random.Random(seed)
+            while time.perf_counter() < deadline:
+                try:
+                    adjust_stock(rnd.randint(1, n), rnd.choice([-2, -1, 1, 3]), reason="bench")
+                except InsufficientStock:
+                    pass
+                except OperationalError:
+                    with lock:
+                        counts["errors"] += 1
+                else:
+                    with lock:
+                        counts["writes"] += 1
+                finally:
+                    finish_request()
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(opts["readers"])]
+        threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(opts["writers"])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+
+        read_times.sort()
+        p95 = read_times[int(len(read_times) * 0.95)] * 1000 if read_times else 0.0
+        self.stdout.write(
+            f"{counts['reads']} reads, {counts['writes']} writes, {counts['errors']} lock errors "
+            f"in {elapsed:.1f}s (p95 read {p95:.1f} ms)"
+        )
+        return {**counts, "elapsed": elapsed, "p95_read": p95}
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from product.images import image_variants
+from product.models import Product, Category, Supplier
+
+
+class Command(BaseCommand):
+    help = "Create the resized WebP/JPEG variants for every product, category and supplier image."
+
+    def handle(self, *args, **opts):
+        done = failed = 0
+        for model in (Product, Category, Supplier):
+            for obj in model.objects.exclude(image="").exclude(image=None).only("id", "image").iterator():
+                if image_variants(obj.image):
+                    done += 1
+                else:
+                    failed += 1
+        self.stdout.write(f"{done} images ready, {failed} could not be processed")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from product.models import SupplierRollup, CategoryRollup
+from product.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute every supplier and category inventory rollup from scratch."
+
+    def handle(self, *args, **opts):
+        rebuild_rollups()
+        self.stdout.write(
+            f"Rebuilt {SupplierRollup.objects.count()} supplier and {CategoryRollup.objects.count()} category rollups"
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from product.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Refill the product and supplier search index from scratch (SQLite only; pg_trgm needs no rebuild)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **opts):
+        rebuild_search_index(using=opts["database"])
+        self.stdout.write("Rebuilt the search index")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from product.rollups import rebuild_rollups
+from product.snapshots import take_snapshot, prune_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Record today's inventory totals (all products, per category, per supplier) "
+        "for the history charts. Safe to run more than once a day: the day's rows are overwritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days", type=int, default=None,
+            help="Also delete snapshots older than this many days",
+        )
+
+    def handle(self, *args, **opts):
+        # The snapshot copies the rollups, so make sure they are exact first
+        rebuild_rollups()
+        written = take_snapshot()
+        self.stdout.write(f"Wrote {written} snapshot rows")
+        if opts["keep_days"] is not None:
+            self.stdout.write(f"Deleted {prune_snapshots(opts['keep_days'])} old snapshot rows")
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from product.models import Product, Category, StockMovement
+from product.stock import adjust_stock
+
+
+START_QUANTITY = 1_000_000
+
+
+@contextmanager
+def scratch_database(path, **overrides):
+    """
+    Point the default database at a fresh migrated SQLite file for the
+    duration of the block, with `overrides` (OPTIONS, CONN_MAX_AGE, ...)
+    applied to its settings. Worker threads open their own connections
+    from the same settings, and the signal receivers write to the same place.
+    """
+    settings_dict = connections.databases["default"]
+    saved = dict(settings_dict)
+    connections["default"].close()
+    settings_dict.update({"ENGINE": "django.db.backends.sqlite3", "NAME": path, **overrides})
+    try:
+        call_command("migrate", verbosity=0)
+        yield
+    finally:
+        connections["default"].close()
+        settings_dict.clear()
+        settings_dict.update(saved)
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one product with concurrent stock adjustments from several threads, "
+        "once as a read-modify-write of quantity and once through product.stock.adjust_stock, "
+        "and report how many updates were lost. Runs on a scratch SQLite database."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--adjustments", type=int, default=50, help="Adjustments per thread")
+
+    def handle(self, *args, **opts):
+        threads, per_thread = opts["threads"], opts["adjustments"]
+        path = os.path.join(tempfile.gettempdir(), f"stocker-stress-{os.getpid()}.sqlite3")
+
+        with scratch_database(path):
+            category = Category.objects.create(name="Stress")
+            product = Product.objects.create(
+                name="Stress widget", sku="stress-0001", category=category,
+                quantity=START_QUANTITY, reorder_level=10, cost_price="1.00",
+            )
+            connections["default"].close()
+
+            failed = False
+            for label, adjust in (("read-modify-write", _read_modify_write), ("adjust_stock", _atomic)):
+                Product.objects.filter(pk=product.pk).update(quantity=START_QUANTITY)
+                StockMovement.objects.all().delete()
+
+                elapsed, errors = _hammer(adjust, product.pk, threads, per_thread)
+                quantity = Product.objects.values_list("quantity", flat=True).get(pk=product.pk)
+                expected = START_QUANTITY - threads * per_thread
+                lost = quantity - expected
+                ledger = StockMovement.objects.filter(product_id=product.pk).count()
+
+                line = (
+                    f"{label:<18} {threads * per_thread} adjustments in {elapsed:.2f}s: "
+                    f"quantity {quantity} (expected {expected}), {lost} lost, "
+                    f"{ledger} ledger rows, {len(errors)} errors"
+                )
+                if lost or errors:
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+                for error in errors[:3]:
+                    self.stdout.write(f"    {error!r}")
+                if adjust is _atomic:
+                    failed = bool(lost or errors or ledger != threads * per_thread)
+
+        if failed:
+            raise CommandError("adjust_stock lost updates or ledger rows under concurrent writers.")
+
+
+def _read_modify_write(product_id):
+    # What edit_product_view used to do: read, change in Python, save back
+    product = Product.objects.get(pk=product_id)
+    time.sleep(0)  # let another writer in between the read and the write
+    product.quantity = product.quantity - 1
+    product.save(update_fields=["quantity"])
+
+
+def _atomic(product_id):
+    adjust_stock(product_id, -1, reason="stress test")
+
+
+def _hammer(adjust, product_id, threads, per_thread):
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        try:
+            for _ in range(per_thread):
+                try:
+                    adjust(product_id)
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            connections.close_all()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started, errors
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from product.versions import bump_version
+from Stocker.replica import REPLICA, SYNC_MARKER
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite database into the read replica file (REPLICA_SQLITE_PATH) with "
+        "SQLite's online backup, once or every --interval seconds. Stands in for real "
+        "replication when trying the replica routing locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep copying until interrupted")
+        parser.add_argument("--interval", type=float, default=10.0, help="Seconds between copies with --loop")
+
+    def handle(self, *args, **opts):
+        if REPLICA not in connections.settings:
+            raise CommandError("No replica configured: set REPLICA_SQLITE_PATH.")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("sync_replica only copies SQLite files; use streaming replication on PostgreSQL.")
+
+        while True:
+            started = time.perf_counter()
+            # Stamp first (no transaction here, so it commits at once): the copy
+            # then holds every write committed before the stamp
+            bump_version(SYNC_MARKER)
+            source = sqlite3.connect(primary.settings_dict["NAME"])
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f"Copied the database to the replica in {time.perf_counter() - started:.2f}s")
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Count, Sum, F, Q, DecimalField
+from django.db.models.functions import Coalesce
+
+
+def _totals(prefix):
+    return {
+        "product_count": Count(f"{prefix}id"),
+        "total_qty": Coalesce(Sum(f"{prefix}quantity"), 0),
+        "total_value": Coalesce(
+            Sum(F(f"{prefix}quantity") * F(f"{prefix}cost_price"), output_field=DecimalField()),
+            0,
+            output_field=DecimalField(),
+        ),
+        "low_stock": Count(f"{prefix}id", filter=Q(**{f"{prefix}stock_status": "almost_done"})),
+        "out_stock": Count(f"{prefix}id", filter=Q(**{f"{prefix}stock_status": "out_of_stock"})),
+    }
+
+
+def populate(apps, schema_editor):
+    Supplier = apps.get_model("product", "Supplier")
+    Category = apps.get_model("product", "Category")
+    SupplierRollup = apps.get_model("product", "SupplierRollup")
+    CategoryRollup = apps.get_model("product", "CategoryRollup")
+    db = schema_editor.connection.alias
+
+    SupplierRollup.objects.using(db).bulk_create(
+        SupplierRollup(supplier_id=row.pop("id"), **row)
+        for row in Supplier.objects.using(db).values("id").annotate(**_totals("products__"))
+    )
+    CategoryRollup.objects.using(db).bulk_create(
+        CategoryRollup(category_id=row.pop("id"), **row)
+        for row in Category.objects.using(db).values("id").annotate(**_totals("product__"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_categoryrollup_supplierrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
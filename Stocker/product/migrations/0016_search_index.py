@@ -0,0 +1,63 @@
+from django.db import migrations
+
+
+# table -> (indexed table, columns)
+SQLITE_INDEXES = {
+    "product_search": ("product_product", ["name", "sku", "description"]),
+    "supplier_search": ("product_supplier", ["name"]),
+}
+
+# index name -> (table, column)
+TRIGRAM_INDEXES = {
+    "product_name_trgm": ("product_product", "name"),
+    "product_sku_trgm": ("product_product", "sku"),
+    "product_description_trgm": ("product_product", "description"),
+    "supplier_name_trgm": ("product_supplier", "name"),
+}
+
+
+def trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for table, (source, columns) in SQLITE_INDEXES.items():
+            columns = ", ".join(columns)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, tokenize='trigram')"
+            )
+            schema_editor.execute(f"INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {source}")
+    elif vendor == "postgresql" and trigram_available(schema_editor):
+        # Without the contrib package searches still work, as plain LIKE scans
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # icontains compiles to UPPER("col"::text) LIKE UPPER(...), so the
+        # index has to be on that expression to be used
+        for name, (table, column) in TRIGRAM_INDEXES.items():
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for table in SQLITE_INDEXES:
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+    elif vendor == "postgresql":
+        for name in TRIGRAM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0015_product_is_low_stock'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:30
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def _signature(supplier_ids):
+    ids = sorted(set(supplier_ids))
+    if not ids:
+        return ""
+    return hashlib.sha1(",".join(map(str, ids)).encode()).hexdigest()
+
+
+def populate_signatures(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Through = Product.supplier.through
+    db = schema_editor.connection.alias
+
+    supplier_ids = {}
+    for product_id, supplier_id in Through.objects.using(db).values_list("product_id", "supplier_id").iterator():
+        supplier_ids.setdefault(product_id, []).append(supplier_id)
+    Product.objects.using(db).bulk_update(
+        [Product(id=pid, supplier_signature=_signature(ids)) for pid, ids in supplier_ids.items()],
+        ["supplier_signature"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0016_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='supplier_signature',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['supplier_signature'], name='product_supplier_sig_idx'),
+        ),
+        migrations.RunPython(populate_signatures, migrations.RunPython.noop),
+    ]
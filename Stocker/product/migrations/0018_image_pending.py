@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0017_product_supplier_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='image_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0019_stockmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.PositiveSmallIntegerField(choices=[(0, 'All products'), (1, 'Category'), (2, 'Supplier')])),
+                ('object_id', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('product_count', models.IntegerField(default=0)),
+                ('total_qty', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('low_stock', models.IntegerField(default=0)),
+                ('out_stock', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'object_id', 'day'), name='snapshot_scope_day_uniq')],
+            },
+        ),
+    ]
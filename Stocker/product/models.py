@@ -1,11 +1,27 @@
+from django.conf import settings
 from django.db import models
 
 # Create your models here.
 
-class Category(models.Model):
+class LoadedImageMixin:
+    """
+    Remembers the image an instance was loaded with, so saving it can tell
+    whether the image changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.__dict__.get("image")
+        return instance
+
+
+class Category(LoadedImageMixin, models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='images/', blank=True, null=True)
+    # A new image is staged and still being pushed to the media storage
+    image_pending = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -14,13 +30,15 @@ class Category(models.Model):
 
 
 
-class Supplier(models.Model):
+class Supplier(LoadedImageMixin, models.Model):
     
     name = models.CharField(max_length=255, unique=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     image = models.ImageField(upload_to='images/', blank=True, null=True)
+    # A new image is staged and still being pushed to the media storage
+    image_pending = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -28,7 +46,7 @@ class Supplier(models.Model):
         return self.name
 
 
-class Product(models.Model):
+class Product(LoadedImageMixin, models.Model):
 
     STOCK_STATUS_CHOICES = [
         ('in_stock', 'In Stock'),
@@ -41,16 +59,172 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='images/', blank=True, null=True)
+    # A new image is staged and still being pushed to the media storage
+    image_pending = models.BooleanField(default=False, editable=False)
     quantity = models.IntegerField(default=0)
     reorder_level = models.IntegerField(default=0)
     cost_price = models.DecimalField(max_digits=10, decimal_places=2)
     supplier = models.ManyToManyField(Supplier, related_name='products')
     expiry_date = models.DateField(blank=True, null=True)
     stock_status  = models.CharField(max_length=20, choices=STOCK_STATUS_CHOICES, default='in_stock')
+    # Computed and stored by the database, so it stays correct for save(),
+    # bulk_create/bulk_update and queryset.update() alike.
+    is_low_stock = models.GeneratedField(
+        expression=models.Q(quantity__lte=models.F('reorder_level')),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    # Hash of the sorted supplier ids (see product.signatures), kept current
+    # whenever the supplier set changes; "" for no suppliers.
+    supplier_signature = models.CharField(max_length=40, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Status filters and the "out of stock / lowest quantity" lists
+            models.Index(fields=['stock_status', 'quantity'], name='product_status_qty_idx'),
+            # Inventory page: category filter combined with a status filter
+            models.Index(fields=['category', 'stock_status'], name='product_category_status_idx'),
+            # Only perishable items have an expiry date
+            models.Index(fields=['expiry_date'], name='product_expiry_idx', condition=models.Q(expiry_date__isnull=False)),
+            # Recent activity and the per-day update chart
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+            # Top products by quantity
+            models.Index(fields=['quantity'], name='product_quantity_idx'),
+            # Low-stock counts and the "lowest quantity first" low-stock lists
+            models.Index(fields=['quantity'], name='product_low_stock_idx', condition=models.Q(is_low_stock=True)),
+            # "Exactly these suppliers" filter
+            models.Index(fields=['supplier_signature'], name='product_supplier_sig_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The database recomputed is_low_stock; reload it lazily on next access
+        self.__dict__.pop('is_low_stock', None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded category so a move can update both rollups
+        instance._loaded_category_id = instance.__dict__.get("category_id")
+        return instance
+
+
+class StockMovement(models.Model):
+    """
+    One change to a product's quantity. Written by product.stock in the same
+    transaction as the quantity update, so the ledger and the stock agree.
+    """
+
+    KIND_CHOICES = [
+        ('in', 'Stock In'),
+        ('out', 'Stock Out'),
+        ('adjust', 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    delta = models.IntegerField()
+    # Quantity right after this movement was applied
+    quantity_after = models.IntegerField()
+    reason = models.CharField(max_length=255, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # A product's history, newest first
+            models.Index(fields=['product', '-created_at'], name='movement_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.delta:+d} for {self.product_id}"
 
+
+class SupplierRollup(models.Model):
+    """
+    Precomputed inventory totals per supplier, kept current by product.rollups.
+    """
+    supplier = models.OneToOneField(Supplier, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    product_count = models.IntegerField(default=0)
+    total_qty = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock = models.IntegerField(default=0)
+    out_stock = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup for {self.supplier_id}"
+
+
+class CategoryRollup(models.Model):
+    """
+    Precomputed inventory totals per category, kept current by product.rollups.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    product_count = models.IntegerField(default=0)
+    total_qty = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock = models.IntegerField(default=0)
+    out_stock = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup for {self.category_id}"
+
+
+class InventorySnapshot(models.Model):
+    """
+    End-of-day inventory totals, one row per day for all products and for
+    each category and supplier. Written by the snapshot_inventory command;
+    the history charts read it instead of the live tables.
+    """
+
+    SCOPE_ALL = 0
+    SCOPE_CATEGORY = 1
+    SCOPE_SUPPLIER = 2
+    SCOPE_CHOICES = [
+        (SCOPE_ALL, 'All products'),
+        (SCOPE_CATEGORY, 'Category'),
+        (SCOPE_SUPPLIER, 'Supplier'),
+    ]
+
+    # No foreign keys: history outlives deleted categories and suppliers,
+    # and rows stay small. object_id is 0 for SCOPE_ALL.
+    scope = models.PositiveSmallIntegerField(choices=SCOPE_CHOICES)
+    object_id = models.IntegerField(default=0)
+    day = models.DateField()
+    product_count = models.IntegerField(default=0)
+    total_qty = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock = models.IntegerField(default=0)
+    out_stock = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index behind every range query: one scope/object, a span of days
+            models.UniqueConstraint(fields=['scope', 'object_id', 'day'], name='snapshot_scope_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_scope_display()} {self.object_id} on {self.day}"
+
+
+class DataVersion(models.Model):
+    """
+    A named counter bumped whenever the data behind a cache changes, kept by
+    product.versions. It lives in the database so a bump made by one process
+    (e.g. the job runner) is seen by every web process.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.value}"
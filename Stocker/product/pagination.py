@@ -0,0 +1,138 @@
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+PAGE_PARAMS = ("page", "after", "before")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, size):
+    """
+    The key values stored in `token`, or None when it is missing or malformed.
+    """
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _after(fields, values, forward):
+    """
+    Q for rows strictly after `values` in the (field, direction) ordering,
+    or strictly before it when `forward` is False.
+    """
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        lookup = "lt" if descending == forward else "gt"
+        step = Q(**{f"{name}__{lookup}": values[i]})
+        for j in range(i):
+            step &= Q(**{fields[j][0]: values[j]})
+        condition |= step
+    return condition
+
+
+class CursorPage:
+    """
+    One page of a keyset-paginated queryset. Iterates like a Django Page;
+    `next_cursor` / `previous_cursor` are opaque tokens for the neighbouring pages.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total=None, count_limit=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+        self.count_limit = count_limit
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def total_is_exact(self):
+        return self.count_limit is None or self.total <= self.count_limit
+
+
+def cursor_paginate(qs, params, per_page=12, count_limit=1000):
+    """
+    Keyset-paginate `qs` by its ordering (plain, non-null field names; "id" is
+    appended as the tie-breaker) using the `after` / `before` cursors in `params`.
+
+    Every page costs the same as the first: rows are found with a WHERE on the
+    key instead of an OFFSET. `total` counts at most `count_limit` + 1 rows
+    (None disables counting, 0 counts them all).
+    """
+    ordering = list(qs.query.order_by) or ["id"]
+    fields = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+    if fields[-1][0] not in ("id", "pk"):
+        fields.append(("id", False))
+        ordering.append("id")
+
+    total = None
+    if count_limit is not None:
+        counted = qs.order_by()
+        total = (counted[:count_limit + 1] if count_limit else counted).count()
+        if not total:
+            return CursorPage([], total=0, count_limit=count_limit or None)
+
+    after = decode_cursor(params.get("after"), len(fields))
+    before = None if after else decode_cursor(params.get("before"), len(fields))
+
+    if before is not None:
+        reverse = [name[1:] if name.startswith("-") else f"-{name}" for name in ordering]
+        rows = list(qs.filter(_after(fields, before, forward=False)).order_by(*reverse)[:per_page + 1])
+        more_before = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        more_after = True
+    else:
+        page_qs = qs.order_by(*ordering)
+        if after is not None:
+            page_qs = page_qs.filter(_after(fields, after, forward=True))
+        rows = list(page_qs[:per_page + 1])
+        more_after = len(rows) > per_page
+        rows = rows[:per_page]
+        more_before = after is not None
+
+    def key(obj):
+        return encode_cursor([getattr(obj, name) for name, _ in fields])
+
+    return CursorPage(
+        rows,
+        next_cursor=key(rows[-1]) if rows and more_after else None,
+        previous_cursor=key(rows[0]) if rows and more_before else None,
+        total=total,
+        count_limit=count_limit or None,
+    )
+
+
+def base_query(params):
+    """
+    The current query string without the pagination parameters, so page
+    links keep the active filters.
+    """
+    params = params.copy()
+    for name in PAGE_PARAMS:
+        params.pop(name, None)
+    return params.urlencode()
@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models import Count, Sum, F, Q, Case, When, IntegerField, DecimalField
+from django.db.models.functions import Coalesce
+
+from .models import Product, Supplier, Category, SupplierRollup, CategoryRollup
+
+
+ROLLUP_FIELDS = ["product_count", "total_qty", "total_value", "low_stock", "out_stock", "updated_at"]
+
+
+def _totals(prefix):
+    """
+    Rollup aggregates over the products reached through `prefix`
+    ("products__" from Supplier, "product__" from Category).
+    """
+    return {
+        "product_count": Count(f"{prefix}id"),
+        "total_qty": Coalesce(Sum(f"{prefix}quantity"), 0),
+        "total_value": Coalesce(
+            Sum(F(f"{prefix}quantity") * F(f"{prefix}cost_price"), output_field=DecimalField()),
+            0,
+            output_field=DecimalField(),
+        ),
+        "low_stock": Count(f"{prefix}id", filter=Q(**{f"{prefix}stock_status": "almost_done"})),
+        "out_stock": Count(f"{prefix}id", filter=Q(**{f"{prefix}stock_status": "out_of_stock"})),
+    }
+
+
+def _write(rollup_model, key, rows):
+    rollup_model.objects.bulk_create(
+        [rollup_model(**{f"{key}_id": row.pop("id")}, **row) for row in rows],
+        update_conflicts=True,
+        unique_fields=[key],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+
+def refresh_supplier_rollups(supplier_ids=None):
+    """
+    Recompute the rollups of the given suppliers (all suppliers when None).
+    """
+    qs = Supplier.objects.all()
+    if supplier_ids is not None:
+        supplier_ids = {sid for sid in supplier_ids if sid is not None}
+        if not supplier_ids:
+            return
+        qs = qs.filter(id__in=supplier_ids)
+    _write(SupplierRollup, "supplier", list(qs.values("id").annotate(**_totals("products__"))))
+
+
+def refresh_category_rollups(category_ids=None):
+    """
+    Recompute the rollups of the given categories (all categories when None).
+    """
+    qs = Category.objects.all()
+    if category_ids is not None:
+        category_ids = {cid for cid in category_ids if cid is not None}
+        if not category_ids:
+            return
+        qs = qs.filter(id__in=category_ids)
+    _write(CategoryRollup, "category", list(qs.values("id").annotate(**_totals("product__"))))
+
+
+def refresh_product_rollups(product_ids):
+    """
+    Recompute the rollups touched by the given products.
+    """
+    product_ids = list(product_ids)
+    refresh_category_rollups(
+        Product.objects.filter(id__in=product_ids).values_list("category_id", flat=True).distinct()
+    )
+    refresh_supplier_rollups(
+        Product.supplier.through.objects.filter(product_id__in=product_ids).values_list("supplier_id", flat=True).distinct()
+    )
+
+
+def rebuild_rollups():
+    with transaction.atomic():
+        refresh_category_rollups()
+        refresh_supplier_rollups()
+
+
+def supplier_totals(products_qs=None):
+    """
+    Suppliers annotated with product_count, total_qty, total_value, low_stock
+    and out_stock over `products_qs`, ordered by value.
+
+    Without a product queryset the numbers are read from the rollup table
+    instead of joining every supplier with every product.
+    """
+    if products_qs is None:
+        return (
+            Supplier.objects.filter(rollup__product_count__gt=0)
+            .annotate(
+                product_count=F("rollup__product_count"),
+                total_qty=F("rollup__total_qty"),
+                total_value=F("rollup__total_value"),
+                low_stock=F("rollup__low_stock"),
+                out_stock=F("rollup__out_stock"),
+            )
+            .order_by("-total_value", "name")
+        )
+
+    return (
+        Supplier.objects.annotate(
+            product_count=Count("products", filter=Q(products__in=products_qs), distinct=True),
+            total_qty=Sum("products__quantity", filter=Q(products__in=products_qs)),
+            total_value=Sum(
+                F("products__quantity") * F("products__cost_price"),
+                filter=Q(products__in=products_qs),
+                output_field=DecimalField()
+            ),
+            low_stock=Count(
+                Case(When(products__stock_status="almost_done", then=1), output_field=IntegerField()),
+                filter=Q(products__in=products_qs),
+            ),
+            out_stock=Count(
+                Case(When(products__stock_status="out_of_stock", then=1), output_field=IntegerField()),
+                filter=Q(products__in=products_qs),
+            ),
+        )
+        .filter(product_count__gt=0)
+        .order_by("-total_value", "name")
+    )
+
+
+def category_totals(products_qs=None):
+    """
+    Rows of {category__name, products, qty, value} per category, read from the
+    rollup table when no product queryset is given.
+    """
+    if products_qs is None:
+        return (
+            CategoryRollup.objects.filter(product_count__gt=0)
+            .annotate(products=F("product_count"), qty=F("total_qty"), value=F("total_value"))
+            .values("category__name", "products", "qty", "value")
+            .order_by("category__name")
+        )
+
+    return (
+        products_qs.values("category__name")
+          .annotate(
+              products=Count("id"),
+              qty=Sum("quantity"),
+              value=Sum(F("quantity") * F("cost_price"), output_field=DecimalField()),
+          )
+          .order_by("category__name")
+    )
@@ -0,0 +1,146 @@
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Q, Case, When, Value, IntegerField
+from django.db.models.expressions import RawSQL
+
+from .models import Product, Supplier
+
+
+# Full-text index tables on SQLite (FTS5 with the trigram tokenizer, so any
+# substring of 3+ characters is an index lookup). The rowid is the model id.
+PRODUCT_INDEX = "product_search"
+SUPPLIER_INDEX = "supplier_search"
+
+# model -> (index table, indexed columns, in ranking order)
+INDEXES = {
+    Product: (PRODUCT_INDEX, ["name", "sku", "description"]),
+    Supplier: (SUPPLIER_INDEX, ["name"]),
+}
+
+MIN_TERM_LENGTH = 3  # shortest term a trigram index can match
+SYNC_BATCH = 500
+
+
+def _match_expression(q):
+    """
+    An FTS5 MATCH string requiring every term of `q` as a substring, or None
+    when a term is too short for the trigram index.
+    """
+    terms = q.split()
+    if not terms or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        return None
+    return " ".join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def _like(fields, q):
+    """
+    Every term of `q` in at least one of `fields`, like the FTS5 match.
+    """
+    condition = Q()
+    for term in q.split():
+        in_any_field = Q()
+        for field in fields:
+            in_any_field |= Q(**{f"{field}__icontains": term})
+        condition &= in_any_field
+    return condition
+
+
+def _rank(fields, q):
+    """
+    0 for a prefix match on the first column, then prefix matches on later
+    columns, then substring matches in the same order; the rest rank last.
+    """
+    whens = [When(**{f"{field}__istartswith": q}, then=Value(i)) for i, field in enumerate(fields)]
+    whens += [When(**{f"{field}__icontains": q}, then=Value(len(fields) + i)) for i, field in enumerate(fields)]
+    return Case(*whens, default=Value(2 * len(fields)), output_field=IntegerField())
+
+
+def _search(model, qs, q, ranked):
+    table, fields = INDEXES[model]
+    match = None
+    if connections[qs.db].vendor == "sqlite":
+        match = _match_expression(q)
+    if match is not None:
+        qs = qs.filter(id__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]))
+    else:
+        # Short terms on SQLite; on PostgreSQL the pg_trgm GIN indexes serve this LIKE
+        qs = qs.filter(_like(fields, q))
+
+    if ranked:
+        qs = _ranked(model, qs, q)
+    return qs
+
+
+def _ranked(model, qs, q):
+    # Only the matching rows are ranked, so this stays cheap
+    _, fields = INDEXES[model]
+    return qs.annotate(search_rank=_rank(fields, q)).order_by("search_rank", "id")
+
+
+def search_products(qs, q, ranked=False):
+    """
+    Narrow a Product queryset to rows whose name, SKU or description contains
+    every word of `q`. With `ranked`, the best matches come first.
+    """
+    return _search(Product, qs, q, ranked)
+
+
+def rank_products(qs, q):
+    """
+    Order products already narrowed to matches of `q` best match first.
+    """
+    return _ranked(Product, qs, q)
+
+
+def search_suppliers(qs, q, ranked=False):
+    """
+    Narrow a Supplier queryset to rows whose name contains every word of `q`.
+    """
+    return _search(Supplier, qs, q, ranked)
+
+
+def _sync(model, ids, using):
+    """
+    Re-copy the given rows into the model's index; ids that no longer exist
+    simply drop out of it.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return  # pg_trgm indexes live on the table itself
+    table, fields = INDEXES[model]
+    columns = ", ".join(fields)
+    ids = [pk for pk in set(ids) if pk is not None]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for start in range(0, len(ids), SYNC_BATCH):
+            batch = ids[start:start + SYNC_BATCH]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", batch)
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {model._meta.db_table} WHERE id IN ({placeholders})",
+                batch,
+            )
+
+
+def index_products(product_ids, using=DEFAULT_DB_ALIAS):
+    _sync(Product, product_ids, using)
+
+
+def index_suppliers(supplier_ids, using=DEFAULT_DB_ALIAS):
+    _sync(Supplier, supplier_ids, using)
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Refill the SQLite search indexes from scratch.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for model, (table, fields) in INDEXES.items():
+            columns = ", ".join(fields)
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {model._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
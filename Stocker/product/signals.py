@@ -0,0 +1,170 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from .models import Product, Supplier, Category
+from .rollups import refresh_category_rollups, refresh_supplier_rollups, refresh_product_rollups
+from .filters import bump_data_version
+from .fragments import table_changed
+from .search import INDEXES, index_products, index_suppliers
+from .signatures import refresh_supplier_signatures
+
+
+# Sent after writes that bypass model signals (bulk_create, queryset.update()),
+# with `product_ids` set to the ids that changed, or None when unknown, and
+# optionally `fields`, the only columns that were written.
+products_bulk_changed = Signal()
+
+
+def _supplier_ids(product_id):
+    return list(
+        Product.supplier.through.objects.filter(product_id=product_id).values_list("supplier_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Product, dispatch_uid="rollups_product_saved")
+def product_saved(sender, instance, **kwargs):
+    # A product moved to another category changes both categories
+    refresh_category_rollups({instance.category_id, getattr(instance, "_loaded_category_id", None)})
+    refresh_supplier_rollups(_supplier_ids(instance.id))
+
+
+@receiver(pre_delete, sender=Product, dispatch_uid="rollups_product_deleting")
+def product_deleting(sender, instance, **kwargs):
+    # The supplier links are gone by post_delete, so remember them now
+    instance._rollup_supplier_ids = _supplier_ids(instance.id)
+
+
+def _deleting_categories(origin):
+    """
+    Whether the delete that sent a signal started from categories (an
+    instance or a queryset), i.e. the products go in their cascade.
+    """
+    return isinstance(origin, Category) or getattr(origin, "model", None) is Category
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="rollups_product_deleted")
+def product_deleted(sender, instance, origin=None, **kwargs):
+    # In a category's cascade its rollup goes too; refreshing it would
+    # re-insert a row pointing at the category being deleted
+    if not _deleting_categories(origin):
+        refresh_category_rollups({instance.category_id})
+    refresh_supplier_rollups(getattr(instance, "_rollup_supplier_ids", []))
+
+
+@receiver(m2m_changed, sender=Product.supplier.through, dispatch_uid="rollups_suppliers_changed")
+def product_suppliers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # pk_set is not given for clear(), so remember what is about to go
+        instance._rollup_cleared_ids = (
+            [instance.id] if reverse else _supplier_ids(instance.id)
+        )
+        return
+    if action == "post_clear":
+        supplier_ids = getattr(instance, "_rollup_cleared_ids", [])
+    elif action in ("post_add", "post_remove"):
+        supplier_ids = [instance.id] if reverse else pk_set
+    else:
+        return
+    refresh_supplier_rollups(supplier_ids)
+
+
+@receiver(post_save, sender=Supplier, dispatch_uid="rollups_supplier_saved")
+def supplier_saved(sender, instance, created, **kwargs):
+    if created:
+        refresh_supplier_rollups([instance.id])
+
+
+@receiver(products_bulk_changed, dispatch_uid="rollups_bulk_products")
+def products_bulk_changed_rollups(sender, product_ids=None, **kwargs):
+    if product_ids is not None:
+        refresh_product_rollups(product_ids)
+        return
+    # Unknown scope (e.g. a CSV import chunk): coalesce into one background rebuild
+    from jobs.runner import enqueue_once
+    transaction.on_commit(lambda: enqueue_once("rebuild_rollups"))
+
+
+@receiver(post_save, sender=Product, dispatch_uid="search_product_saved")
+@receiver(post_delete, sender=Product, dispatch_uid="search_product_deleted")
+def product_search_changed(sender, instance, **kwargs):
+    index_products([instance.id])
+
+
+@receiver(post_save, sender=Supplier, dispatch_uid="search_supplier_saved")
+@receiver(post_delete, sender=Supplier, dispatch_uid="search_supplier_deleted")
+def supplier_search_changed(sender, instance, **kwargs):
+    index_suppliers([instance.id])
+
+
+@receiver(products_bulk_changed, dispatch_uid="search_bulk_products")
+def products_bulk_changed_search(sender, product_ids=None, fields=None, **kwargs):
+    if fields is not None and not set(fields) & set(INDEXES[Product][1]):
+        return  # e.g. stock movements: nothing searchable changed
+    if product_ids is not None:
+        index_products(product_ids)
+        return
+    from jobs.runner import enqueue_once
+    transaction.on_commit(lambda: enqueue_once("rebuild_search_index"))
+
+
+def _product_ids(supplier_id):
+    return list(
+        Product.supplier.through.objects.filter(supplier_id=supplier_id).values_list("product_id", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Product.supplier.through, dispatch_uid="signature_suppliers_changed")
+def product_signature_suppliers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        instance._signature_cleared_ids = _product_ids(instance.id) if reverse else [instance.id]
+        return
+    if action == "post_clear":
+        product_ids = getattr(instance, "_signature_cleared_ids", [])
+    elif action in ("post_add", "post_remove"):
+        product_ids = pk_set if reverse else [instance.id]
+    else:
+        return
+    refresh_supplier_signatures(product_ids)
+
+
+@receiver(pre_delete, sender=Supplier, dispatch_uid="signature_supplier_deleting")
+def supplier_deleting(sender, instance, **kwargs):
+    # Deleting a supplier drops its M2M rows without sending m2m_changed
+    instance._signature_product_ids = _product_ids(instance.id)
+
+
+@receiver(post_delete, sender=Supplier, dispatch_uid="signature_supplier_deleted")
+def supplier_deleted(sender, instance, **kwargs):
+    refresh_supplier_signatures(getattr(instance, "_signature_product_ids", []))
+
+
+# Memoized filter results (product.filters) are stamped with a data version
+for model in (Product, Category, Supplier):
+    post_save.connect(bump_data_version, sender=model, dispatch_uid=f"filters_save_{model.__name__}")
+    post_delete.connect(bump_data_version, sender=model, dispatch_uid=f"filters_delete_{model.__name__}")
+
+m2m_changed.connect(bump_data_version, sender=Product.supplier.through, dispatch_uid="filters_m2m_supplier")
+products_bulk_changed.connect(bump_data_version, dispatch_uid="filters_bulk_products")
+
+
+# Cached inventory fragments listing categories or suppliers (product.fragments)
+for model in (Category, Supplier):
+    post_save.connect(table_changed, sender=model, dispatch_uid=f"fragments_save_{model.__name__}")
+    post_delete.connect(table_changed, sender=model, dispatch_uid=f"fragments_delete_{model.__name__}")
+
+
+@receiver(post_save, sender=Product, dispatch_uid="images_product_saved")
+@receiver(post_save, sender=Category, dispatch_uid="images_category_saved")
+@receiver(post_save, sender=Supplier, dispatch_uid="images_supplier_saved")
+def create_image_variants(sender, instance, **kwargs):
+    # Only for a new image, and in a background job; pages also create
+    # missing variants lazily, so a failure here only costs the first visitor.
+    name = instance.image.name or ""
+    loaded = getattr(instance, "_loaded_image", None)
+    if not name or name == str(loaded or ""):
+        return
+    instance._loaded_image = name
+    from jobs.runner import enqueue
+    params = {"model": instance._meta.label_lower, "pk": instance.pk, "name": name}
+    transaction.on_commit(lambda: enqueue("image_variants", params=params))
@@ -0,0 +1,33 @@
+import hashlib
+
+from .models import Product
+
+
+def supplier_signature(supplier_ids):
+    """
+    Canonical signature of a supplier set: a hash of the sorted, de-duplicated
+    ids, so two products share a signature exactly when they share suppliers.
+    The empty set is "".
+    """
+    ids = sorted({int(sid) for sid in supplier_ids})
+    if not ids:
+        return ""
+    return hashlib.sha1(",".join(map(str, ids)).encode()).hexdigest()
+
+
+def refresh_supplier_signatures(product_ids):
+    """
+    Recompute Product.supplier_signature for the given products from the
+    M2M table.
+    """
+    supplier_ids = {pid: [] for pid in product_ids if pid is not None}
+    if not supplier_ids:
+        return
+    links = Product.supplier.through.objects.filter(product_id__in=supplier_ids).values_list("product_id", "supplier_id")
+    for product_id, supplier_id in links:
+        supplier_ids[product_id].append(supplier_id)
+    Product.objects.bulk_update(
+        [Product(id=pid, supplier_signature=supplier_signature(ids)) for pid, ids in supplier_ids.items()],
+        ["supplier_signature"],
+        batch_size=500,
+    )
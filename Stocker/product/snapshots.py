@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import InventorySnapshot, CategoryRollup, SupplierRollup
+
+
+SNAPSHOT_FIELDS = ["product_count", "total_qty", "total_value", "low_stock", "out_stock"]
+
+# Longest span the history endpoint serves in one request
+MAX_RANGE_DAYS = 3660
+
+
+def take_snapshot(day=None):
+    """
+    Record the current totals under `day` (today by default), copied from the
+    rollup tables: one row for all products plus one per category and
+    supplier. Running it again for the same day overwrites that day's rows.
+    Returns the number of rows written.
+    """
+    day = day or timezone.localdate()
+    categories = list(CategoryRollup.objects.values("category_id", *SNAPSHOT_FIELDS))
+    suppliers = list(SupplierRollup.objects.values("supplier_id", *SNAPSHOT_FIELDS))
+
+    # Every product has exactly one category, so the category rollups add up to the total
+    total = CategoryRollup.objects.aggregate(**{name: Sum(name) for name in SNAPSHOT_FIELDS})
+    total = {name: value or 0 for name, value in total.items()}
+
+    rows = [InventorySnapshot(scope=InventorySnapshot.SCOPE_ALL, object_id=0, day=day, **total)]
+    rows += [
+        InventorySnapshot(scope=InventorySnapshot.SCOPE_CATEGORY, object_id=row.pop("category_id"), day=day, **row)
+        for row in categories
+    ]
+    rows += [
+        InventorySnapshot(scope=InventorySnapshot.SCOPE_SUPPLIER, object_id=row.pop("supplier_id"), day=day, **row)
+        for row in suppliers
+    ]
+    with transaction.atomic():
+        InventorySnapshot.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["scope", "object_id", "day"],
+            update_fields=SNAPSHOT_FIELDS,
+            batch_size=500,
+        )
+    return len(rows)
+
+
+def prune_snapshots(keep_days):
+    """
+    Delete snapshots older than `keep_days` days. Returns the number deleted.
+    """
+    cutoff = timezone.localdate() - timedelta(days=keep_days)
+    deleted, _ = InventorySnapshot.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+def snapshot_range(scope, start, end, object_ids=None):
+    """
+    Snapshot rows of `scope` from `start` to `end` (inclusive) as dicts,
+    ordered by object and day. Served by the (scope, object_id, day) index,
+    so the cost grows with the days asked for, not with the inventory.
+    """
+    qs = InventorySnapshot.objects.filter(scope=scope, day__range=(start, end))
+    if object_ids is not None:
+        qs = qs.filter(object_id__in=object_ids)
+    return list(qs.order_by("object_id", "day").values("object_id", "day", *SNAPSHOT_FIELDS))
+
+
+def last_days(days, end=None):
+    """
+    The `days` dates ending with `end` (today by default), oldest first.
+    """
+    end = end or timezone.localdate()
+    return [end - timedelta(days=i) for i in range(days - 1, -1, -1)]
@@ -0,0 +1,205 @@
+from django.db import transaction
+from django.db.models import F, Case, When, Value, CharField
+from django.db.models.lookups import LessThan, LessThanOrEqual
+from django.utils import timezone
+
+from .models import Product, StockMovement
+from .signals import products_bulk_changed
+
+
+# Product columns a stock movement writes
+STOCK_FIELDS = ["quantity", "stock_status", "updated_at"]
+
+# Most lines accepted by apply_stock_lines() in one call
+MAX_LINES = 10_000
+
+# Largest quantity or movement: the range of the integer columns they go in
+MAX_QUANTITY = 2_147_483_647
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when a movement would take a product's quantity below zero.
+    """
+
+
+def stock_status(quantity):
+    """
+    SQL expression for the stock status of a row holding `quantity` (an
+    expression): out of stock at zero or below, almost done under the
+    reorder level, in stock otherwise.
+    """
+    return Case(
+        When(LessThanOrEqual(quantity, 0), then=Value("out_of_stock")),
+        When(LessThan(quantity, F("reorder_level")), then=Value("almost_done")),
+        default=Value("in_stock"),
+        output_field=CharField(),
+    )
+
+
+def _kind_for(delta, kind):
+    if not delta:
+        raise ValueError("A stock movement needs a non-zero quantity.")
+    if abs(delta) > MAX_QUANTITY:
+        raise ValueError(f"A stock movement can't exceed {MAX_QUANTITY}.")
+    if kind is None:
+        return "in" if delta > 0 else "out"
+    if (kind == "in" and delta < 0) or (kind == "out" and delta > 0) or kind not in dict(StockMovement.KIND_CHOICES):
+        raise ValueError(f"Invalid {kind!r} movement of {delta:+d}.")
+    return kind
+
+
+def adjust_stock(product, delta, kind=None, reason="", user=None):
+    """
+    Add `delta` (negative to remove) to a product's quantity and record the
+    movement in the ledger.
+
+    The quantity and stock status change in one UPDATE computed by the
+    database, so concurrent adjustments never overwrite each other. Raises
+    InsufficientStock instead of going below zero, and ValueError instead
+    of going above MAX_QUANTITY. `product` is a Product or
+    its id; a Product instance gets its quantity and status refreshed.
+    Returns the StockMovement.
+    """
+    kind = _kind_for(delta, kind)
+    product_id = getattr(product, "pk", product)
+    new_quantity = F("quantity") + delta
+
+    with transaction.atomic():
+        rows = Product.objects.filter(pk=product_id)
+        if delta < 0:
+            rows = rows.filter(quantity__gte=-delta)
+        else:
+            rows = rows.filter(quantity__lte=MAX_QUANTITY - delta)
+        updated = rows.update(quantity=new_quantity, stock_status=stock_status(new_quantity), updated_at=timezone.now())
+        if not updated:
+            if not Product.objects.filter(pk=product_id).exists():
+                raise Product.DoesNotExist(f"No product with id {product_id}.")
+            if delta < 0:
+                raise InsufficientStock(f"Not enough stock to remove {-delta} of product {product_id}.")
+            raise ValueError(f"Adding {delta} would take product {product_id} above {MAX_QUANTITY}.")
+
+        # Our UPDATE holds the row's write lock until commit, so this reads our own result
+        quantity, status = Product.objects.filter(pk=product_id).values_list("quantity", "stock_status").get()
+        movement = StockMovement.objects.create(
+            product_id=product_id, kind=kind, delta=delta, quantity_after=quantity, reason=reason, user=user,
+        )
+        products_bulk_changed.send(sender=Product, product_ids=[product_id], fields=STOCK_FIELDS)
+
+    if isinstance(product, Product):
+        product.quantity, product.stock_status = quantity, status
+    return movement
+
+
+def refresh_stock_status(product_ids):
+    """
+    Recompute the stock status of the given products in SQL, e.g. after
+    their reorder level changed.
+    """
+    product_ids = list(product_ids)
+    Product.objects.filter(id__in=product_ids).update(stock_status=stock_status(F("quantity")), updated_at=timezone.now())
+    products_bulk_changed.send(sender=Product, product_ids=product_ids, fields=["stock_status", "updated_at"])
+
+
+def _parse_line(line):
+    """
+    (sku, delta, absolute) from one batch line, or raise ValueError.
+    """
+    if not isinstance(line, dict):
+        raise ValueError("Each line must be an object.")
+    sku = line.get("sku")
+    if not isinstance(sku, str) or not sku.strip():
+        raise ValueError("Missing sku.")
+    delta, absolute = line.get("delta"), line.get("absolute_quantity")
+    if (delta is None) == (absolute is None):
+        raise ValueError("Give exactly one of delta or absolute_quantity.")
+    value = delta if absolute is None else absolute
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("Quantities must be whole numbers.")
+    if abs(value) > MAX_QUANTITY:
+        raise ValueError(f"Quantities must be between -{MAX_QUANTITY} and {MAX_QUANTITY}.")
+    if delta is not None and delta == 0:
+        raise ValueError("delta must not be 0.")
+    if absolute is not None and absolute < 0:
+        raise ValueError("absolute_quantity must not be negative.")
+    return sku.strip(), delta, absolute
+
+
+def apply_stock_lines(lines, reason="", user=None):
+    """
+    Apply a batch of `{"sku", "delta" | "absolute_quantity"}` lines and
+    return one result per line, in order: `{"sku", "ok": True, "quantity",
+    "stock_status"}` with the product's values after the batch, or
+    `{"sku", "ok": False, "error"}`.
+
+    Lines for the same product apply in order. A bad line (unknown SKU,
+    invalid or out of range value, not enough stock) is rejected on its own; the rest are
+    applied in one transaction with a fixed number of queries, whatever
+    the batch size.
+    """
+    if len(lines) > MAX_LINES:
+        raise ValueError(f"At most {MAX_LINES} lines per batch.")
+
+    results, parsed = [], []
+    for line in lines:
+        try:
+            sku, delta, absolute = _parse_line(line)
+        except ValueError as e:
+            results.append({"sku": line.get("sku") if isinstance(line, dict) else None, "ok": False, "error": str(e)})
+            parsed.append(None)
+            continue
+        results.append({"sku": sku, "ok": True})
+        parsed.append((sku, delta, absolute))
+
+    skus = {p[0] for p in parsed if p}
+    with transaction.atomic():
+        # Lock the rows (in id order, so two batches can't deadlock) before
+        # reading the quantities; on SQLite the IMMEDIATE transaction already
+        # holds the database write lock
+        rows = Product.objects.select_for_update().filter(sku__in=skus).order_by("id").values_list("sku", "id", "quantity")
+        ids, quantities = {}, {}
+        for sku, product_id, quantity in rows:
+            ids[sku], quantities[product_id] = product_id, quantity
+
+        movements, changed = [], set()
+        for result, line in zip(results, parsed):
+            if line is None:
+                continue
+            sku, delta, absolute = line
+            product_id = ids.get(sku)
+            if product_id is None:
+                result.update(ok=False, error="Unknown sku.")
+                continue
+            before = quantities[product_id]
+            after = absolute if absolute is not None else before + delta
+            if after < 0:
+                result.update(ok=False, error=f"Not enough stock: {before} left.")
+                continue
+            if after > MAX_QUANTITY:
+                result.update(ok=False, error=f"Quantity would exceed {MAX_QUANTITY}.")
+                continue
+            quantities[product_id] = after
+            result["product_id"] = product_id
+            if after != before:
+                changed.add(product_id)
+                movements.append(StockMovement(
+                    product_id=product_id,
+                    kind="adjust" if absolute is not None else ("in" if delta > 0 else "out"),
+                    delta=after - before, quantity_after=after, reason=reason, user=user,
+                ))
+
+        if changed:
+            Product.objects.bulk_update(
+                [Product(id=pk, quantity=quantities[pk]) for pk in changed], ["quantity"], batch_size=500,
+            )
+            Product.objects.filter(id__in=changed).update(stock_status=stock_status(F("quantity")), updated_at=timezone.now())
+            StockMovement.objects.bulk_create(movements, batch_size=1000)
+            products_bulk_changed.send(sender=Product, product_ids=list(changed), fields=STOCK_FIELDS)
+
+        statuses = dict(Product.objects.filter(id__in=ids.values()).values_list("id", "stock_status"))
+
+    for result in results:
+        product_id = result.pop("product_id", None)
+        if product_id is not None:
+            result.update(quantity=quantities[product_id], stock_status=statuses[product_id])
+    return results
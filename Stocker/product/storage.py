@@ -0,0 +1,28 @@
+import random
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class SlowFileSystemStorage(FileSystemStorage):
+    """
+    FileSystemStorage that waits `latency` seconds before every write and
+    fails a `failure_rate` share of them, standing in for a remote media
+    store when developing or testing the background uploader:
+
+        MEDIA_STORAGE_BACKEND=product.storage.SlowFileSystemStorage
+        MEDIA_STORAGE_OPTIONS='{"latency": 3, "failure_rate": 0.3}'
+    """
+
+    def __init__(self, latency=2.0, failure_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def _save(self, name, content):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise OSError(f"Simulated media storage failure while saving {name}")
+        return super()._save(name, content)
@@ -1,3 +1,751 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.db.models import Count, Q
+from django.http import QueryDict
+from django.template import Context, Template
+from django.db import connection, connections
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from django.urls import include, path, reverse
+
+from .filters import filter_products, apply_filters
+from .images import image_variants
+from .csv_export import iter_products
+from .importer import import_products
+from .rollups import refresh_category_rollups, refresh_supplier_rollups
+from .models import Product, Category, Supplier, StockMovement, CategoryRollup, SupplierRollup
+from .search import search_products
+from .signatures import supplier_signature
+from .stock import adjust_stock, apply_stock_lines, MAX_QUANTITY
+from . import views
+
+
+CSV_HEADER = "Name,SKU,Category,Suppliers,Cost Price,Quantity,Reorder Level,Stock Status,Description\n"
+
+
+# ASYNC_VIEWS picks one of the supplier report views when the URLs load;
+# the async tests mount the other one next to the project's URLs.
+urlpatterns = [
+    path("async/suppliers/", views.async_supplier_report_view, name="async_supplier_report"),
+    path("", include("Stocker.urls")),
+]
+
+
+def csv_file(rows):
+    return io.StringIO(CSV_HEADER + "".join(row + "\n" for row in rows))
+
+
+def image_file(name, fmt, width=800):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, width // 2), (200, 80, 40)).save(buf, fmt)
+    return ContentFile(buf.getvalue(), name=name)
+
+
+class ImportProductsTests(TestCase):
+
+    def test_imports_rows_and_reports_skipped_ones(self):
+        data = csv_file([
+            "Apple,APL-1,Fruit,\"Acme, Globex\",1.50,10,2,in_stock,",
+            "No category,NOC-1,,Acme,1.00,1,0,in_stock,",
+            "Pear,PER-1,Fruit,Acme,abc,5,1,in_stock,",
+            "No sku,,Fruit,,1.00,1,0,in_stock,",
+        ])
+
+        imported, skipped, skips = import_products(data)
+
+        self.assertEqual((imported, skipped), (1, 3))
+        self.assertEqual(skips, [
+            "row 3: missing Category",
+            "row 4: invalid Quantity, Reorder Level or Cost Price",
+            "row 5: missing SKU",
+        ])
+        product = Product.objects.get(sku="APL-1")
+        self.assertEqual(product.category.name, "Fruit")
+        self.assertEqual(sorted(product.supplier.values_list("name", flat=True)), ["Acme", "Globex"])
+
+    def test_reimport_updates_existing_sku(self):
+        import_products(csv_file(["Apple,APL-1,Fruit,Acme,1.50,10,2,in_stock,"]))
+        import_products(csv_file(["Green apple,APL-1,Fruit,Globex,1.75,4,2,in_stock,"]))
+
+        product = Product.objects.get(sku="APL-1")
+        self.assertEqual((product.name, product.quantity), ("Green apple", 4))
+        self.assertEqual(list(product.supplier.values_list("name", flat=True)), ["Globex"])
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_fixed_queries_per_chunk(self):
+        # Categories and suppliers exist already, so every chunk does the same work
+        Category.objects.create(name="Fruit")
+        Supplier.objects.create(name="Acme")
+
+        def rows(n, prefix):
+            return csv_file([f"Item {i},{prefix}-{i},Fruit,Acme,1.00,{i},0,in_stock," for i in range(n)])
+
+        with self.assertNumQueries(10):
+            import_products(rows(50, "A"), chunk_size=50)
+        with self.assertNumQueries(40):
+            import_products(rows(200, "B"), chunk_size=50)
+
+
+class AddProductTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("clerk"))
+        self.fruit = Category.objects.create(name="Fruit")
+        self.acme = Supplier.objects.create(name="Acme")
+
+    def post(self, **fields):
+        data = {
+            "name": "Apple", "sku": "APL-1", "category": self.fruit.id, "quantity": 10, "reorder_level": 2,
+            "cost_price": "1.50", "expiry_date": "", "stock_status": "in_stock", "description": "",
+            "supplier": [self.acme.id], **fields,
+        }
+        return self.client.post(reverse("product:add_product_view"), data, follow=True)
+
+    def test_adds_the_product(self):
+        self.assertContains(self.post(), "Product added successfully.")
+        self.assertEqual(list(Product.objects.get(sku="APL-1").supplier.all()), [self.acme])
+
+    def test_duplicate_sku(self):
+        self.post()
+        self.assertContains(self.post(name="Other"), "SKU must be uniqe!")
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_invalid_values_are_logged_and_nothing_is_kept(self):
+        with self.assertLogs("product.views", "ERROR"):
+            response = self.post(category=999)
+
+        self.assertContains(response, "The product could not be saved")
+        self.assertFalse(Product.objects.exists())
+
+
+class RollupUpkeepTests(TestCase):
+    """
+    The rollups kept by the signal receivers match a recount from scratch.
+    """
+
+    def setUp(self):
+        self.fruit = Category.objects.create(name="Fruit")
+        self.tools = Category.objects.create(name="Tools")
+        self.acme = Supplier.objects.create(name="Acme")
+        self.globex = Supplier.objects.create(name="Globex")
+        self.apple = Product.objects.create(name="Apple", sku="APL-1", category=self.fruit, cost_price="1.50", quantity=10)
+        self.apple.supplier.set([self.acme])
+
+    FIELDS = ["product_count", "total_qty", "total_value", "low_stock", "out_stock"]
+
+    def rollups(self):
+        # A category or supplier without products may have no rollup yet;
+        # the readers treat both the same
+        return (
+            {r.pop("category_id"): r for r in CategoryRollup.objects.filter(product_count__gt=0).values("category_id", *self.FIELDS)},
+            {r.pop("supplier_id"): r for r in SupplierRollup.objects.filter(product_count__gt=0).values("supplier_id", *self.FIELDS)},
+        )
+
+    def assertInSync(self):
+        # SQLite defers foreign key checks to the commit, which TestCase never reaches
+        connection.check_constraints()
+        kept = self.rollups()
+        CategoryRollup.objects.all().delete()
+        SupplierRollup.objects.all().delete()
+        refresh_category_rollups()
+        refresh_supplier_rollups()
+        self.assertEqual(kept, self.rollups())
+
+    def test_create(self):
+        Product.objects.create(name="Pear", sku="PER-1", category=self.fruit, cost_price="2.00", quantity=0)
+        self.assertInSync()
+
+    def test_edit_quantity(self):
+        self.apple.quantity = 1
+        self.apple.reorder_level = 5
+        self.apple.stock_status = "almost_done"
+        self.apple.save()
+        self.assertInSync()
+
+    def test_move_category(self):
+        apple = Product.objects.get(id=self.apple.id)
+        apple.category = self.tools
+        apple.save()
+        self.assertInSync()
+        self.assertEqual(CategoryRollup.objects.get(category=self.fruit).product_count, 0)
+
+    def test_supplier_add_remove_and_clear(self):
+        self.apple.supplier.add(self.globex)
+        self.assertInSync()
+        self.apple.supplier.remove(self.acme)
+        self.assertInSync()
+        self.globex.products.clear()
+        self.assertInSync()
+
+    def test_delete_product(self):
+        self.apple.delete()
+        self.assertInSync()
+
+    def test_delete_category_with_products(self):
+        self.fruit.delete()
+
+        self.assertFalse(Product.objects.exists())
+        self.assertInSync()
+
+    def test_delete_categories_through_a_queryset(self):
+        Category.objects.filter(id=self.fruit.id).delete()
+        self.assertInSync()
+
+    def test_delete_category_view(self):
+        self.client.force_login(get_user_model().objects.create_superuser("admin", password=None))
+        response = self.client.post(reverse("product:delete_category_view", args=[self.fruit.id]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Category.objects.filter(id=self.fruit.id).exists())
+
+
+class LowStockTests(TestCase):
+
+    def setUp(self):
+        fruit = Category.objects.create(name="Fruit")
+        for sku, quantity in (("APL-1", 10), ("PER-1", 3), ("FIG-1", 0)):
+            Product.objects.create(name=sku, sku=sku, category=fruit, cost_price="1.00", quantity=quantity, reorder_level=5)
+
+    def low_stock(self):
+        # The dashboard's low-stock list, served by product_low_stock_idx
+        return list(Product.objects.filter(is_low_stock=True).order_by("quantity").values_list("sku", flat=True))
+
+    def test_follows_queryset_updates(self):
+        self.assertEqual(self.low_stock(), ["FIG-1", "PER-1"])
+
+        Product.objects.filter(sku="APL-1").update(quantity=1)
+        Product.objects.filter(sku="FIG-1").update(quantity=50)
+
+        self.assertEqual(self.low_stock(), ["APL-1", "PER-1"])
+
+    def test_follows_reorder_level_changes(self):
+        Product.objects.update(reorder_level=0)
+        self.assertEqual(self.low_stock(), ["FIG-1"])
+
+        product = Product.objects.get(sku="APL-1")
+        product.reorder_level = 10
+        product.save()
+        self.assertTrue(product.is_low_stock)
+        self.assertEqual(self.low_stock(), ["FIG-1", "APL-1"])
+
+    def test_low_stock_list_uses_the_partial_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Checks SQLite's query plan")
+        sql, params = Product.objects.filter(is_low_stock=True).order_by("quantity").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("product_low_stock_idx", plan)
+
+
+class SupplierSignatureTests(TestCase):
+    """
+    Stored supplier signatures stay equal to freshly computed ones, and the
+    "exactly these suppliers" filter built on them matches the GROUP BY
+    over the join it replaced.
+    """
+
+    def setUp(self):
+        fruit = Category.objects.create(name="Fruit")
+        self.acme, self.globex, self.initech = (Supplier.objects.create(name=n) for n in ("Acme", "Globex", "Initech"))
+        self.apple, self.pear, self.fig = (
+            Product.objects.create(name=sku, sku=sku, category=fruit, cost_price="1.00") for sku in ("APL-1", "PER-1", "FIG-1")
+        )
+        self.apple.supplier.set([self.acme, self.globex])
+        self.pear.supplier.set([self.acme])
+
+    def baseline_exact(self, supplier_ids):
+        return set(
+            Product.objects.annotate(
+                total=Count("supplier", distinct=True),
+                matched=Count("supplier", filter=Q(supplier__in=supplier_ids), distinct=True),
+            ).filter(total=len(supplier_ids), matched=len(supplier_ids)).values_list("id", flat=True)
+        )
+
+    def assertSignaturesCurrent(self):
+        links = {}
+        for product_id, supplier_id in Product.supplier.through.objects.values_list("product_id", "supplier_id"):
+            links.setdefault(product_id, set()).add(supplier_id)
+        for product_id, stored in Product.objects.values_list("id", "supplier_signature"):
+            self.assertEqual(stored, supplier_signature(links.get(product_id, [])), product_id)
+
+        supplier_sets = {frozenset(ids) for ids in links.values()} | {frozenset([s.id]) for s in Supplier.objects.all()}
+        for ids in supplier_sets:
+            params = QueryDict(mutable=True)
+            params.setlist("supplier", [str(i) for i in ids])
+            self.assertEqual(set(apply_filters(Product.objects.all(), params).values_list("id", flat=True)), self.baseline_exact(ids))
+
+    def test_forward_add_remove_and_clear(self):
+        self.fig.supplier.add(self.initech, self.acme)
+        self.assertSignaturesCurrent()
+        self.apple.supplier.remove(self.globex)
+        self.assertSignaturesCurrent()
+        self.apple.supplier.clear()
+        self.assertSignaturesCurrent()
+
+    def test_reverse_add_remove_and_clear(self):
+        self.initech.products.add(self.apple, self.fig)
+        self.assertSignaturesCurrent()
+        self.acme.products.remove(self.pear)
+        self.assertSignaturesCurrent()
+        self.acme.products.clear()
+        self.assertSignaturesCurrent()
+
+    def test_supplier_delete(self):
+        self.globex.delete()
+        self.assertSignaturesCurrent()
+        self.assertEqual(Product.objects.get(id=self.apple.id).supplier_signature, supplier_signature([self.acme.id]))
+
+    def test_import(self):
+        import_products(csv_file([
+            "APL-1,APL-1,Fruit,Initech,1.00,1,0,in_stock,",
+            "KIWI-1,KIWI-1,Fruit,\"Acme, Globex\",1.00,1,0,in_stock,",
+        ]))
+        self.assertSignaturesCurrent()
+        self.assertEqual(
+            set(Product.objects.filter(supplier_signature=supplier_signature([self.acme.id, self.globex.id])).values_list("sku", flat=True)),
+            {"KIWI-1"},
+        )
+
+
+class StreamingExportTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("clerk"))
+        fruit = Category.objects.create(name="Fruit")
+        tools = Category.objects.create(name="Tools")
+        Product.objects.create(name="Apple", sku="APL-1", category=fruit, cost_price="1.50", quantity=10)
+        Product.objects.create(name="Hammer", sku="HAM-1", category=tools, cost_price="9.00", quantity=3)
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8-sig")
+
+    def test_product_export(self):
+        content = self.download(reverse("product:stream_products_csv"))
+
+        self.assertIn("Apple,APL-1,Fruit", content)
+        self.assertIn("Hammer,HAM-1,Tools", content)
+
+    def test_inventory_report_respects_filters(self):
+        category = Category.objects.get(name="Tools")
+        content = self.download(reverse("product:stream_inventory_report_csv") + f"?category={category.id}")
+
+        self.assertIn("Hammer,HAM-1,Tools", content)
+        self.assertNotIn("APL-1", content)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        fruit = Category.objects.create(name="Fruit")
+        for name, sku in (("Green apple", "APL-1"), ("Red apple", "APL-2"), ("Pear", "PER-1")):
+            Product.objects.create(name=name, sku=sku, category=fruit, cost_price="1.00")
+
+    def skus(self, q, ranked=False):
+        return list(search_products(Product.objects.order_by("id"), q, ranked=ranked).values_list("sku", flat=True))
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.skus("apple"), ["APL-1", "APL-2"])
+        self.assertEqual(self.skus("red apple"), ["APL-2"])
+        self.assertEqual(self.skus("apl-2 green"), [])
+
+    def test_short_terms_fall_back_to_like(self):
+        # Too short for the trigram index on SQLite
+        self.assertEqual(self.skus("pe"), ["PER-1"])
+        self.assertEqual(self.skus("ap ed"), ["APL-2"])
+
+    def test_ranked_puts_prefix_matches_first(self):
+        self.assertEqual(self.skus("red", ranked=True), ["APL-2"])
+        self.assertEqual(self.skus("apl", ranked=True), ["APL-1", "APL-2"])
+        self.assertEqual(self.skus("re", ranked=True), ["APL-2", "APL-1"])
+
+
+class IterProductsTests(TestCase):
+
+    def test_reads_every_product_in_id_order_with_suppliers(self):
+        fruit = Category.objects.create(name="Fruit")
+        acme = Supplier.objects.create(name="Acme")
+        for i in range(7):
+            Product.objects.create(name=f"Item {i}", sku=f"SKU-{i}", category=fruit, cost_price="1.00").supplier.add(acme)
+
+        products = list(iter_products(Product.objects.all(), chunk_size=3))
+
+        self.assertEqual([p.sku for p in products], [f"SKU-{i}" for i in range(7)])
+        # Categories and suppliers came with the chunks
+        with self.assertNumQueries(0):
+            self.assertEqual({(p.category.name, *[s.name for s in p.supplier.all()]) for p in products}, {("Fruit", "Acme")})
+
+
+class InventoryPageQueryTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser("admin", password=None))
+        fruit = Category.objects.create(name="Fruit")
+        for i in range(15):
+            Product.objects.create(name=f"Item {i}", sku=f"SKU-{i}", category=fruit, cost_price="1.00")
+
+    def render_cold(self):
+        # Every fragment is rendered, so every supplier is listed in every edit form
+        for cache in caches.all():
+            cache.clear()
+        response = self.client.get(reverse("product:inventory_view"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_does_not_depend_on_suppliers(self):
+        # Session, user, count, page, supplier links, table versions,
+        # categories, suppliers
+        Supplier.objects.create(name="Acme")
+        with self.assertNumQueries(8):
+            self.render_cold()
+
+        suppliers = Supplier.objects.bulk_create(Supplier(name=f"Supplier {i}") for i in range(40))
+        for product in Product.objects.all():
+            product.supplier.set(suppliers[:5])
+        with self.assertNumQueries(8):
+            self.render_cold()
+
+
+class InventoryFragmentTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_login(get_user_model().objects.create_superuser("admin", password=None))
+        fruit = Category.objects.create(name="Fruit")
+        Product.objects.create(name="Apple", sku="APL-1", category=fruit, cost_price="1.00")
+        Supplier.objects.create(name="Acme")
+
+    def render(self):
+        return self.client.get(reverse("product:inventory_view"))
+
+    def test_warm_render_skips_the_category_and_supplier_queries(self):
+        self.render()
+        # Session, user, count, page, supplier links, table versions
+        with self.assertNumQueries(6):
+            self.render()
+
+    def test_supplier_committed_elsewhere_reaches_the_cached_lists(self):
+        self.assertNotContains(self.render(), "Globex")
+
+        # Table versions live in the database, so this works for a supplier
+        # added by another process as well
+        with self.captureOnCommitCallbacks(execute=True):
+            Supplier.objects.create(name="Globex")
+
+        self.assertContains(self.render(), "Globex")
+
+
+class InventoryFormRedirectTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_login(get_user_model().objects.create_superuser("admin", password=None))
+        self.fruit = Category.objects.create(name="Fruit")
+        for i in range(15):
+            Product.objects.create(name=f"Item {i}", sku=f"SKU-{i}", category=self.fruit, cost_price="1.00")
+
+    def second_page_query(self):
+        page = self.client.get(reverse("product:inventory_view") + f"?category={self.fruit.id}")
+        return f"category={self.fruit.id}&after={page.context['page_obj'].next_cursor}"
+
+    def test_forms_post_back_with_filters_and_cursor(self):
+        query = self.second_page_query()
+        response = self.client.get(reverse("product:inventory_view") + "?" + query)
+
+        product = response.context["page_obj"].object_list[0]
+        action = reverse("product:edit_product_view", args=[product.id]) + "?" + query
+        self.assertContains(response, f'action="{action.replace("&", "&amp;")}"')
+
+    def test_edit_returns_to_the_same_page(self):
+        query = self.second_page_query()
+        product = Product.objects.get(sku="SKU-12")
+        response = self.client.post(reverse("product:edit_product_view", args=[product.id]) + "?" + query, {
+            "sku": product.sku, "name": "Renamed", "reorder_level": 0, "cost_price": "1.00",
+            "quantity": 0, "original_quantity": 0, "category": self.fruit.id, "description": "",
+        })
+
+        self.assertRedirects(response, reverse("product:inventory_view") + "?" + query)
+
+    def test_delete_returns_to_the_same_page(self):
+        query = self.second_page_query()
+        product = Product.objects.get(sku="SKU-12")
+        response = self.client.post(reverse("product:delete_product_view", args=[product.id]) + "?" + query)
+
+        self.assertRedirects(response, reverse("product:inventory_view") + "?" + query)
+        self.assertFalse(Product.objects.filter(id=product.id).exists())
+
+
+class FilterMemoTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.fruit = Category.objects.create(name="Fruit")
+        self.params = QueryDict(f"category={self.fruit.id}")
+
+    def matching_skus(self):
+        return sorted(filter_products(Product.objects.all(), self.params).values_list("sku", flat=True))
+
+    def test_memoized_ids_are_reused(self):
+        Product.objects.create(name="Apple", sku="APL-1", category=self.fruit, cost_price="1.00")
+        self.matching_skus()
+        # The shared version, then the page query on the memoized ids
+        with self.assertNumQueries(2):
+            self.matching_skus()
+
+    def test_change_committed_elsewhere_invalidates_memoized_ids(self):
+        self.assertEqual(self.matching_skus(), [])
+
+        # Bumps go through the database, so one made by the job runner counts too
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Apple", sku="APL-1", category=self.fruit, cost_price="1.00")
+
+        self.assertEqual(self.matching_skus(), ["APL-1"])
+
+
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def category(self, name, image):
+        category = Category.objects.create(name=name)
+        category.image.save(image.name, image)
+        return category
+
+    def test_same_stem_different_extension_do_not_share_variants(self):
+        jpeg = self.category("Fruit", image_file("photo.jpg", "JPEG"))
+        png = self.category("Tools", image_file("photo.png", "PNG"))
+
+        jpeg_variants, png_variants = image_variants(jpeg.image), image_variants(png.image)
+
+        self.assertTrue(set(jpeg_variants["webp"].values()).isdisjoint(png_variants["webp"].values()))
+        self.assertTrue(set(jpeg_variants["jpeg"].values()).isdisjoint(png_variants["jpeg"].values()))
+
+    def test_tag_offers_webp_with_a_jpeg_fallback(self):
+        category = self.category("Fruit", image_file("photo.png", "PNG"))
+
+        html = Template("{% load images %}{% responsive_img image alt='Fruit' %}").render(Context({"image": category.image}))
+
+        self.assertTrue(html.startswith('<picture><source type="image/webp" srcset="'))
+        self.assertIn("photo.png.640w.webp 640w", html)
+        self.assertIn('src="/media/images/photo.png.320w.jpg" srcset="', html)
+        self.assertIn("photo.png.640w.jpg 640w", html)
+
+
+class InventoryHistoryJsonTests(TestCase):
+
+    @override_settings(TIME_ZONE="Pacific/Kiritimati")
+    def test_default_end_is_the_local_date(self):
+        self.client.force_login(get_user_model().objects.create_user("clerk"))
+        # 20:00 UTC on the 18th is already the 19th at UTC+14
+        now = datetime(2026, 10, 18, 20, 0, tzinfo=dt_timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            response = self.client.get(reverse("product:inventory_history_json"))
+
+        self.assertEqual(response.json()["end"], date(2026, 10, 19).isoformat())
+
+
+class StockLinesTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Fruit")
+        for sku in ("APL-1", "PER-1", "FIG-1"):
+            Product.objects.create(name=sku, sku=sku, category=category, cost_price="1.00", quantity=5)
+        self.stamp = timezone.now() - timezone.timedelta(days=1)
+        Product.objects.update(updated_at=self.stamp)
+
+    def test_only_changed_products_are_touched(self):
+        results = apply_stock_lines([
+            {"sku": "APL-1", "delta": -2},
+            {"sku": "PER-1", "delta": -9},
+            {"sku": "FIG-1", "absolute_quantity": 5},
+            {"sku": "NOPE", "delta": 1},
+        ])
+
+        self.assertEqual([r["ok"] for r in results], [True, False, True, False])
+        stamps = dict(Product.objects.values_list("sku", "updated_at"))
+        self.assertGreater(stamps["APL-1"], self.stamp)
+        self.assertEqual((stamps["PER-1"], stamps["FIG-1"]), (self.stamp, self.stamp))
+        self.assertEqual(Product.objects.get(sku="APL-1").quantity, 3)
+
+    def test_fixed_number_of_queries(self):
+        lines = [{"sku": sku, "delta": 1} for sku in ("APL-1", "PER-1", "FIG-1")] * 20
+        # Savepoint, locked read, quantities, statuses, ledger, the category
+        # and supplier rollups (4), statuses read, release
+        with self.assertNumQueries(11):
+            apply_stock_lines(lines)
+
+    def test_out_of_range_values_are_rejected(self):
+        results = apply_stock_lines([
+            {"sku": "APL-1", "delta": 10**20},
+            {"sku": "APL-1", "absolute_quantity": MAX_QUANTITY + 1},
+            {"sku": "PER-1", "absolute_quantity": MAX_QUANTITY},
+            {"sku": "PER-1", "delta": 1},
+            {"sku": "FIG-1", "delta": -(10**20)},
+        ])
+
+        self.assertEqual([r["ok"] for r in results], [False, False, True, False, False])
+        self.assertEqual(dict(Product.objects.values_list("sku", "quantity")), {"APL-1": 5, "PER-1": MAX_QUANTITY, "FIG-1": 5})
+        with self.assertRaises(ValueError):
+            adjust_stock(Product.objects.get(sku="PER-1"), 1)
+        with self.assertRaises(ValueError):
+            adjust_stock(Product.objects.get(sku="APL-1"), 10**20)
+
+
+class StockAdjustApiTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Fruit")
+        for sku in ("APL-1", "PER-1"):
+            Product.objects.create(name=sku, sku=sku, category=category, cost_price="1.00", quantity=5)
+        self.client.force_login(get_user_model().objects.create_user("scanner"))
+
+    def post(self, body):
+        return self.client.post(reverse("product:stock_adjust_api"), body, content_type="application/json")
+
+    def test_valid_batch(self):
+        response = self.post(json.dumps({"reason": "Count", "lines": [
+            {"sku": "APL-1", "delta": -2},
+            {"sku": "PER-1", "absolute_quantity": 40},
+        ]}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["applied"], 2)
+        self.assertEqual(dict(Product.objects.values_list("sku", "quantity")), {"APL-1": 3, "PER-1": 40})
+        self.assertEqual(set(StockMovement.objects.values_list("reason", flat=True)), {"Count"})
+
+    def test_out_of_range_value_is_a_line_error(self):
+        response = self.post(json.dumps({"lines": [
+            {"sku": "APL-1", "delta": 10**20},
+            {"sku": "PER-1", "delta": 1},
+        ]}))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["applied"], body["rejected"]), (1, 1))
+        self.assertFalse(body["results"][0]["ok"])
+        self.assertEqual(Product.objects.get(sku="APL-1").quantity, 5)
+
+    def test_malformed_json(self):
+        response = self.post('{"lines": [')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Body must be JSON."})
+
+    def test_requires_login_and_csrf_token(self):
+        self.client.logout()
+        self.assertEqual(self.post(json.dumps({"lines": []})).status_code, 401)
+
+        self.client.force_login(get_user_model().objects.get(username="scanner"))
+        self.client.handler.enforce_csrf_checks = True
+        self.assertEqual(self.post(json.dumps({"lines": []})).status_code, 403)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncSupplierReportTests(TransactionTestCase):
+    """
+    The async supplier report runs its queries in worker threads, each on
+    its own connection, so the data must be committed.
+    """
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.fruit, tools = Category.objects.create(name="Fruit"), Category.objects.create(name="Tools")
+        acme, globex = Supplier.objects.create(name="Acme"), Supplier.objects.create(name="Globex")
+        for i, (category, suppliers) in enumerate([(self.fruit, [acme]), (self.fruit, [acme, globex]), (tools, [globex])]):
+            product = Product.objects.create(
+                name=f"Item {i}", sku=f"SKU-{i}", category=category, cost_price=f"{i + 1}.50", quantity=i * 3, reorder_level=2,
+            )
+            product.supplier.set(suppliers)
+        self.user = get_user_model().objects.create_user("clerk")
+        self.async_client = AsyncClient()
+
+    def context(self, response):
+        return {key: response.context[key] for key in (
+            "labels_json", "values_value_json", "values_qty_json", "percents_value_json", "percents_qty_json",
+            "total_value_sum", "total_qty_sum", "suppliers_table", "history_labels_json", "history_series_json",
+            "querystring",
+        )}
+
+    def assertSameAsSync(self, query):
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+        expected = self.client.get(reverse("product:supplier_report_view") + query)
+        response = async_to_sync(self.async_client.get)(reverse("async_supplier_report") + query)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.context(response), self.context(expected))
+
+    def test_unfiltered(self):
+        self.assertSameAsSync("")
+
+    def test_filtered(self):
+        self.assertSameAsSync(f"?category={self.fruit.id}")
+
+    def test_login_required(self):
+        response = async_to_sync(self.async_client.get)(reverse("async_supplier_report"))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("?next=/async/suppliers/", response.url)
+
+
+class ConcurrentStockTests(TransactionTestCase):
+    """
+    adjust_stock() from several threads at once, each on its own connection.
+    """
+
+    THREADS = 4
+    PER_THREAD = 25
+
+    def test_no_lost_updates(self):
+        category = Category.objects.create(name="Stress")
+        product = Product.objects.create(name="Widget", sku="W-1", category=category, cost_price="1.00", quantity=1000)
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.PER_THREAD):
+                    adjust_stock(product.id, -1, reason="concurrent")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 1000 - self.THREADS * self.PER_THREAD)
+        self.assertEqual(StockMovement.objects.filter(product=product).count(), self.THREADS * self.PER_THREAD)
+        self.assertEqual(
+            list(StockMovement.objects.filter(product=product).order_by("quantity_after").values_list("quantity_after", flat=True)),
+            list(range(1000 - self.THREADS * self.PER_THREAD, 1000)),
+        )
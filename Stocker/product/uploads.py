@@ -0,0 +1,22 @@
+from django.utils import timezone
+
+from jobs.runner import enqueue
+
+
+def stage_image(instance, uploaded_file, user=None):
+    """
+    Make `uploaded_file` the instance's image without waiting for the media
+    storage: the file is written to local disk with an upload_image job and
+    the instance is flagged image_pending until the job has pushed it.
+    The current image (if any) stays in place meanwhile.
+    """
+    # Flag first, so a fast worker can't finish before the flag is set
+    # updated_at too: cached inventory cards are keyed on it
+    type(instance).objects.filter(pk=instance.pk).update(image_pending=True, updated_at=timezone.now())
+    instance.image_pending = True
+    return enqueue(
+        "upload_image",
+        user=user,
+        params={"model": instance._meta.label_lower, "pk": instance.pk, "filename": uploaded_file.name},
+        input_file=uploaded_file,
+    )
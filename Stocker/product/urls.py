@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -19,10 +20,18 @@ urlpatterns = [
     path('suppliers/<int:supplier_id>/edit/', views.edit_supplier_view, name='edit_supplier_view'),
     path('suppliers/<int:supplier_id>/details/', views.supplier_details_view, name='supplier_details_view'),
     path("export/csv/", views.export_products_csv, name="export_products_csv"),
+    path("export/products.csv", views.stream_products_csv, name="stream_products_csv"),
     path("import/csv/", views.import_products_csv, name="import_products_csv"),
     path("reports/inventory.csv", views.inventory_report_csv, name="inventory_report_csv"),
-    path("reports/suppliers/", views.supplier_report_view, name="supplier_report_view"),
+    path("reports/inventory/stream.csv", views.stream_inventory_report_csv, name="stream_inventory_report_csv"),
+    path(
+        "reports/suppliers/",
+        views.async_supplier_report_view if settings.ASYNC_VIEWS else views.supplier_report_view,
+        name="supplier_report_view",
+    ),
     path("reports/suppliers.csv", views.supplier_report_csv, name="supplier_report_csv"),
+    path("reports/history.json", views.inventory_history_json, name="inventory_history_json"),
+    path("api/stock/adjust/", views.stock_adjust_api, name="stock_adjust_api"),
 
 
 
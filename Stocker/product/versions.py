@@ -0,0 +1,55 @@
+"""
+Shared version counters for the caches kept by the web processes.
+
+A cache keyed on a version (the dashboard snapshot, memoized filter
+results, inventory page fragments) is invalidated by bumping that version.
+The counters are DataVersion rows on the primary rather than cache
+entries: with a per-process cache a bump made by the job runner would
+never reach the web processes. Reads always go to the primary so a
+lagging replica can't hand out an old version.
+"""
+from asgiref.sync import sync_to_async
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+
+def _versions():
+    return DataVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def get_versions(*names):
+    """
+    {name: value} for `names` in one query; 0 for a version never bumped.
+    """
+    found = dict(_versions().filter(name__in=names).values_list("name", "value"))
+    return {name: found.get(name, 0) for name in names}
+
+
+def get_version(name):
+    return get_versions(name)[name]
+
+
+async def aget_version(name):
+    return await sync_to_async(get_version)(name)
+
+
+def changed_at(name):
+    """
+    When `name` was last bumped, or None.
+    """
+    return _versions().filter(name=name).values_list("changed_at", flat=True).first()
+
+
+def bump_version(name):
+    """
+    Bump `name` after the current transaction commits, so a reader can't
+    cache pre-commit rows under the new version.
+    """
+    def bump():
+        now = timezone.now()
+        if not _versions().filter(name=name).update(value=F("value") + 1, changed_at=now):
+            _versions().bulk_create([DataVersion(name=name, value=1, changed_at=now)], ignore_conflicts=True)
+    transaction.on_commit(bump, using=DEFAULT_DB_ALIAS)
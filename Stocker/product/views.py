@@ -1,66 +1,79 @@
 import json
-from django.http import HttpRequest, HttpResponse
+import logging
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
-from .models import Product, Supplier, Category
+from .models import Product, Supplier, Category, InventorySnapshot
+from .filters import filter_products, has_filters
+from .rollups import supplier_totals
+from .csv_export import stream_csv, product_export_rows, inventory_report_products, inventory_report_rows
+from .snapshots import snapshot_range, last_days, MAX_RANGE_DAYS
+from .search import search_suppliers
+from .pagination import cursor_paginate, base_query
+from .uploads import stage_image
+from .fragments import table_versions
+from .stock import adjust_stock, refresh_stock_status, apply_stock_lines, InsufficientStock
+from jobs.runner import enqueue
 from datetime import date
-from django.contrib import messages
-from django.db.models import Count, Sum, F, Case, When, IntegerField, DecimalField, Q
-import csv, io
 from django.utils import timezone
-from django.core.paginator import Paginator
-from django.contrib.auth.decorators import login_required
-from django.core.mail import EmailMessage
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.contrib.auth.models import User
+from django.contrib import messages
+from django.db import transaction
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from Stocker.parallel import gather_queries
+from Stocker.replica import read_replica
 # Create your views here.
 
+logger = logging.getLogger(__name__)
+
+# Supplier report history chart: how many days, and for how many suppliers
+HISTORY_DAYS = 90
+HISTORY_SUPPLIERS = 5
+
+def _attach_supplier_ids(products):
+    """
+    Give every product a `supplier_ids` set with one query on the M2M table,
+    so templates can test membership without a query per supplier.
+    """
+    products = list(products)
+    supplier_ids = {p.id: set() for p in products}
+    links = Product.supplier.through.objects.filter(product_id__in=supplier_ids).values_list("product_id", "supplier_id")
+    for product_id, supplier_id in links:
+        supplier_ids[product_id].add(supplier_id)
+    for p in products:
+        p.supplier_ids = supplier_ids[p.id]
+    return products
+
+
 @login_required
 def inventory_view(request: HttpRequest):
-    products = Product.objects.all()
+    products = Product.objects.select_related("category").order_by("id")
     categories = Category.objects.all()
     suppliers = Supplier.objects.all()
     today = date.today().isoformat()
 
-    q = (request.GET.get('q') or '').strip()
-    cat_id    = request.GET.get("category", "")
     selected_suppliers = request.GET.getlist("supplier")
-    status    = request.GET.get("status", "")
-
-    if q:
-        products = products.filter(Q(name__icontains=q) |Q(sku__icontains=q))
-
-    if cat_id:
-        products = products.filter(category_id = cat_id)
-
-
-
-    if selected_suppliers:
-        n = len(selected_suppliers) # Number of suppliers the user picked.
-
-        products = (
-            products.annotate(
-                total_suppliers=Count('supplier', distinct=True),matched_suppliers=Count('supplier',filter=Q(supplier__id__in=selected_suppliers),distinct=True),
-            ).filter(matched_suppliers=n).filter(total_suppliers=n)
-        )
-
-    if status:
-        products = products.filter(stock_status=status)
-
-   
-    paginator = Paginator(products, 12) 
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-
-    # keep all current query params except 'page'
-    params = request.GET.copy()
-    params.pop('page', None)
-    base_qs = params.urlencode()
-
-
+    products = filter_products(products, request.GET, ranked=True)
+
+    page_obj = cursor_paginate(products, request.GET, 12)
+    page_obj.object_list = _attach_supplier_ids(page_obj.object_list)
+
+    # keep all current query params except the page cursors
+    base_qs = base_query(request.GET)
+
+    # Cards, edit forms and filter lists are cached fragments; the category
+    # and supplier querysets only run when one of them has to be rendered
+    category_version, supplier_version = table_versions(Category, Supplier)
+    fragments = {
+        'fragment_ttl': settings.FRAGMENT_CACHE_TTL,
+        'category_version': category_version,
+        'supplier_version': supplier_version,
+        'can_delete': request.user.is_staff and request.user.has_perm('product.delete_product'),
+    }
 
     return render(request, 'products/inventory.html', {'base_qs': base_qs, 'today_date': today, 'products': page_obj, 'page_obj': page_obj, 'categories': categories,
-     'suppliers': suppliers, "stock_status_choices": Product.STOCK_STATUS_CHOICES, 'selected_suppliers': selected_suppliers})
+     'suppliers': suppliers, "stock_status_choices": Product.STOCK_STATUS_CHOICES, 'selected_suppliers': selected_suppliers, **fragments})
 
 
 @login_required
@@ -83,30 +96,34 @@ def add_product_view(request: HttpRequest):
         description = request.POST['description']
         image = request.FILES.get('image')
 
-        
-        try:
-            category = Category.objects.get(id=category_id)
-            product = Product.objects.create(
-                name=name,
-                sku=sku,
-                category=category,
-                quantity=quantity,
-                reorder_level=reorder_level,
-                cost_price=cost_price,
-                expiry_date=expiry_date or None,
-                stock_status=stock_status,
-                description=description,
-                image=image
-            )
-            messages.success(request, "Product added successfully.", "alert-success")
-
-            suppliers_ids = request.POST.getlist('supplier')
-            product.supplier.set(suppliers_ids)
-        except Exception as e:
-            print(e)
+        if Product.objects.filter(sku=sku).exists():
             messages.error(request, "SKU must be uniqe!", "alert-danger")
             return redirect('product:add_product_view')
 
+        try:
+            with transaction.atomic():
+                category = Category.objects.get(id=category_id)
+                product = Product.objects.create(
+                    name=name,
+                    sku=sku,
+                    category=category,
+                    quantity=quantity,
+                    reorder_level=reorder_level,
+                    cost_price=cost_price,
+                    expiry_date=expiry_date or None,
+                    stock_status=stock_status,
+                    description=description,
+                )
+                suppliers_ids = request.POST.getlist('supplier')
+                product.supplier.set(suppliers_ids)
+                if image:
+                    stage_image(product, image, request.user)
+        except Exception:
+            logger.exception("Could not add product %r", sku)
+            messages.error(request, "The product could not be saved, please check its details.", "alert-danger")
+            return redirect('product:add_product_view')
+
+        messages.success(request, "Product added successfully.", "alert-success")
         return redirect('product:inventory_view')
 
         
@@ -116,84 +133,122 @@ def add_product_view(request: HttpRequest):
 from django.urls import reverse
 
 
+def _back_to_inventory(request):
+    """
+    Redirect to the inventory page the form was posted from: the edit and
+    delete forms carry its filters and page cursor in their query string.
+    """
+    url = reverse('product:inventory_view')
+    if request.GET:
+        url = f"{url}?{request.GET.urlencode()}"
+    return redirect(url)
+
+
 @login_required
 def edit_product_view(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    page = request.GET.get("page", 1) 
 
     if request.method == "POST":
 
         sku = request.POST.get('sku')
         if Product.objects.filter(sku=sku).exclude(id=product.id).exists():
             messages.error(request, "SKU must be uniqe!", "alert-danger")
-            return redirect('product:inventory_view')
+            return _back_to_inventory(request)
 
         product.name = request.POST.get("name")
-        product.quantity = request.POST.get("quantity")
-        product.reorder_level = request.POST.get("reorder_level")          
-
-       
-
+        product.reorder_level = int(request.POST.get("reorder_level"))
         product.cost_price= request.POST.get("cost_price")
-        product.quantity= request.POST.get("quantity")
         expiry_date = request.POST.get("expiry_date")
         if expiry_date:
             product.expiry_date = expiry_date
         else:
             product.expiry_date = None
 
-
-
-        if product.quantity == '0':
-            product.stock_status = "out_of_stock"
-        elif int(product.quantity) < int(product.reorder_level):
-            product.stock_status = "almost_done"
-        else:
-            product.stock_status = "in_stock"
-
-
-        
-
         product.description= request.POST.get("description")
 
-        image_file = request.FILES.get("image")
-        if image_file:
-            product.image = image_file
-
         category_id = request.POST.get("category")
         if category_id:
             product.category = get_object_or_404(Category, id=category_id)
 
-        image_file = request.FILES.get("image")
-        if image_file:
-            product.image = image_file 
+        # Apply the change the clerk made to the quantity they were shown, so
+        # a concurrent edit or stock movement is not overwritten.
+        shown_quantity = request.POST.get("original_quantity") or product.quantity
+        delta = int(request.POST.get("quantity")) - int(shown_quantity)
 
-        product.save()
+        try:
+            with transaction.atomic():
+                product.save(update_fields=[
+                    "name", "reorder_level", "cost_price", "expiry_date",
+                    "description", "category", "updated_at",
+                ])
+                if delta:
+                    adjust_stock(product, delta, kind="adjust", reason="Edited on the inventory page", user=request.user)
+                else:
+                    # The reorder level may have changed
+                    refresh_stock_status([product.id])
+                    product.refresh_from_db(fields=["quantity", "stock_status"])
+        except InsufficientStock:
+            messages.error(request, "Not enough stock left for that change.", "alert-danger")
+            return _back_to_inventory(request)
+        except ValueError:
+            messages.error(request, "That quantity is out of range.", "alert-danger")
+            return _back_to_inventory(request)
 
         supplier_ids = request.POST.getlist("supplier")
         product.supplier.set(supplier_ids)
 
-        # Send alert if low stock
-        if product.stock_status in ["almost_done", "out_of_stock"]:
-            send_low_stock_alert(product)
+        image_file = request.FILES.get("image")
+        if image_file:
+            stage_image(product, image_file, request.user)
 
-        return redirect(f"{reverse('product:inventory_view')}?page={page}") # Redirect to the same page.
+        return _back_to_inventory(request) # Redirect to the same page.
+
+@require_POST
+def stock_adjust_api(request: HttpRequest):
+    """
+    Batch stock changes for scanners and integrations. Takes a JSON body
+    `{"reason": "...", "lines": [{"sku": "A-1", "delta": -2},
+    {"sku": "B-7", "absolute_quantity": 40}, ...]}` and answers with one
+    result per line.
+
+    Authenticates like the pages: clients need the session cookie from
+    logging in, and CSRF protection applies, so they also send the
+    csrftoken cookie's value in an X-CSRFToken header. There is no token
+    login for machine clients; they script the login like a browser.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Body must be JSON."}, status=400)
+    lines = payload.get("lines") if isinstance(payload, dict) else None
+    if not isinstance(lines, list):
+        return JsonResponse({"error": "Expected a \"lines\" list."}, status=400)
+
+    reason = str(payload.get("reason") or "Stock API")[:255]
+    try:
+        results = apply_stock_lines(lines, reason=reason, user=request.user)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    applied = sum(1 for r in results if r["ok"])
+    return JsonResponse({"applied": applied, "rejected": len(results) - applied, "results": results})
 
 @login_required
 def delete_product_view(request: HttpRequest, product_id):
 
     if not ( request.user.is_staff and request.user.has_perm('product.delete_product')) :
         messages.error(request, "You do not have permission to delete products.", "alert-danger")
-        return redirect('product:inventory_view')
+        return _back_to_inventory(request)
     
     product = get_object_or_404(Product, id=product_id)
-    page = request.GET.get("page", 1) 
 
     product.delete()
     messages.success(request, "Product deleted successfully.", "alert-success")
 
 
-    return redirect(f"{reverse('product:inventory_view')}?page={page}") # Redirect to the same page.
+    return _back_to_inventory(request) # Redirect to the same page.
 
 @login_required
 def details_product_view(request: HttpRequest, product_id):
@@ -203,16 +258,12 @@ def details_product_view(request: HttpRequest, product_id):
 
 @login_required
 def categories_view(request: HttpRequest):
-    categories = Category.objects.all()
+    categories = Category.objects.order_by("id")
 
-    paginator = Paginator(categories, 12) 
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = cursor_paginate(categories, request.GET, 12)
 
-    # keep all current query params except 'page'
-    params = request.GET.copy()
-    params.pop('page', None)
-    base_qs = params.urlencode()
+    # keep all current query params except the page cursors
+    base_qs = base_query(request.GET)
 
 
     return render(request, 'categories/categories_page.html', {'base_qs': base_qs,'categories': page_obj, 'page_obj': page_obj})
@@ -231,10 +282,10 @@ def edit_category_view(request: HttpRequest, category_id):
         try:
             category.name = request.POST.get('name', category.name)
             category.description = request.POST.get('description', '')
+            category.save()
             image_file = request.FILES.get('image')
             if image_file:
-                category.image = image_file
-            category.save()
+                stage_image(category, image_file, request.user)
             messages.success(request, "Category updated.", "alert-success")
         except Exception as e:
             messages.error(request, "Category Couldn't updated.", "alert-danger")
@@ -271,11 +322,12 @@ def add_category_view(request: HttpRequest):
         description = request.POST.get("description")
         image = request.FILES.get("image")
         try:
-            Category.objects.create (
+            category = Category.objects.create (
                 name = name,
                 description = description,
-                image = image
             )
+            if image:
+                stage_image(category, image, request.user)
             messages.success(request, "Category added successfully.", "alert-success")
 
         except Exception as e :
@@ -287,20 +339,16 @@ def add_category_view(request: HttpRequest):
 @login_required
 def suppliers_view(request:HttpRequest):
 
-    suppliers = Supplier.objects.all()
+    suppliers = Supplier.objects.order_by("id")
     q = (request.GET.get('q') or '').strip()
 
     if q:
-        suppliers = suppliers.filter(Q(name__icontains=q))
+        suppliers = search_suppliers(suppliers, q, ranked=True)
 
-    paginator = Paginator(suppliers, 12) 
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = cursor_paginate(suppliers, request.GET, 12)
 
-    # keep all current query params except 'page'
-    params = request.GET.copy()
-    params.pop('page', None)
-    base_qs = params.urlencode()
+    # keep all current query params except the page cursors
+    base_qs = base_query(request.GET)
         
     return render(request, "suppliers/suppliers_page.html", {'base_qs': base_qs, 'suppliers':page_obj, 'page_obj':page_obj})
 
@@ -321,13 +369,14 @@ def add_supplier_view(request: HttpRequest):
         image = request.FILES.get("image")
 
         try:
-            Supplier.objects.create (
+            supplier = Supplier.objects.create (
                 name = name,
                 phone = phone,
                 email = email,
                 website = website,
-                image=image
             )
+            if image:
+                stage_image(supplier, image, request.user)
             messages.success(request, "Supplier added successfully.", "alert-success")
 
         except Exception as e :
@@ -368,10 +417,10 @@ def edit_supplier_view(request: HttpRequest, supplier_id):
             supplier.phone = request.POST.get('phone', '')
             supplier.email = request.POST.get('email', '')
             supplier.website = request.POST.get('website', '')
+            supplier.save()
             image_file = request.FILES.get('image')
             if image_file:
-                supplier.image = image_file
-            supplier.save()
+                stage_image(supplier, image_file, request.user)
             messages.success(request, "Supplier updated.", "alert-success")
         except Exception as e:
             messages.error(request, "Supplier Couldn't updated.", "alert-danger")
@@ -388,72 +437,25 @@ def supplier_details_view(request, supplier_id):
     return render(request, "suppliers/supplier_details.html", {'supplier': supplier, 'products_by_supplier': products_by_supplier})
 
 
-def _sanitize_csv(text: str) -> str:
-    """
-    Prevent CSV injection when opening in Excel by prefixing risky values.
-    """
-    if text and text[0] in ("=", "+", "-", "@"):
-        return "'" + text
-    return text
-
-
-
 @login_required
 def export_products_csv(request):
-    qs = Product.objects.all()
-
-    timestamp = timezone.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"products-{timestamp}.csv"
-
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    # Write BOM so Excel opens UTF-8 correctly (helps with Arabic)
-    response.write("\ufeff")
-
-    writer = csv.writer(response)
-    writer.writerow([
-        "ID",
-        "Name",
-        "SKU",
-        "Category",
-        "Suppliers",
-        "Cost Price",
-        "Quantity",
-        "Reorder Level",
-        "Stock Status",
-        "Expiry Date",
-        "Description",
-        "Image URL",
-        "Created",
-        "Updated",
-    ])
-
-    for p in qs.select_related("category").prefetch_related("supplier"):
-        suppliers = ", ".join(s.name for s in p.supplier.all())
-        expiry = p.expiry_date.strftime("%Y-%m-%d") if p.expiry_date else ""
-        img_url = p.image.url if (p.image and p.image.name) else ""
-
-        writer.writerow([
-            p.id,
-            _sanitize_csv(p.name or ""),
-            _sanitize_csv(p.sku or ""),
-            p.category.name if p.category_id else "",
-            suppliers,
-            str(p.cost_price or ""),
-            p.quantity,
-            p.reorder_level,
-            p.stock_status,
-            expiry,
-            (p.description or "").replace("\r\n", " ").replace("\n", " "),
-            img_url,
-            p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
-            p.updated_at.strftime("%Y-%m-%d %H:%M") if p.updated_at else "",
-        ])
+    job = enqueue("export_products", user=request.user)
+    messages.success(request, "Export started. The file will be ready to download shortly.", "alert-success")
+    return redirect("jobs:job_detail_view", job_id=job.id)
+
 
+def _csv_download(rows, prefix):
+    response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{prefix}-{timezone.now().strftime("%Y%m%d-%H%M%S")}.csv"'
     return response
 
 
+@login_required
+def stream_products_csv(request):
+    # The same export streamed straight back, for clients that can't poll a job
+    return _csv_download(product_export_rows(Product.objects.all()), "products")
+
+
 @login_required
 def import_products_csv(request):
     if request.method == "POST" and request.FILES.get("csv_file"):
@@ -463,209 +465,52 @@ def import_products_csv(request):
             messages.error(request, "Please upload a CSV file.")
             return redirect("product:inventory_view")
 
-        # Decode and read CSV
-        try:
-            data_set = csv_file.read().decode("utf-8-sig")  # handles BOM
-        except UnicodeDecodeError:
-            messages.error(request, "Invalid file encoding. Please use UTF-8.")
-            return redirect("product:inventory_view")
-
-        io_string = io.StringIO(data_set)
-        reader = csv.DictReader(io_string)
-
-        imported_count = 0
-        for row in reader:
-            sku = row.get("SKU", "").strip()
-            if not sku:
-                continue
-
-            category_name = row.get("Category", "").strip()
-            category_obj = None
-            if category_name:
-                category_obj, _ = Category.objects.get_or_create(name=category_name)
-
-            product, created = Product.objects.update_or_create(
-                sku=sku,
-                defaults={
-                    "name": row.get("Name", "").strip(),
-                    "category": category_obj,
-                    "description": row.get("Description", "").strip(),
-                    "quantity": int(row.get("Quantity", 0) or 0),
-                    "reorder_level": int(row.get("Reorder Level", 0) or 0),
-                    "cost_price": row.get("Cost Price", 0) or 0,
-                    "stock_status": row.get("Stock Status", "in_stock"),
-                },
-            )
-
-            supplier_names = row.get("Suppliers", "")
-            if supplier_names:
-                supplier_list = []
-                for s_name in supplier_names.split(","):
-                    s_name = s_name.strip()
-                    if s_name:
-                        supplier_obj, _ = Supplier.objects.get_or_create(name=s_name)
-                        supplier_list.append(supplier_obj)
-                product.supplier.set(supplier_list)
-
-            imported_count += 1
-
-        messages.success(request, f"Imported {imported_count} products successfully!", "alert-success")
-        return redirect("product:inventory_view")
+        job = enqueue("import_products", user=request.user, input_file=csv_file)
+        messages.success(request, "Import started. Products will appear as rows are processed.", "alert-success")
+        return redirect("jobs:job_detail_view", job_id=job.id)
 
     messages.error(request, "No file uploaded.")
     return redirect("product:inventory_view")
 
 
 
-def _sanitize_csv(text: str) -> str:
-    if text and str(text)[0] in ("=", "+", "-", "@"):
-        return "'" + str(text)
-    return str(text)
+@login_required
+def inventory_report_csv(request):
+    # Respects the same filters as the inventory page
+    job = enqueue("inventory_report", user=request.user, params={"query": request.GET.urlencode()})
+    messages.success(request, "Inventory report started.", "alert-success")
+    return redirect("jobs:job_detail_view", job_id=job.id)
 
-def _ts_filename(prefix: str, ext="csv"):
-    return f'{prefix}-{timezone.now().strftime("%Y%m%d-%H%M%S")}.{ext}'
 
 @login_required
-def inventory_report_csv(request):
-    # Optional: respect same filters as inventory page
-    qs = Product.objects.select_related("category").prefetch_related("supplier").all()
+def stream_inventory_report_csv(request):
+    return _csv_download(inventory_report_rows(*inventory_report_products(request.GET)), "inventory-report")
 
-    q = (request.GET.get('q') or '').strip()
-    if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(sku__icontains=q))
+def supplier_report_queries(params):
+    """
+    The supplier report's independent queries, as name -> function returning
+    the evaluated result, so the async view can run them concurrently.
+    """
+    def suppliers():
+        # Filter the same way as the inventory page; unfiltered reports read the rollups
+        qs = None
+        if has_filters(params, with_suppliers=False):
+            qs = filter_products(Product.objects.all(), params, with_suppliers=False)
+        return list(supplier_totals(qs))
 
-    category_id = request.GET.get("category")
-    if category_id:
-        qs = qs.filter(category_id=category_id)
+    def history():
+        # Value trend of the biggest suppliers overall (the snapshots aren't
+        # filtered either), read from the daily snapshots
+        days = last_days(HISTORY_DAYS)
+        top = list(supplier_totals()[:HISTORY_SUPPLIERS])
+        rows = snapshot_range(InventorySnapshot.SCOPE_SUPPLIER, days[0], days[-1], [s.id for s in top])
+        return days, top, rows
 
-    selected_suppliers = request.GET.getlist("supplier")
-    if selected_suppliers:
-        n = len(selected_suppliers)
-        qs = (
-            qs.annotate(
-                total_suppliers=Count('supplier', distinct=True),
-                matched_suppliers=Count('supplier', filter=Q(supplier__id__in=selected_suppliers), distinct=True),
-            )
-            .filter(matched_suppliers=n)
-            .filter(total_suppliers=n)
-        )
-
-    status = request.GET.get("status")
-    if status:
-        qs = qs.filter(stock_status=status)
-
-    # KPI aggregates
-    totals = qs.aggregate(
-        total_products=Count("id"),
-        total_qty=Sum("quantity"),
-        total_value=Sum(F("quantity") * F("cost_price"), output_field=DecimalField()),
-        in_stock=Count(Case(When(stock_status="in_stock", then=1), output_field=IntegerField())),
-        almost_done=Count(Case(When(stock_status="almost_done", then=1), output_field=IntegerField())),
-        out_of_stock=Count(Case(When(stock_status="out_of_stock", then=1), output_field=IntegerField())),
-    )
-
-    # Per-category breakdown
-    by_category = (
-        qs.values("category__name")
-          .annotate(
-              products=Count("id"),
-              qty=Sum("quantity"),
-              value=Sum(F("quantity") * F("cost_price"), output_field=DecimalField()),
-          )
-          .order_by("category__name")
-    )
-
-    # CSV response
-    resp = HttpResponse(content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="{_ts_filename("inventory-report")}"'
-    resp.write("\ufeff")
-    w = csv.writer(resp)
-
-    # Header: KPIs section
-    w.writerow(["Inventory Report"])
-    w.writerow(["Generated At", timezone.now().strftime("%Y-%m-%d %H:%M")])
-    w.writerow([])
-    w.writerow(["KPI", "Value"])
-    w.writerow(["Total Products", totals["total_products"] or 0])
-    w.writerow(["Total Quantity", totals["total_qty"] or 0])
-    w.writerow(["Total Inventory Value", totals["total_value"] or 0])
-    w.writerow(["In Stock", totals["in_stock"] or 0])
-    w.writerow(["Almost Done", totals["almost_done"] or 0])
-    w.writerow(["Out of Stock", totals["out_of_stock"] or 0])
-
-    # Category breakdown
-    w.writerow([])
-    w.writerow(["By Category"])
-    w.writerow(["Category", "Products", "Total Qty", "Total Value"])
-    for row in by_category:
-        w.writerow([
-            row["category__name"] or "—",
-            row["products"] or 0,
-            row["qty"] or 0,
-            row["value"] or 0,
-        ])
-
-    # Detailed lines (optional but handy)
-    w.writerow([])
-    w.writerow(["Detailed Products"])
-    w.writerow(["ID","Name","SKU","Category","Suppliers","Cost Price","Qty","Reorder","Status","Expiry Date","Description"])
-    for p in qs:
-        suppliers = ", ".join(s.name for s in p.supplier.all())
-        expiry = p.expiry_date.strftime("%Y-%m-%d") if p.expiry_date else ""
-        w.writerow([
-            p.id,
-            _sanitize_csv(p.name or ""),
-            _sanitize_csv(p.sku or ""),
-            p.category.name if p.category_id else "",
-            suppliers,
-            str(p.cost_price or 0),
-            p.quantity,
-            p.reorder_level,
-            p.stock_status,
-            expiry,
-            (p.description or "").replace("\r\n", " ").replace("\n", " "),
-        ])
-
-    return resp
+    return {"suppliers": suppliers, "history": history}
 
-@login_required
-def supplier_report_view(request):
-    # Filter the same way you already do
-    qs = Product.objects.all()
 
-    q = (request.GET.get('q') or '').strip()
-    if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(sku__icontains=q))
-
-    category_id = request.GET.get("category")
-    if category_id:
-        qs = qs.filter(category_id=category_id)
-
-    status = request.GET.get("status")
-    if status:
-        qs = qs.filter(stock_status=status)
-
-    suppliers_qs = (
-        Supplier.objects.annotate(
-            product_count=Count("products", filter=Q(products__in=qs), distinct=True),
-            total_qty=Sum("products__quantity", filter=Q(products__in=qs)),
-            total_value=Sum(
-                F("products__quantity") * F("products__cost_price"),
-                filter=Q(products__in=qs),
-                output_field=DecimalField()
-            ),
-            low_stock=Count(
-                Case(When(products__stock_status="almost_done", then=1), output_field=IntegerField()),
-                filter=Q(products__in=qs),
-            ),
-            out_stock=Count(
-                Case(When(products__stock_status="out_of_stock", then=1), output_field=IntegerField()),
-                filter=Q(products__in=qs),
-            ),
-        )
-        .filter(product_count__gt=0)
-        .order_by("-total_value", "name")
-    )
+def _supplier_report_context(request, results):
+    suppliers_qs = results["suppliers"]
 
     labels = [s.name for s in suppliers_qs]
     values_value = [float(s.total_value or 0) for s in suppliers_qs]
@@ -695,7 +540,17 @@ def supplier_report_view(request):
             "avg_unit_cost": avg_unit_cost,
         })
 
-    context = {
+    history_days, top, rows = results["history"]
+    history = {(row["object_id"], row["day"]): float(row["total_value"]) for row in rows}
+    history_days = [d for d in history_days if any((s.id, d) in history for s in top)]
+    history_series = [
+        {"label": s.name, "data": [history.get((s.id, d)) for d in history_days]}
+        for s in top
+    ]
+
+    return {
+        "history_labels_json": json.dumps([d.strftime("%b %d") for d in history_days]),
+        "history_series_json": json.dumps(history_series),
         "labels_json": json.dumps(labels),
         "values_value_json": json.dumps(values_value),
         "values_qty_json": json.dumps(values_qty),
@@ -706,101 +561,63 @@ def supplier_report_view(request):
         "suppliers_table": suppliers_table,                 # <-- new
         "querystring": request.GET.urlencode(),
     }
-    return render(request, "suppliers/suppliers_charts.html", context)
-
-@login_required
-def supplier_report_csv(request):
-    qs = Product.objects.all()
-
-    q = (request.GET.get('q') or '').strip()
-    if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(sku__icontains=q))
-    category_id = request.GET.get("category")
-    if category_id:
-        qs = qs.filter(category_id=category_id)
-    status = request.GET.get("status")
-    if status:
-        qs = qs.filter(stock_status=status)
-
-    suppliers_qs = (
-        Supplier.objects.annotate(
-            product_count=Count("products", filter=Q(products__in=qs), distinct=True),
-            total_qty=Sum("products__quantity", filter=Q(products__in=qs)),
-            total_value=Sum(
-                F("products__quantity") * F("products__cost_price"),
-                filter=Q(products__in=qs),
-                output_field=DecimalField()
-            ),
-            low_stock=Count(
-                Case(When(products__stock_status="almost_done", then=1), output_field=IntegerField()),
-                filter=Q(products__in=qs),
-            ),
-            out_stock=Count(
-                Case(When(products__stock_status="out_of_stock", then=1), output_field=IntegerField()),
-                filter=Q(products__in=qs),
-            ),
-        )
-        .filter(product_count__gt=0)
-        .order_by("-total_value", "name")
-    )
-
-    # Totals for percentage calculation
-    totals = suppliers_qs.aggregate(
-        sum_value=Sum("total_value"),
-        sum_qty=Sum("total_qty"),
-    )
-    sum_value = float(totals["sum_value"] or 0.0)
-    sum_qty = int(totals["sum_qty"] or 0)
-
-    resp = HttpResponse(content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="{_ts_filename("supplier-report")}"'
-    resp.write("\ufeff")
-    w = csv.writer(resp)
-
-    w.writerow(["Supplier Report"])
-    w.writerow(["Generated At", timezone.now().strftime("%Y-%m-%d %H:%M")])
-    w.writerow([])
-    w.writerow(["Supplier","Products","Total Qty","Total Value","% of Value","% of Qty","Low Stock","Out of Stock","Avg Unit Cost"])
-
-    for s in suppliers_qs:
-        tv = float(s.total_value or 0.0)
-        tq = int(s.total_qty or 0)
-        pct_val = round((tv / (sum_value or 1.0)) * 100, 2) if sum_value else 0.0
-        pct_qty = round((tq / (sum_qty or 1)) * 100, 2) if sum_qty else 0.0
-        avg_unit_cost = round(tv / tq, 2) if tq else 0.0
 
-        w.writerow([
-            s.name,
-            s.product_count or 0,
-            tq,
-            round(tv, 2),
-            pct_val,
-            pct_qty,
-            s.low_stock or 0,
-            s.out_stock or 0,
-            avg_unit_cost,
-        ])
 
-    return resp
-
-
-
-
-def send_low_stock_alert(product):
-    admin_emails = list(User.objects.filter(is_superuser=True).values_list('email', flat=True))
-
-    subject = f"Low Stock Alert - {product.name}"
-    html_message = render_to_string("low_stock_alert.html", {"products": [product]})
+@login_required
+@read_replica
+def supplier_report_view(request):
+    results = {name: query() for name, query in supplier_report_queries(request.GET).items()}
+    return render(request, "suppliers/suppliers_charts.html", _supplier_report_context(request, results))
 
-    # Send to admin email (set in .env)
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email=settings.EMAIL_HOST_USER,
-        to=admin_emails
-    )
-    email.content_subtype = "html"
-    email.send(fail_silently=False)
 
+@login_required
+@read_replica
+async def async_supplier_report_view(request):
+    # Same page, with the report's queries running concurrently (see Stocker.parallel)
+    results = await gather_queries(supplier_report_queries(request.GET))
+    # The templates touch the session and user, which are still sync-only
+    return await sync_to_async(render)(request, "suppliers/suppliers_charts.html", _supplier_report_context(request, results))
 
+@login_required
+@read_replica
+def inventory_history_json(request: HttpRequest):
+    """
+    Daily snapshot totals for charts and integrations:
+    `?scope=all|category|supplier&id=<id>&start=YYYY-MM-DD&end=YYYY-MM-DD`,
+    the last HISTORY_DAYS days by default.
+    """
+    scopes = {
+        "all": InventorySnapshot.SCOPE_ALL,
+        "category": InventorySnapshot.SCOPE_CATEGORY,
+        "supplier": InventorySnapshot.SCOPE_SUPPLIER,
+    }
+    scope = request.GET.get("scope", "all")
+    object_id = request.GET.get("id", "0")
+    if scope not in scopes or not object_id.isdigit():
+        return JsonResponse({"error": "Unknown scope or id."}, status=400)
+    try:
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else timezone.localdate()
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else last_days(HISTORY_DAYS, end)[0]
+    except ValueError:
+        return JsonResponse({"error": "Dates must be YYYY-MM-DD."}, status=400)
+    if start > end or (end - start).days >= MAX_RANGE_DAYS:
+        return JsonResponse({"error": f"start must be before end, at most {MAX_RANGE_DAYS} days apart."}, status=400)
+
+    object_id = 0 if scope == "all" else int(object_id)
+    rows = snapshot_range(scopes[scope], start, end, [object_id])
+    return JsonResponse({
+        "scope": scope,
+        "id": object_id,
+        "start": start,
+        "end": end,
+        "points": [
+            {**{k: v for k, v in row.items() if k != "object_id"}, "total_value": float(row["total_value"])}
+            for row in rows
+        ],
+    })
 
+@login_required
+def supplier_report_csv(request):
+    job = enqueue("supplier_report", user=request.user, params={"query": request.GET.urlencode()})
+    messages.success(request, "Supplier report started.", "alert-success")
+    return redirect("jobs:job_detail_view", job_id=job.id)